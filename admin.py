@@ -532,6 +532,11 @@ def admin_page(section_name):
             value=config.get('academic_year', '2024-2025')
         )
         
+        archive_slips = st.checkbox(
+            "Keep generated fee slips in the slip archive",
+            value=config.get('archive_slips', True)
+        )
+        
         submit = st.form_submit_button("Update School Configuration")
         
         if submit:
@@ -544,7 +549,8 @@ def admin_page(section_name):
                     'school_phone': school_phone,
                     'school_email': school_email,
                     'principal_name': principal_name,
-                    'academic_year': academic_year
+                    'academic_year': academic_year,
+                    'archive_slips': archive_slips
                 })
                 
                 if save_school_config(config):
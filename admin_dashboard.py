@@ -4,6 +4,7 @@
 # type:ignore
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
 import os
 from datetime import datetime
@@ -13,6 +14,7 @@ from database import (
     initialize_files, load_student_details
 )
 from utils import format_currency
+from instrumentation import page_render, load_metrics, summarize_metrics
 import plotly.express as px
 import plotly.graph_objects as go
 
@@ -41,47 +43,107 @@ def admin_dashboard():
         "👥 User Management", 
         "💸 Fee Settings", 
         "💳 Payment Systems",
-        "⚙️ School Configuration"
+        "⚙️ School Configuration",
+        "⏱️ Performance"
     ])
+    current_user = st.session_state.get('current_user')
     
     # Tab 1: Dashboard Overview
-    with tabs[0]:
+    with tabs[0], page_render("Dashboard / 📊 Dashboard Overview", user=current_user):
         dashboard_overview()
     
     # Tab 2: Enter Fees
-    with tabs[1]:
+    with tabs[1], page_render("Dashboard / 💰 Enter Fees", user=current_user):
         from fees_entry import fees_entry_page
         fees_entry_page()
     
     # Tab 3: Student Management
-    with tabs[2]:
+    with tabs[2], page_render("Dashboard / 🎒 Student Management", user=current_user):
         student_management()
     
     # Tab 4: Class-wise Details
-    with tabs[3]:
+    with tabs[3], page_render("Dashboard / 🏫 Class-wise Details", user=current_user):
         class_wise_fee_details()
     
     # Tab 5: Analytics & Reports
-    with tabs[4]:
+    with tabs[4], page_render("Dashboard / 📈 Analytics & Reports", user=current_user):
         analytics_reports()
     
     # Tab 6: User Management
-    with tabs[5]:
+    with tabs[5], page_render("Dashboard / 👥 User Management", user=current_user):
         from admin import user_management
         user_management()
     
     # Tab 7: Fee Settings
-    with tabs[6]:
+    with tabs[6], page_render("Dashboard / 💸 Fee Settings", user=current_user):
         fee_settings()
     
     # Tab 8: Payment Systems
-    with tabs[7]:
+    with tabs[7], page_render("Dashboard / 💳 Payment Systems", user=current_user):
         payment_systems()
     
     # Tab 9: School Configuration
-    with tabs[8]:
+    with tabs[8], page_render("Dashboard / ⚙️ School Configuration", user=current_user):
         from admin import admin_page
         admin_page("School Configuration")
+    
+    # Tab 10: Performance (admins only)
+    with tabs[9]:
+        if st.session_state.get('is_admin', False):
+            performance_overview()
+        else:
+            st.warning("⚠️ Only administrators can view performance metrics")
+
+def performance_overview():
+    """Page render timings and file I/O per page"""
+    st.header("⏱️ Performance")
+    
+    records = load_metrics()
+    if not records:
+        st.info("No page renders recorded yet")
+        return
+    
+    df = pd.DataFrame(records)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        pages = ["All Pages"] + sorted(df["page"].unique().tolist())
+        selected_page = st.selectbox("Page", pages, key="perf_page")
+    with col2:
+        users = ["All Users"] + sorted(u for u in df["user"].unique().tolist() if u)
+        selected_user = st.selectbox("User", users, key="perf_user")
+    
+    if selected_page != "All Pages":
+        df = df[df["page"] == selected_page]
+    if selected_user != "All Users":
+        df = df[df["user"] == selected_user]
+    
+    if df.empty:
+        st.info("No renders match the selected filters")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Renders", len(df))
+    col2.metric("p50", f"{df['wall_ms'].quantile(0.5):.0f} ms")
+    col3.metric("p95", f"{df['wall_ms'].quantile(0.95):.0f} ms")
+    col4.metric("Avg Ledger Rows", f"{df['rows'].mean():.0f}")
+    
+    summary = summarize_metrics(df.to_dict("records"))
+    st.subheader("By Page")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    
+    fig = px.bar(summary, x="Page", y=["p50 (ms)", "p95 (ms)"], barmode="group",
+                 title="Render Time by Page")
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.subheader("Recent Renders")
+    st.dataframe(df.tail(50).iloc[::-1], use_container_width=True, hide_index=True)
+    
+    from routes import import_time_report
+    import_times = import_time_report()
+    if import_times:
+        st.subheader("Page Module Import Times")
+        st.dataframe(pd.DataFrame(import_times), use_container_width=True, hide_index=True)
 
 def dashboard_overview():
     """Dashboard overview with key metrics"""
@@ -304,14 +366,94 @@ def student_management():
             st.dataframe(filtered_df, use_container_width=True)
             
             # Download option
-            csv = filtered_df.to_csv(index=False).encode('utf-8')
-            st.download_button(
-                label="Download Students as CSV",
-                data=csv,
-                file_name="students_list.csv",
-                mime="text/csv"
+            from exports import download_export, data_version
+            download_export(
+                "Download Students",
+                "students_list",
+                lambda: filtered_df,
+                "students_list",
+                query={"class": selected_class, "search": search_name},
+                version=data_version("student_details.json"),
+                key="students_list_export"
             )
 
+def class_fee_analysis(class_df, student_details, selected_class):
+    """Get paid months and outstanding balance for every student in a class"""
+    # Get all students in this class
+    class_students = {
+        student_id: details for student_id, details in student_details.items()
+        if details.get('class_category') == selected_class
+    }
+    if not class_students:
+        return pd.DataFrame()
+    
+    # Totals and paid months (of 12) for every student at once
+    student_ids = pd.Index(list(class_students), name='ID')
+    totals = class_df.groupby('ID')[['Monthly Fee', 'Annual Charges', 'Admission Fee', 'Received Amount']].sum()
+    totals = totals.reindex(student_ids).fillna(0)
+    paid_months = class_df[class_df['Monthly Fee'] > 0].groupby('ID')['Month'].nunique()
+    paid_months = paid_months.reindex(student_ids).fillna(0).astype(int)
+    
+    # Outstanding amount
+    total_due = totals['Monthly Fee'] + totals['Annual Charges'] + totals['Admission Fee']
+    outstanding = (total_due - totals['Received Amount']).clip(lower=0)
+    total_received = totals['Received Amount']
+    
+    return pd.DataFrame({
+        "Student ID": student_ids,
+        "Student Name": [info.get('student_name', '') for info in class_students.values()],
+        "Father Name": [info.get('father_name', '') for info in class_students.values()],
+        "Phone": [info.get('phone', '') for info in class_students.values()],
+        "Paid Months": paid_months.to_numpy(),
+        "Unpaid Months": 12 - paid_months.to_numpy(),
+        "Total Received": total_received.to_numpy(),
+        "Outstanding": outstanding.to_numpy(),
+        "Status": np.where(outstanding == 0, "Fully Paid", np.where(total_received > 0, "Partially Paid", "Not Paid"))
+    })
+
+def class_statistics(class_df):
+    """Students, amount collected and expected, and collection rate for a class's ledger rows"""
+    total_collected = class_df['Received Amount'].sum()
+    total_expected = (class_df['Monthly Fee'].sum() + 
+                     class_df['Annual Charges'].sum() + 
+                     class_df['Admission Fee'].sum())
+    return {
+        "Total Students": class_df['Student Name'].nunique(),
+        "Total Collected": total_collected,
+        "Total Expected": total_expected,
+        "Collection Rate": (total_collected / total_expected * 100) if total_expected > 0 else 0
+    }
+
+def analytics_tables(df):
+    """The tables behind the analytics charts, keyed by name"""
+    month_order = ["APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+                  "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"]
+    monthly_collection = df.groupby('Month')['Received Amount'].sum()
+    monthly_collection = monthly_collection.reindex([m for m in month_order if m in monthly_collection.index])
+    
+    fee_types = pd.Series({
+        'Monthly Fees': df[df['Monthly Fee'] > 0]['Monthly Fee'].sum(),
+        'Annual Charges': df[df['Annual Charges'] > 0]['Annual Charges'].sum(),
+        'Admission Fees': df[df['Admission Fee'] > 0]['Admission Fee'].sum()
+    })
+    
+    class_students = df.groupby('Class Category')['Student Name'].nunique().sort_values(ascending=False)
+    top_students = df.groupby('Student Name')['Received Amount'].sum().sort_values(ascending=False).head(10)
+    
+    payment_summary = df.groupby('Payment Method').agg({
+        'Received Amount': 'sum',
+        'ID': 'count'
+    }).reset_index()
+    payment_summary.columns = ['Payment Method', 'Total Amount', 'Number of Transactions']
+    
+    return {
+        "monthly_collection": monthly_collection.rename_axis('Month').reset_index(name='Amount'),
+        "fee_types": fee_types.rename_axis('Fee Type').reset_index(name='Amount'),
+        "students_by_class": class_students.rename_axis('Class').reset_index(name='Students'),
+        "top_students": top_students.rename_axis('Student Name').reset_index(name='Amount Paid'),
+        "payment_methods": payment_summary
+    }
+
 def class_wise_fee_details():
     """Class-wise fee details with outstanding and paid months"""
     st.header("🏫 Class-wise Fee Details")
@@ -340,75 +482,28 @@ def class_wise_fee_details():
     # Class statistics
     col1, col2, col3, col4 = st.columns(4)
     
-    total_students = class_df['Student Name'].nunique()
-    total_collected = class_df['Received Amount'].sum()
-    total_expected = (class_df['Monthly Fee'].sum() + 
-                     class_df['Annual Charges'].sum() + 
-                     class_df['Admission Fee'].sum())
+    stats = class_statistics(class_df)
     
     with col1:
-        st.metric("Total Students", total_students)
+        st.metric("Total Students", stats["Total Students"])
     with col2:
-        st.metric("Total Collected", format_currency(total_collected))
+        st.metric("Total Collected", format_currency(stats["Total Collected"]))
     with col3:
-        st.metric("Total Expected", format_currency(total_expected))
+        st.metric("Total Expected", format_currency(stats["Total Expected"]))
     with col4:
-        collection_rate = (total_collected / total_expected * 100) if total_expected > 0 else 0
-        st.metric("Collection Rate", f"{collection_rate:.1f}%")
+        st.metric("Collection Rate", f"{stats['Collection Rate']:.1f}%")
     
     st.divider()
     
     # Student-wise detailed analysis
     st.subheader("📋 Student-wise Detailed Analysis")
     
-    # Get all students in this class
-    class_students = {}
-    for student_id, details in student_details.items():
-        if details.get('class_category') == selected_class:
-            class_students[student_id] = details
+    analysis_df = class_fee_analysis(class_df, student_details, selected_class)
     
-    if not class_students:
+    if analysis_df.empty:
         st.info(f"No students found in {selected_class}")
         return
     
-    # Create detailed analysis for each student
-    analysis_data = []
-    
-    for student_id, student_info in class_students.items():
-        student_records = class_df[class_df['ID'] == student_id]
-        
-        # Calculate totals
-        total_monthly = student_records['Monthly Fee'].sum()
-        total_annual = student_records['Annual Charges'].sum()
-        total_admission = student_records['Admission Fee'].sum()
-        total_received = student_records['Received Amount'].sum()
-        
-        # Count paid months
-        paid_months = student_records[student_records['Monthly Fee'] > 0]['Month'].nunique()
-        
-        # All possible months
-        all_months = ["APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-                     "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"]
-        unpaid_months = 12 - paid_months
-        
-        # Outstanding amount
-        total_due = total_monthly + total_annual + total_admission
-        outstanding = max(0, total_due - total_received)
-        
-        analysis_data.append({
-            "Student ID": student_id,
-            "Student Name": student_info.get('student_name', ''),
-            "Father Name": student_info.get('father_name', ''),
-            "Phone": student_info.get('phone', ''),
-            "Paid Months": paid_months,
-            "Unpaid Months": unpaid_months,
-            "Total Received": total_received,
-            "Outstanding": outstanding,
-            "Status": "Fully Paid" if outstanding == 0 else "Partially Paid" if total_received > 0 else "Not Paid"
-        })
-    
-    analysis_df = pd.DataFrame(analysis_data)
-    
     # Display analysis
     st.dataframe(
         analysis_df.style.format({
@@ -439,12 +534,15 @@ def class_wise_fee_details():
         st.metric("Total Outstanding", format_currency(total_outstanding))
     
     # Download option
-    csv = analysis_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label=f"Download {selected_class} Analysis",
-        data=csv,
-        file_name=f"{selected_class}_analysis.csv",
-        mime="text/csv"
+    from exports import download_export, data_version
+    download_export(
+        f"Download {selected_class} Analysis",
+        "class_analysis",
+        lambda: analysis_df,
+        f"{selected_class}_analysis",
+        query={"class": selected_class},
+        version=data_version("fees_data.csv", "student_details.json"),
+        key="class_analysis_export"
     )
 
 def analytics_reports():
@@ -457,6 +555,8 @@ def analytics_reports():
         st.info("No fee records found")
         return
     
+    tables = analytics_tables(df)
+    
     tab1, tab2, tab3 = st.tabs(["📊 Collection Analysis", "🎒 Student Analysis", "💳 Payment Methods"])
     
     with tab1:
@@ -466,14 +566,11 @@ def analytics_reports():
         
         with col1:
             # Monthly collection trend
-            month_order = ["APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-                          "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"]
-            monthly_collection = df.groupby('Month')['Received Amount'].sum()
-            monthly_collection = monthly_collection.reindex([m for m in month_order if m in monthly_collection.index])
+            monthly_collection = tables["monthly_collection"]
             
             fig = px.line(
-                x=monthly_collection.index,
-                y=monthly_collection.values,
+                x=monthly_collection['Month'],
+                y=monthly_collection['Amount'],
                 title="Monthly Collection Trend",
                 markers=True,
                 labels={'x': 'Month', 'y': 'Amount (Rs.)'}
@@ -482,15 +579,11 @@ def analytics_reports():
         
         with col2:
             # Fee type distribution
-            fee_types = {
-                'Monthly Fees': df[df['Monthly Fee'] > 0]['Monthly Fee'].sum(),
-                'Annual Charges': df[df['Annual Charges'] > 0]['Annual Charges'].sum(),
-                'Admission Fees': df[df['Admission Fee'] > 0]['Admission Fee'].sum()
-            }
+            fee_types = tables["fee_types"]
             
             fig = px.pie(
-                values=list(fee_types.values()),
-                names=list(fee_types.keys()),
+                values=fee_types['Amount'],
+                names=fee_types['Fee Type'],
                 title="Fee Type Distribution"
             )
             st.plotly_chart(fig, use_container_width=True)
@@ -502,10 +595,10 @@ def analytics_reports():
         
         with col1:
             # Students by class
-            class_students = df.groupby('Class Category')['Student Name'].nunique().sort_values(ascending=False)
+            class_students = tables["students_by_class"]
             fig = px.bar(
-                x=class_students.index,
-                y=class_students.values,
+                x=class_students['Class'],
+                y=class_students['Students'],
                 title="Students by Class",
                 labels={'x': 'Class', 'y': 'Number of Students'}
             )
@@ -513,10 +606,10 @@ def analytics_reports():
         
         with col2:
             # Top paying students
-            top_students = df.groupby('Student Name')['Received Amount'].sum().sort_values(ascending=False).head(10)
+            top_students = tables["top_students"]
             fig = px.bar(
-                x=top_students.values,
-                y=top_students.index,
+                x=top_students['Amount Paid'],
+                y=top_students['Student Name'],
                 orientation='h',
                 title="Top 10 Paying Students",
                 labels={'x': 'Amount Paid (Rs.)', 'y': 'Student Name'}
@@ -526,23 +619,17 @@ def analytics_reports():
     with tab3:
         st.subheader("Payment Methods Analysis")
         
-        payment_methods = df.groupby('Payment Method')['Received Amount'].sum().sort_values(ascending=False)
+        payment_summary = tables["payment_methods"]
         
         fig = px.pie(
-            values=payment_methods.values,
-            names=payment_methods.index,
+            values=payment_summary['Total Amount'],
+            names=payment_summary['Payment Method'],
             title="Collection by Payment Method"
         )
         st.plotly_chart(fig, use_container_width=True)
         
         # Payment method details
         st.subheader("Payment Method Details")
-        payment_summary = df.groupby('Payment Method').agg({
-            'Received Amount': 'sum',
-            'ID': 'count'
-        }).reset_index()
-        payment_summary.columns = ['Payment Method', 'Total Amount', 'Number of Transactions']
-        
         st.dataframe(
             payment_summary.style.format({
                 'Total Amount': format_currency
@@ -0,0 +1,135 @@
+# [file name]: assets.py
+# [file content begin]
+# type:ignore
+import streamlit as st
+import base64
+import hashlib
+import io
+import os
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Source stylesheets live in ./assets, built content-hashed files go to ./static
+# which Streamlit serves at app/static/ (see .streamlit/config.toml)
+ASSET_DIR = os.path.join(APP_DIR, "assets")
+STATIC_DIR = os.path.join(APP_DIR, "static")
+STATIC_URL = "app/static"
+
+def static_serving_enabled():
+    """Check if Streamlit is serving the ./static folder"""
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+def _file_key(path):
+    """Get (mtime, size) for a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _write_static(name, data):
+    """Write a built asset into the static folder once"""
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    target = os.path.join(STATIC_DIR, name)
+    if not os.path.exists(target):
+        temp_path = f"{target}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, target)
+    return f"{STATIC_URL}/{name}"
+
+@st.cache_data(show_spinner=False)
+def _build_image(path, file_key, width):
+    """Load, resize and encode an image once per file version and width"""
+    from PIL import Image
+
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    digest = hashlib.sha256(raw + f":{width}".encode()).hexdigest()[:12]
+
+    image = Image.open(io.BytesIO(raw))
+    if width and image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=True)
+    data = buffer.getvalue()
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}-{digest}.png"
+
+    try:
+        url = _write_static(name, data)
+    except Exception as e:
+        print(f"Error writing static asset {name}: {str(e)}")
+        url = None
+
+    return {
+        "name": name,
+        "url": url,
+        "data_uri": f"data:image/png;base64,{base64.b64encode(data).decode('utf-8')}",
+        "bytes": len(data)
+    }
+
+def image_src(path, width=None):
+    """Get an <img> src for an image, or None if the file doesn't exist.
+
+    Returns the content-hashed static URL when static serving is enabled so
+    the browser can cache it, and a cached data URI otherwise.
+    """
+    file_key = _file_key(path)
+    if file_key is None:
+        return None
+
+    try:
+        asset = _build_image(path, file_key, width)
+    except Exception as e:
+        print(f"Error loading image {path}: {str(e)}")
+        return None
+
+    if asset["url"] and static_serving_enabled():
+        return asset["url"]
+    return asset["data_uri"]
+
+@st.cache_data(show_spinner=False)
+def _build_css(path, file_key):
+    """Read a stylesheet and publish a content-hashed copy once per file version"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}-{digest}.css"
+
+    try:
+        url = _write_static(name, raw)
+    except Exception as e:
+        print(f"Error writing static asset {name}: {str(e)}")
+        url = None
+
+    return {"name": name, "url": url, "css": raw.decode('utf-8')}
+
+def inject_css(file_name):
+    """Add a stylesheet from ./assets to the page.
+
+    With static serving enabled only a tiny @import of the content-hashed file
+    is sent on each rerun; otherwise the stylesheet is sent inline.
+    """
+    path = os.path.join(ASSET_DIR, file_name)
+    file_key = _file_key(path)
+    if file_key is None:
+        return False
+
+    asset = _build_css(path, file_key)
+
+    if asset["url"] and static_serving_enabled():
+        st.markdown(f'<style>@import url("{asset["url"]}");</style>', unsafe_allow_html=True)
+    else:
+        st.markdown(f"<style>\n{asset['css']}\n</style>", unsafe_allow_html=True)
+    return True
+# [file content end]
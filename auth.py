@@ -6,15 +6,14 @@ import os
 from datetime import datetime, timedelta
 from hashlib import sha256
 import re
-# ________________sensitive data______________________________________
-import smtplib
-
-# Email configuration
-GMAIL_ID = "nidakhurramalvi9@gmail.com"
-GMAIL_PSW = "zhkk ubtv saeo huxu"
+from mail_queue import queue_admin_notification
 
 def send_signup_notification(username, user_email):
-    """Send email notification when a new user signs up"""
+    """Queue an email notification to the admin when a new user signs up.
+
+    Sending happens on the mail queue's background thread; SMTP settings
+    come from mail_config.json or the SMTP_* environment variables.
+    """
     sub = "New User Registration - School Fees Management System"
     msg = f"""
 New user registration details:
@@ -30,17 +29,10 @@ School Management System
 """
 
     try:
-        s = smtplib.SMTP('smtp.gmail.com', 587)
-        s.starttls()
-        s.login(GMAIL_ID, GMAIL_PSW)
-        s.sendmail("School Management System", GMAIL_ID, f"Subject: {sub}\n\n{msg}")
-        s.quit()
-        print(f"Signup notification sent for user: {username}")
-        return True
+        return queue_admin_notification(sub, msg)
     except Exception as e:
-        print(f"Failed to send signup notification: {str(e)}")
+        print(f"Failed to queue signup notification: {str(e)}")
         return False
-# ________________sensitive data______________________________________
 
 def validate_email(email):
     """Validate email format and ensure it's a Gmail address"""
@@ -228,12 +220,11 @@ def login_page():
                         st.success(f"{message} Your 1-month free trial has started!") 
                         st.info(f"User '{new_username}' created with email: {new_email}")
                         
-                        # Send email notification ONLY ONCE here
-                        with st.spinner("Sending registration notification..."):
-                            if send_signup_notification(new_username, new_email):
-                                st.success("Registration notification sent to admin!")
-                            else:
-                                st.warning("User created but couldn't send notification email")
+                        # Queue the email notification ONLY ONCE here; it is sent in the background
+                        if send_signup_notification(new_username, new_email):
+                            st.success("Registration notification queued for the admin!")
+                        else:
+                            st.warning("User created but couldn't send notification email")
                         
                         if authenticate_user(new_username, new_password):
                             st.rerun()
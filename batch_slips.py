@@ -0,0 +1,404 @@
+# [file name]: batch_slips.py
+# [file content begin]
+# type:ignore
+"""Generate fee challans or payment receipts for whole classes at once.
+
+Slips are rendered with slip_generator's layout on a pool of worker
+processes and written as one multi-page PDF per class, or as a ZIP of
+slip images.
+
+Usage:
+    python batch_slips.py challans --months APRIL MAY --annual --classes "Class 5"
+    python batch_slips.py receipts --months APRIL --format zip --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+import zipfile
+import zlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from school_classes import CLASS_ORDER, class_sort_key, safe_name
+
+MONTHS = [
+    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
+]
+
+OUTPUT_FORMATS = ("pdf", "zip")
+
+# Slips per task sent to a worker process
+CHUNK_SIZE = 50
+
+# Slip pixels per inch on the PDF page (600x900 px -> 6x9 in)
+PDF_DPI = 100
+
+BLANK_FIELD = "________________"
+
+def _fee_amounts(student_id, student_fees, default_fees):
+    """(monthly, annual, admission) fees for a student, falling back to the defaults"""
+    fees = student_fees.get(student_id, default_fees)
+    return (
+        fees.get("monthly_fee", default_fees.get("monthly_fee", 0)),
+        fees.get("annual_charges", default_fees.get("annual_charges", 0)),
+        fees.get("admission_fee", default_fees.get("admission_fee", 0))
+    )
+
+def build_challans(months, academic_year, classes=None, include_annual=False, include_admission=False, issue_date=None):
+    """Slip data for fee challans: what each student still owes for the given months.
+
+    Months already paid in the academic year are left off, and so are annual
+    charges/admission fees already paid. Students with nothing due are skipped.
+    Returns [(class_category, slip_data)].
+    """
+    from database import load_data, load_student_details, load_student_fees, load_default_fees
+
+    student_details = load_student_details()
+    student_fees = load_student_fees()
+    default_fees = load_default_fees()
+    issue_date = issue_date or datetime.now().strftime("%d-%m-%Y")
+
+    # What each student has paid this academic year, from one pass over the ledger
+    df = load_data()
+    paid_months, annual_paid, admission_paid = set(), set(), set()
+    if not df.empty and "Academic Year" in df.columns:
+        year_df = df[df["Academic Year"] == academic_year]
+        paid_months = set(zip(year_df.loc[year_df["Monthly Fee"] > 0, "ID"], year_df.loc[year_df["Monthly Fee"] > 0, "Month"]))
+        totals = year_df.groupby("ID")[["Annual Charges", "Admission Fee"]].sum()
+        annual_paid = set(totals.index[totals["Annual Charges"] > 0])
+        admission_paid = set(totals.index[totals["Admission Fee"] > 0])
+
+    slips = []
+    for student_id, details in student_details.items():
+        class_category = details.get("class_category", "")
+        if classes and class_category not in classes:
+            continue
+
+        monthly_fee, annual_charges, admission_fee = _fee_amounts(student_id, student_fees, default_fees)
+        due_months = [month for month in months if (student_id, month) not in paid_months]
+        pay_annual = include_annual and student_id not in annual_paid and annual_charges > 0
+        pay_admission = include_admission and student_id not in admission_paid and admission_fee > 0
+        if not (due_months and monthly_fee > 0) and not pay_annual and not pay_admission:
+            continue
+
+        slips.append((class_category, {
+            "student_id": student_id,
+            "student_name": details.get("student_name", ""),
+            "student_phone": details.get("phone", ""),
+            "class_category": class_category,
+            "class_section": details.get("class_section", ""),
+            "payment_date": issue_date,
+            "academic_year": academic_year,
+            "pay_monthly": bool(due_months),
+            "monthly_fee": monthly_fee,
+            "months": due_months,
+            "pay_annual": pay_annual,
+            "annual_charges": annual_charges,
+            "pay_admission": pay_admission,
+            "admission_fee": admission_fee,
+            "payment_method": BLANK_FIELD,
+            "signature": BLANK_FIELD,
+            "slip_title": "FEE CHALLAN",
+            "amount_label": "Amount Due"
+        }))
+
+    return sorted(slips, key=lambda item: (class_sort_key(item[0]), item[1]["student_name"]))
+
+def build_receipts(months, academic_year, classes=None):
+    """Slip data for payment receipts: one per student covering their ledger rows for the months.
+
+    Returns [(class_category, slip_data)].
+    """
+    from database import load_data, load_student_details
+
+    df = load_data()
+    if df.empty:
+        return []
+
+    df = df[df["Month"].isin(months)]
+    if "Academic Year" in df.columns:
+        df = df[df["Academic Year"] == academic_year]
+    if classes:
+        df = df[df["Class Category"].isin(classes)]
+
+    student_details = load_student_details()
+    slips = []
+    for student_id, rows in df.groupby("ID", sort=False):
+        first = rows.iloc[0].fillna("")
+        monthly_rows = rows[rows["Monthly Fee"] > 0]
+        paid_months = [month for month in MONTHS if month in set(monthly_rows["Month"])]
+        annual_charges = rows["Annual Charges"].sum()
+        admission_fee = rows["Admission Fee"].sum()
+        details = student_details.get(student_id, {})
+
+        slips.append((first["Class Category"], {
+            "student_id": student_id,
+            "student_name": first["Student Name"],
+            "student_phone": details.get("phone", first.get("Student Phone", "")),
+            "class_category": first["Class Category"],
+            "class_section": str(first.get("Class Section", "")),
+            "payment_date": str(rows["Date"].iloc[-1]),
+            "academic_year": academic_year,
+            "pay_monthly": bool(paid_months),
+            "monthly_fee": int(monthly_rows["Monthly Fee"].iloc[0]) if paid_months else 0,
+            "months": paid_months,
+            "pay_annual": annual_charges > 0,
+            "annual_charges": int(annual_charges),
+            "pay_admission": admission_fee > 0,
+            "admission_fee": int(admission_fee),
+            "payment_method": ", ".join(dict.fromkeys(rows["Payment Method"].astype(str))),
+            "signature": str(first.get("Signature", "")),
+            "slip_title": "FEE RECEIPT"
+        }))
+
+    return sorted(slips, key=lambda item: (class_sort_key(item[0]), item[1]["student_name"]))
+
+def _render_chunk(chunk, output_format):
+    """Worker task: render slips and encode them for the output format.
+
+    PDF pages come back as zlib-compressed RGB (written into the PDF as is);
+    ZIP entries come back as encoded images.
+    """
+    from slip_generator import render_fee_slip, encode_slip
+
+    rendered = []
+    for class_category, slip_data in chunk:
+        image = render_fee_slip(slip_data)
+        if output_format == "pdf":
+            rendered.append((class_category, slip_data["student_name"], zlib.compress(image.tobytes()), image.size))
+        else:
+            data, image_format = encode_slip(image)
+            rendered.append((class_category, slip_data["student_name"], data, image_format))
+    return rendered
+
+class SlipPdfWriter:
+    """Write a PDF with one slip image per page, straight from compressed pixels"""
+
+    def __init__(self, path, dpi=PDF_DPI):
+        self.file = open(path, "wb")
+        self.dpi = dpi
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3  # 1: catalog, 2: page tree (written last)
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _object(self, object_id, body, stream=None):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f"{object_id} 0 obj\n".encode())
+        self.file.write(body.encode())
+        if stream is not None:
+            self.file.write(b"\nstream\n")
+            self.file.write(stream)
+            self.file.write(b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def add_page(self, compressed_rgb, size):
+        width, height = size
+        page_width = width * 72 / self.dpi
+        page_height = height * 72 / self.dpi
+        image_id, content_id, page_id = self.next_id, self.next_id + 1, self.next_id + 2
+        self.next_id += 3
+
+        self._object(image_id, (
+            f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+            f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode /Length {len(compressed_rgb)} >>"
+        ), compressed_rgb)
+        content = f"q {page_width:.2f} 0 0 {page_height:.2f} 0 0 cm /Slip Do Q".encode()
+        self._object(content_id, f"<< /Length {len(content)} >>", content)
+        self._object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {page_width:.2f} {page_height:.2f}] "
+            f"/Resources << /XObject << /Slip {image_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        ))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        self._object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>")
+
+        xref_offset = self.file.tell()
+        self.file.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode())
+        for object_id in range(1, self.next_id):
+            self.file.write(f"{self.offsets[object_id]:010d} 00000 n \n".encode())
+        self.file.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+        self.file.close()
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def render_batch(slips, output_dir, output_format="pdf", workers=None, prefix="slips", progress=None):
+    """Render slips in parallel and write them out.
+
+    slips: [(class_category, slip_data)], grouped by class. Writes one PDF per
+    class, or one ZIP with a folder per class. progress(done, total) is called
+    as chunks finish. Returns {"files", "slips", "seconds", "workers"}.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    chunks = list(_chunks(slips, CHUNK_SIZE))
+    files = []
+    done = 0
+
+    archive = None
+    if output_format == "zip":
+        zip_path = os.path.join(output_dir, f"{prefix}.zip")
+        # Slip images are already compressed
+        archive = zipfile.ZipFile(zip_path, "w", zipfile.ZIP_STORED)
+        files.append(zip_path)
+
+    pdf, pdf_class = None, None
+    used_names = set()
+
+    def write(rendered):
+        nonlocal pdf, pdf_class
+        for class_category, student_name, data, extra in rendered:
+            if archive is not None:
+                name = f"{safe_name(class_category, 'slip')}/{safe_name(student_name, 'slip')}"
+                candidate, number = name, 1
+                while candidate in used_names:
+                    number += 1
+                    candidate = f"{name}_{number}"
+                used_names.add(candidate)
+                archive.writestr(f"{candidate}.{extra.lower()}", data)
+                continue
+
+            if class_category != pdf_class:
+                if pdf:
+                    pdf.close()
+                path = os.path.join(output_dir, f"{prefix}_{safe_name(class_category, 'slip')}.pdf")
+                pdf, pdf_class = SlipPdfWriter(path), class_category
+                files.append(path)
+            pdf.add_page(data, extra)
+
+    try:
+        if workers <= 1 or len(chunks) <= 1:
+            workers = 1
+            for chunk in chunks:
+                write(_render_chunk(chunk, output_format))
+                done += len(chunk)
+                if progress:
+                    progress(done, len(slips))
+        else:
+            # Spawned workers, since the Streamlit server process runs threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(_render_chunk, chunk, output_format) for chunk in chunks]
+                # Written in submission order so pages stay grouped by class
+                for chunk, future in zip(chunks, futures):
+                    write(future.result())
+                    done += len(chunk)
+                    if progress:
+                        progress(done, len(slips))
+    finally:
+        if pdf:
+            pdf.close()
+        if archive is not None:
+            archive.close()
+
+    return {
+        "files": files,
+        "slips": len(slips),
+        "seconds": round(time.perf_counter() - started, 2),
+        "workers": workers
+    }
+
+def batch_slips_page():
+    """Admin page for generating challans/receipts for whole classes"""
+    import streamlit as st
+    from utils import get_academic_year
+
+    st.header("🖨️ Batch Fee Slips")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        kind = st.radio("Generate", ["Fee challans (amount due)", "Payment receipts"], key="batch_kind")
+        months = st.multiselect("Months", MONTHS, default=[MONTHS[(datetime.now().month - 4) % 12]], key="batch_months")
+        academic_year = st.text_input("Academic Year", value=get_academic_year(datetime.now()), key="batch_year")
+    with col2:
+        classes = st.multiselect("Classes (leave empty for the whole school)", CLASS_ORDER, key="batch_classes")
+        output_format = st.selectbox("Output", ["One PDF per class", "ZIP of slip images"], key="batch_format")
+        include_annual = include_admission = False
+        if kind.startswith("Fee challans"):
+            include_annual = st.checkbox("Include annual charges (if unpaid)", key="batch_annual")
+            include_admission = st.checkbox("Include admission fee (if unpaid)", key="batch_admission")
+
+    if st.button("Generate Slips", type="primary", disabled=not months, use_container_width=True):
+        if kind.startswith("Fee challans"):
+            slips = build_challans(months, academic_year, classes, include_annual, include_admission)
+        else:
+            slips = build_receipts(months, academic_year, classes)
+
+        if not slips:
+            st.warning("No students match the selected classes and months")
+            return
+
+        bar = st.progress(0.0, text=f"Rendering {len(slips)} slips...")
+        output_dir = os.path.join("batch_slips", datetime.now().strftime("%Y%m%d_%H%M%S"))
+        result = render_batch(
+            slips, output_dir,
+            output_format="pdf" if output_format.startswith("One PDF") else "zip",
+            prefix="challans" if kind.startswith("Fee challans") else "receipts",
+            progress=lambda done, total: bar.progress(done / total, text=f"Rendered {done} of {total} slips")
+        )
+        st.session_state.batch_result = result
+
+    result = st.session_state.get("batch_result")
+    if result:
+        st.success(f"✅ {result['slips']} slips in {result['seconds']}s using {result['workers']} worker process{'es' if result['workers'] != 1 else ''}")
+        for path in result["files"]:
+            if not os.path.exists(path):
+                continue
+            with open(path, "rb") as file:
+                st.download_button(
+                    label=f"⬇️ {os.path.basename(path)}",
+                    data=file,
+                    file_name=os.path.basename(path),
+                    mime="application/pdf" if path.endswith(".pdf") else "application/zip",
+                    key=f"batch_download_{path}"
+                )
+
+def main():
+    from utils import get_academic_year
+
+    parser = argparse.ArgumentParser(description="Generate fee challans or receipts for whole classes")
+    parser.add_argument("kind", choices=["challans", "receipts"])
+    parser.add_argument("--months", nargs="+", required=True, choices=MONTHS)
+    parser.add_argument("--year", default=get_academic_year(datetime.now()), help="Academic year, e.g. 2025-2026")
+    parser.add_argument("--classes", nargs="*", help="Classes to include (default: all)")
+    parser.add_argument("--annual", action="store_true", help="Challans: include unpaid annual charges")
+    parser.add_argument("--admission", action="store_true", help="Challans: include unpaid admission fees")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="pdf")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", default=None, help="Output directory")
+    args = parser.parse_args()
+
+    if args.kind == "challans":
+        slips = build_challans(args.months, args.year, args.classes, args.annual, args.admission)
+    else:
+        slips = build_receipts(args.months, args.year, args.classes)
+    if not slips:
+        print("No students match the selected classes and months")
+        return
+
+    output_dir = args.output or os.path.join("batch_slips", datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    def report(done, total):
+        print(f"\rRendered {done}/{total} slips", end="", file=sys.stderr, flush=True)
+
+    result = render_batch(slips, output_dir, args.format, args.workers, args.kind, progress=report)
+    print(file=sys.stderr)
+    rate = result["slips"] / result["seconds"] if result["seconds"] else 0
+    print(f"{result['slips']} slips in {result['seconds']}s ({rate:.0f}/s, {result['workers']} workers)")
+    for path in result["files"]:
+        print(f"  {path}")
+
+if __name__ == "__main__":
+    main()
+# [file content end]
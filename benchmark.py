@@ -0,0 +1,283 @@
+# [file name]: benchmark.py
+# [file content begin]
+# type:ignore
+"""Benchmark the hot data paths against a synthetic (or copied) school dataset.
+
+Usage:
+    python benchmark.py --students 5000 --years 2 --output bench_5k.json
+    python benchmark.py --data-dir /path/to/data --compare bench_5k.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _git_version():
+    """Get the current commit of the app, if it is a git checkout"""
+    try:
+        result = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            cwd=APP_DIR, capture_output=True, text=True, timeout=10
+        )
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+def _prepare_data_dir(args):
+    """Create a working copy of the dataset so benchmarks can write to it"""
+    work_dir = tempfile.mkdtemp(prefix="fees_bench_")
+
+    if args.data_dir:
+        for name in os.listdir(args.data_dir):
+            source = os.path.join(args.data_dir, name)
+            if os.path.isdir(source):
+                if name == "data":
+                    shutil.copytree(source, os.path.join(work_dir, name))
+            elif name.endswith((".csv", ".json")):
+                shutil.copy2(source, work_dir)
+        dataset = {"source": os.path.abspath(args.data_dir)}
+    else:
+        from synthetic_data import generate_dataset
+        dataset = generate_dataset(work_dir, args.students, args.years, args.seed)
+
+    ledger_path = os.path.join(work_dir, "fees_data.csv")
+    dataset["ledger_bytes"] = os.path.getsize(ledger_path) if os.path.exists(ledger_path) else 0
+    return work_dir, dataset
+
+def run_case(name, func, repeat, max_seconds):
+    """Time a benchmark case, stopping early once it has used its time budget"""
+    from instrumentation import page_render
+
+    timings = []
+    io = {}
+    spent = 0.0
+    for _ in range(repeat):
+        with page_render(f"benchmark / {name}") as record:
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        timings.append(elapsed * 1000)
+        io = {key: record[key] for key in ("file_reads", "file_writes", "bytes_read", "bytes_written", "rows")}
+        spent += elapsed
+        if spent > max_seconds:
+            break
+
+    ordered = sorted(timings)
+    return {
+        "runs": len(timings),
+        "min_ms": round(ordered[0], 2),
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))], 2),
+        "mean_ms": round(statistics.mean(ordered), 2),
+        "io": io
+    }
+
+def build_cases(args):
+    """Benchmark cases as (name, function) pairs, run in the current data directory"""
+    import pandas as pd
+    from database import (
+        load_data, save_to_csv, invalidate_ledger_cache, load_student_fees,
+        load_student_details
+    )
+    from reports import build_payment_status
+    from reminder import get_unpaid_students
+    from reminder_snapshot import compute_snapshot, get_snapshot, refresh_snapshot
+    from admin_dashboard import class_fee_analysis
+    from parent_portal import get_student_fee_details
+    import slip_generator
+    from slip_generator import generate_fee_slip, render_fee_slip
+    from reconciliation import normalize_statement, run_reconciliation
+
+    details = load_student_details()
+    sample_ids = sorted(details)[:args.sample]
+    first_id = sample_ids[0] if sample_ids else None
+    first = details.get(first_id, {})
+
+    def load_data_cold():
+        invalidate_ledger_cache()
+        load_data()
+
+    def save_one_record():
+        save_to_csv([{
+            "ID": first_id,
+            "Student Name": first.get("student_name", ""),
+            "Father Name": first.get("father_name", ""),
+            "Student Phone": first.get("phone", ""),
+            "Class Category": first.get("class_category", ""),
+            "Class Section": "A",
+            "Address": first.get("address", ""),
+            "Age": first.get("age", ""),
+            "Month": "BENCHMARK",
+            "Monthly Fee": 0,
+            "Annual Charges": 0,
+            "Admission Fee": 0,
+            "Received Amount": 0,
+            "Payment Method": "Cash",
+            "Date": datetime.now().strftime("%Y-%m-%d"),
+            "Signature": "benchmark",
+            "Entry Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "Academic Year": ""
+        }])
+
+    def paid_unpaid():
+        build_payment_status(load_data(), load_student_fees())
+
+    def reminder_core():
+        get_unpaid_students(load_data(), load_student_details(), args.month)
+
+    def reminder_snapshot_compute():
+        compute_snapshot(args.month)
+
+    def reminder_snapshot_read():
+        refresh_snapshot()
+        get_snapshot()
+
+    def class_wise():
+        df = load_data()
+        class_fee_analysis(df[df['Class Category'] == args.class_category], load_student_details(), args.class_category)
+
+    def student_fee_details():
+        for student_id in sample_ids:
+            get_student_fee_details(student_id)
+
+    # Bank statement with one credit per ledger row, referenced by student ID
+    ledger = load_data()
+    statement_raw = pd.DataFrame({
+        "Date": ledger["Date"].astype(str),
+        "Narration": "FEE " + ledger["ID"].astype(str),
+        "Credit": ledger["Received Amount"].astype(str)
+    })
+
+    def reconcile_statement():
+        run_reconciliation(normalize_statement(statement_raw))
+
+    slip_data = {
+        "student_name": first.get("student_name", "Student"),
+        "student_phone": first.get("phone", ""),
+        "class_category": first.get("class_category", ""),
+        "class_section": "A",
+        "payment_date": datetime.now().strftime("%d-%m-%Y"),
+        "academic_year": "2025-2026",
+        "pay_monthly": True,
+        "monthly_fee": 3000,
+        "months": ["APRIL", "MAY"],
+        "pay_annual": True,
+        "annual_charges": 3500,
+        "pay_admission": False,
+        "admission_fee": 0,
+        "payment_method": "Cash",
+        "signature": "benchmark"
+    }
+
+    def slip():
+        path = generate_fee_slip(slip_data)
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    def slip_render_cold():
+        # Fonts and template rebuilt every time, as before the template cache
+        slip_generator._slip_fonts.cache_clear()
+        slip_generator._template_cache.clear()
+        render_fee_slip(slip_data)
+
+    def slip_render_warm():
+        render_fee_slip(slip_data)
+
+    return [
+        ("load_data (cold)", load_data_cold),
+        ("load_data (warm)", load_data),
+        ("save_to_csv (1 record)", save_one_record),
+        ("paid_unpaid_records", paid_unpaid),
+        ("fee_reminder core", reminder_core),
+        ("reminder snapshot (compute)", reminder_snapshot_compute),
+        ("reminder snapshot (read)", reminder_snapshot_read),
+        ("class_wise_fee_details", class_wise),
+        (f"get_student_fee_details x{len(sample_ids)}", student_fee_details),
+        (f"reconcile statement ({len(statement_raw)} lines)", reconcile_statement),
+        ("generate_fee_slip", slip),
+        ("render_fee_slip (no template cache)", slip_render_cold),
+        ("render_fee_slip (cached template)", slip_render_warm),
+    ]
+
+def compare_reports(current, baseline):
+    """Print median time of each case against a baseline report"""
+    print(f"\n{'Case':<36} {'Baseline (ms)':>14} {'Current (ms)':>14} {'Change':>10}")
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "median_ms" not in before or "median_ms" not in result:
+            print(f"{name:<36} {'-':>14} {result.get('median_ms', '-'):>14} {'':>10}")
+            continue
+        change = (result["median_ms"] / before["median_ms"]) if before["median_ms"] else 0
+        print(f"{name:<36} {before['median_ms']:>14.2f} {result['median_ms']:>14.2f} {change:>9.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark School Fees Management data paths")
+    parser.add_argument("--data-dir", help="Benchmark a copy of an existing data directory instead of synthetic data")
+    parser.add_argument("--students", type=int, default=1000, help="Synthetic dataset size")
+    parser.add_argument("--years", type=int, default=1, help="Synthetic academic years of history")
+    parser.add_argument("--seed", type=int, default=42, help="Synthetic dataset seed")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Stop repeating a case after this long")
+    parser.add_argument("--sample", type=int, default=20, help="Students used by per-student cases")
+    parser.add_argument("--month", default="OCTOBER", help="Month used by the fee reminder case")
+    parser.add_argument("--class-category", default="Nursery", help="Class used by the class-wise case")
+    parser.add_argument("--only", nargs="*", help="Run only cases whose name contains one of these")
+    parser.add_argument("--output", default="benchmark_report.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the working data directory")
+    args = parser.parse_args()
+
+    output_path = os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    if args.data_dir:
+        args.data_dir = os.path.abspath(args.data_dir)
+
+    work_dir, dataset = _prepare_data_dir(args)
+    original_dir = os.getcwd()
+    os.chdir(work_dir)
+
+    report = {
+        "version": _git_version(),
+        "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "dataset": dataset,
+        "settings": {"repeat": args.repeat, "max_seconds": args.max_seconds, "sample": args.sample},
+        "results": {}
+    }
+
+    try:
+        for name, func in build_cases(args):
+            if args.only and not any(part.lower() in name.lower() for part in args.only):
+                continue
+            print(f"Running {name}...", flush=True)
+            try:
+                report["results"][name] = run_case(name, func, args.repeat, args.max_seconds)
+                print(f"  median {report['results'][name]['median_ms']:.2f} ms")
+            except Exception as e:
+                report["results"][name] = {"error": str(e)}
+                print(f"  failed: {str(e)}")
+    finally:
+        os.chdir(original_dir)
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"\nReport written to {output_path}")
+
+    if compare_path:
+        with open(compare_path, 'r') as f:
+            compare_reports(report, json.load(f))
+
+if __name__ == "__main__":
+    main()
+# [file content end]
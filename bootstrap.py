@@ -0,0 +1,130 @@
+# [file name]: bootstrap.py
+# [file content begin]
+# type:ignore
+import streamlit as st
+import csv
+import json
+import os
+import time
+from datetime import datetime
+import pandas as pd
+from database import (
+    initialize_files, load_data, load_school_config, load_default_fees,
+    load_student_details, LEDGER_COLUMNS, LEDGER_LOCK_FILE, replace_ledger
+)
+from file_lock import get_file_lock
+
+HEALTH_FILE = "bootstrap_health.json"
+
+# JSON data files checked on startup
+JSON_FILES = [
+    "users.json", "student_fees.json", "default_fees.json",
+    "school_config.json", "student_details.json"
+]
+
+def bootstrap():
+    """Run the one-time process bootstrap for the current data directory.
+
+    Data files are read relative to the working directory, so the work runs
+    once per server process and working directory; later reruns get the
+    cached health snapshot back without touching the filesystem.
+    """
+    return _bootstrap_data_dir(os.path.abspath(os.getcwd()))
+
+def reset_bootstrap():
+    """Force the bootstrap to run again on the next call"""
+    _bootstrap_data_dir.clear()
+
+@st.cache_resource(show_spinner=False)
+def _bootstrap_data_dir(data_dir):
+    """Verify and migrate data files, warm caches and record a health snapshot.
+
+    data_dir is the working directory, used as the cache key and reported in
+    the snapshot.
+    """
+    started = time.perf_counter()
+    problems = []
+
+    # 1. Verify data files exist
+    initialize_files()
+    from parent_database import ensure_databases_exist
+    ensure_databases_exist(force=True)
+
+    # 2. Migrate data files
+    for message in migrate_ledger_columns():
+        problems.append(message)
+    
+    from payment_store import migrate_legacy_payments
+    for message in migrate_legacy_payments():
+        problems.append(message)
+
+    files = {}
+    for file_name in JSON_FILES:
+        files[file_name] = check_json_file(file_name)
+        if not files[file_name]["ok"]:
+            problems.append(f"{file_name}: {files[file_name]['error']}")
+
+    # 3. Warm caches
+    ledger = load_data()
+    school_config = load_school_config()
+    load_default_fees()
+    student_details = load_student_details()
+
+    # 4. Record health snapshot
+    snapshot = {
+        "data_dir": data_dir,
+        "pid": os.getpid(),
+        "bootstrapped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "school_name": school_config.get("school_name", ""),
+        "ledger_rows": len(ledger),
+        "ledger_bytes": os.path.getsize("fees_data.csv") if os.path.exists("fees_data.csv") else 0,
+        "students": len(student_details),
+        "files": files,
+        "problems": problems,
+        "healthy": not problems
+    }
+
+    try:
+        with open(HEALTH_FILE, 'w') as f:
+            json.dump(snapshot, f, indent=4)
+    except Exception as e:
+        print(f"Error writing health snapshot: {str(e)}")
+
+    return snapshot
+
+def check_json_file(file_name):
+    """Check that a JSON data file exists and parses"""
+    if not os.path.exists(file_name):
+        return {"ok": False, "size": 0, "error": "missing"}
+
+    try:
+        with open(file_name, 'r') as f:
+            json.load(f)
+        return {"ok": True, "size": os.path.getsize(file_name), "error": None}
+    except Exception as e:
+        return {"ok": False, "size": os.path.getsize(file_name), "error": str(e)}
+
+def migrate_ledger_columns():
+    """Add ledger columns missing from older fees_data.csv files"""
+    messages = []
+    if not os.path.exists("fees_data.csv"):
+        return messages
+
+    try:
+        with open("fees_data.csv", 'r', newline='') as f:
+            header = next(csv.reader(f), [])
+
+        missing = [col for col in LEDGER_COLUMNS if col not in header]
+        if missing:
+            with get_file_lock(LEDGER_LOCK_FILE):
+                df = pd.read_csv("fees_data.csv")
+                for col in missing:
+                    df[col] = ""
+                replace_ledger(df)
+            print(f"Migrated fees_data.csv, added columns: {', '.join(missing)}")
+    except Exception as e:
+        messages.append(f"fees_data.csv: {str(e)}")
+
+    return messages
+# [file content end]
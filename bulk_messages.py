@@ -0,0 +1,329 @@
+# [file name]: bulk_messages.py
+# [file content begin]
+# type:ignore
+"""Build personalized WhatsApp fee reminders and yearly reports for many students at once.
+
+Messages are rendered from templates column-wise over a DataFrame (one
+pass, no per-student loop) and exported as a CSV/JSON queue with a
+ready-to-open wa.me link per phone number.
+
+Usage:
+    python bulk_messages.py reminders --month OCTOBER --output reminders.csv
+    python bulk_messages.py reports --year 2025-2026 --output reports.json
+"""
+import argparse
+import json
+import string
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from urllib.parse import quote
+
+MONTHS = [
+    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
+]
+
+REMINDER_TEMPLATE = """Dear {father_name},
+
+This is a friendly reminder that the fee payment of Rs. {amount_due} for {student_name} ({class_category}) for {month} is due.
+
+Please arrange to pay the outstanding fees at your earliest convenience.
+
+For any queries, please contact the school office.
+
+Thank you!
+{school_name}"""
+
+REPORT_TEMPLATE = """📊 *YEARLY FEE REPORT*
+
+*Student Details:*
+Name: {student_name}
+Father Name: {father_name}
+Class: {class_category}
+Section: {class_section}
+
+*Monthly Fee Status:*
+{monthly_status}
+
+*Fee Summary:*
+Total Monthly Fees: Rs. {total_monthly}
+Annual Charges: Rs. {annual_charges}
+Admission Fee: Rs. {admission_fee}
+Total Received: Rs. {total_received}
+
+Generated from School Fees Management System
+{school_name}"""
+
+# Placeholders each template can use
+REMINDER_FIELDS = ("student_name", "father_name", "class_category", "month", "amount_due", "school_name")
+REPORT_FIELDS = (
+    "student_name", "father_name", "class_category", "class_section", "monthly_status",
+    "total_monthly", "annual_charges", "admission_fee", "total_received", "school_name"
+)
+
+QUEUE_COLUMNS = ["student_id", "student_name", "class_category", "phone", "whatsapp_number", "message", "whatsapp_link", "status"]
+
+WHATSAPP_URL = "https://wa.me/"
+COUNTRY_CODE = "92"
+
+def render_template(template, frame):
+    """Fill a str.format-style template for every row of a DataFrame at once.
+
+    Placeholders are column names. Raises KeyError for a placeholder the
+    DataFrame doesn't have.
+    """
+    rendered = pd.Series("", index=frame.index, dtype=object)
+    for literal, field, format_spec, _ in string.Formatter().parse(template):
+        if literal:
+            rendered = rendered + literal
+        if field is None:
+            continue
+        if field not in frame.columns:
+            raise KeyError(field)
+        column = frame[field]
+        if format_spec:
+            column = column.map(lambda value: format(value, format_spec))
+        rendered = rendered + column.astype(str)
+    return rendered
+
+def format_amounts(values):
+    """Whole-rupee amounts with thousands separators ("3,000")"""
+    return pd.Series(values).fillna(0).astype(float).round().astype(np.int64).map("{:,}".format)
+
+def whatsapp_numbers(phones):
+    """Normalize Pakistani phone numbers to wa.me form (923001234567); invalid ones become ""."""
+    digits = pd.Series(phones, dtype=object).fillna("").astype(str).str.replace(r"\D", "", regex=True)
+    digits = digits.str.replace(r"^00", "", regex=True)
+    local = digits.str.match(r"^03\d{9}$")
+    bare = digits.str.match(r"^3\d{9}$")
+    international = digits.str.match(rf"^{COUNTRY_CODE}3\d{{9}}$")
+    return pd.Series(
+        np.select(
+            [local, bare, international],
+            [COUNTRY_CODE + digits.str[1:], COUNTRY_CODE + digits, digits],
+            default=""
+        ),
+        index=digits.index
+    )
+
+def build_queue(frame, messages):
+    """Message queue rows: one per student, with a pre-encoded wa.me link"""
+    numbers = whatsapp_numbers(frame["phone"])
+    encoded = messages.map(lambda message: quote(message, safe=""))
+    queue = pd.DataFrame({
+        "student_id": frame["student_id"],
+        "student_name": frame["student_name"],
+        "class_category": frame["class_category"],
+        "phone": frame["phone"],
+        "whatsapp_number": numbers,
+        "message": messages,
+        "whatsapp_link": np.where(numbers != "", WHATSAPP_URL + numbers + "?text=" + encoded, ""),
+        "status": np.where(numbers != "", "queued", "invalid_phone")
+    }, columns=QUEUE_COLUMNS)
+    return queue.reset_index(drop=True)
+
+def _students_frame(student_details):
+    """Student details as a DataFrame indexed by student ID"""
+    students = pd.DataFrame.from_dict(student_details, orient="index")
+    students = students.reindex(columns=["student_name", "father_name", "class_category", "phone"]).fillna("")
+    students.index.name = "student_id"
+    return students
+
+def _school_name():
+    from database import load_school_config
+    return load_school_config().get("school_name", "Your School Name")
+
+def reminder_queue(month, template=REMINDER_TEMPLATE, classes=None, df=None, student_details=None, student_fees=None, default_fees=None, search=None):
+    """Reminder messages for students who haven't paid the month in full.
+
+    Same rule as the fee reminder page: students with ledger records whose
+    payments for the month don't cover what was charged. search keeps the
+    students whose name matches, like the page's name search.
+    """
+    from database import load_data, load_student_details, load_student_fees, load_default_fees
+
+    df = load_data() if df is None else df
+    student_details = load_student_details() if student_details is None else student_details
+    student_fees = load_student_fees() if student_fees is None else student_fees
+    default_fees = load_default_fees() if default_fees is None else default_fees
+    if df.empty or not student_details:
+        return pd.DataFrame(columns=QUEUE_COLUMNS)
+
+    month_rows = df[df["Month"] == month]
+    sums = month_rows.groupby("ID")[["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]].sum()
+    expected = sums["Monthly Fee"] + sums["Annual Charges"] + sums["Admission Fee"]
+    paid_full = set(sums.index[(sums["Received Amount"] >= expected) & (expected > 0)])
+
+    students = _students_frame(student_details)
+    students = students[students.index.isin(set(df["ID"])) & ~students.index.isin(paid_full)]
+    if classes:
+        students = students[students["class_category"].isin(classes)]
+    if search:
+        students = students[students["student_name"].astype(str).str.contains(search, case=False)]
+    if students.empty:
+        return pd.DataFrame(columns=QUEUE_COLUMNS)
+
+    # Monthly fee still owed: the student's fee less anything received for the month
+    fees = pd.Series({student_id: fees.get("monthly_fee") for student_id, fees in student_fees.items()}, dtype=float)
+    monthly_fee = fees.reindex(students.index).fillna(default_fees.get("monthly_fee", 0))
+    received = sums["Received Amount"].reindex(students.index).fillna(0)
+
+    frame = students.reset_index()
+    frame["month"] = month
+    frame["school_name"] = _school_name()
+    frame["amount_due"] = format_amounts((monthly_fee - received).clip(lower=0).to_numpy())
+    frame = frame.sort_values(["class_category", "student_name"]).reset_index(drop=True)
+    return build_queue(frame, render_template(template, frame))
+
+def monthly_status_lines(monthly_fees):
+    """Lines like "APRIL: ✅ Paid - Rs. 3,000" for each row of a (rows x MONTHS) monthly fee table"""
+    lines = []
+    for month in MONTHS:
+        fee = monthly_fees[month].fillna(0) if month in monthly_fees.columns else pd.Series(0.0, index=monthly_fees.index)
+        status = pd.Series(np.where(fee > 0, "✅ Paid", "❌ Unpaid"), index=monthly_fees.index)
+        lines.append(month + ": " + status + " - Rs. " + format_amounts(fee.to_numpy()).set_axis(monthly_fees.index))
+
+    text = lines[0]
+    for line in lines[1:]:
+        text = text + "\n" + line
+    return text
+
+def report_queue(academic_year=None, template=REPORT_TEMPLATE, classes=None, df=None, student_details=None):
+    """Yearly fee report messages for every student with ledger records"""
+    from database import load_data, load_student_details
+
+    df = load_data() if df is None else df
+    student_details = load_student_details() if student_details is None else student_details
+    if df.empty:
+        return pd.DataFrame(columns=QUEUE_COLUMNS)
+    if academic_year and "Academic Year" in df.columns:
+        df = df[df["Academic Year"] == academic_year]
+    if classes:
+        df = df[df["Class Category"].isin(classes)]
+    if df.empty:
+        return pd.DataFrame(columns=QUEUE_COLUMNS)
+
+    first = df.groupby("ID", sort=False)[["Student Name", "Father Name", "Class Category", "Class Section", "Student Phone"]].first()
+    totals = df.groupby("ID", sort=False)[["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]].sum()
+    monthly_fees = df.pivot_table(index="ID", columns="Month", values="Monthly Fee", aggfunc="sum").reindex(first.index)
+
+    section = first["Class Section"].fillna("").astype(str).replace({"": "N/A", "nan": "N/A"})
+
+    # Contact number from the student record, falling back to the ledger
+    phone = _students_frame(student_details).reindex(first.index)["phone"].fillna("").astype(str)
+    phone = phone.where(phone != "", first["Student Phone"].fillna("").astype(str))
+
+    frame = pd.DataFrame({
+        "student_id": first.index,
+        "student_name": first["Student Name"].to_numpy(),
+        "father_name": first["Father Name"].fillna("N/A").to_numpy(),
+        "class_category": first["Class Category"].to_numpy(),
+        "class_section": section.to_numpy(),
+        "phone": phone.to_numpy(),
+        "monthly_status": monthly_status_lines(monthly_fees).to_numpy(),
+        "total_monthly": format_amounts(totals["Monthly Fee"].to_numpy()).to_numpy(),
+        "annual_charges": format_amounts(totals["Annual Charges"].to_numpy()).to_numpy(),
+        "admission_fee": format_amounts(totals["Admission Fee"].to_numpy()).to_numpy(),
+        "total_received": format_amounts(totals["Received Amount"].to_numpy()).to_numpy(),
+        "school_name": _school_name()
+    })
+    frame = frame.sort_values(["class_category", "student_name"]).reset_index(drop=True)
+    return build_queue(frame, render_template(template, frame))
+
+def queue_to_csv(queue):
+    """CSV bytes for a message queue"""
+    return queue.to_csv(index=False).encode("utf-8")
+
+def queue_to_json(queue):
+    """JSON bytes for a message queue (a list of records)"""
+    return json.dumps(queue.to_dict("records"), ensure_ascii=False, indent=2).encode("utf-8")
+
+def bulk_messages_section(queue_builder, template, fields, key, file_stem, query=None):
+    """Editable template, preview and CSV/JSON queue downloads (used inside a page).
+
+    query describes what queue_builder selects (month, classes, ...); a
+    queue built for a different query or template is dropped, not shown.
+    """
+    import streamlit as st
+
+    template = st.text_area(
+        "Message Template",
+        value=template,
+        height=220,
+        key=f"{key}_template",
+        help="Placeholders: " + ", ".join("{" + field + "}" for field in fields)
+    )
+
+    built_for = {"query": query, "template": template}
+    if st.button("Build Message Queue", key=f"{key}_build", use_container_width=True):
+        try:
+            st.session_state[f"{key}_queue"] = {"built_for": built_for, "queue": queue_builder(template)}
+        except (KeyError, ValueError) as e:
+            st.error(f"Template error: unknown or malformed placeholder {str(e)}")
+            return
+
+    built = st.session_state.get(f"{key}_queue")
+    if built is None:
+        return
+    if built["built_for"] != built_for:
+        # Filters or template changed since the queue was built
+        del st.session_state[f"{key}_queue"]
+        return
+    queue = built["queue"]
+    if queue.empty:
+        st.info("No students to message")
+        return
+
+    ready = int((queue["status"] == "queued").sum())
+    st.success(f"✅ {ready} messages ready ({len(queue) - ready} without a valid WhatsApp number)")
+    st.dataframe(
+        queue[["student_name", "class_category", "whatsapp_number", "whatsapp_link", "status"]].head(200),
+        column_config={"whatsapp_link": st.column_config.LinkColumn("Open in WhatsApp", display_text="Send")},
+        use_container_width=True,
+        hide_index=True
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            "📥 Download Queue (CSV)", data=queue_to_csv(queue), file_name=f"{file_stem}.csv",
+            mime="text/csv", use_container_width=True, key=f"{key}_csv"
+        )
+    with col2:
+        st.download_button(
+            "📥 Download Queue (JSON)", data=queue_to_json(queue), file_name=f"{file_stem}.json",
+            mime="application/json", use_container_width=True, key=f"{key}_json"
+        )
+
+def main():
+    from utils import get_academic_year
+
+    parser = argparse.ArgumentParser(description="Export WhatsApp fee reminders or yearly reports as a message queue")
+    parser.add_argument("kind", choices=["reminders", "reports"])
+    parser.add_argument("--month", default=datetime.now().strftime("%B").upper(), choices=MONTHS, help="Reminders: fee month")
+    parser.add_argument("--year", default=get_academic_year(datetime.now()), help="Reports: academic year")
+    parser.add_argument("--classes", nargs="*", help="Classes to include (default: all)")
+    parser.add_argument("--template", help="Text file with a custom message template")
+    parser.add_argument("--output", required=True, help="Queue file (.csv or .json)")
+    args = parser.parse_args()
+
+    template = None
+    if args.template:
+        with open(args.template, encoding="utf-8") as f:
+            template = f.read()
+
+    if args.kind == "reminders":
+        queue = reminder_queue(args.month, template or REMINDER_TEMPLATE, args.classes)
+    else:
+        queue = report_queue(args.year, template or REPORT_TEMPLATE, args.classes)
+
+    data = queue_to_json(queue) if args.output.endswith(".json") else queue_to_csv(queue)
+    with open(args.output, "wb") as f:
+        f.write(data)
+    ready = int((queue["status"] == "queued").sum()) if not queue.empty else 0
+    print(f"{len(queue)} messages ({ready} with a WhatsApp number) written to {args.output}")
+
+if __name__ == "__main__":
+    main()
+# [file content end]
@@ -2,11 +2,33 @@
 #type:ignore
 import pandas as pd
 import numpy as np
+import csv
 import json
 import os
 from datetime import datetime
 from hashlib import md5
 import streamlit as st
+from instrumentation import record_read, record_write, record_rows
+from file_lock import get_file_lock
+
+# Parsed ledger cached per (mtime, size) of fees_data.csv
+_LEDGER_CACHE = None
+
+# Held (across processes) by every write to fees_data.csv
+LEDGER_LOCK_FILE = "fees_data.csv.lock"
+
+def _read_json(path):
+    """Read a JSON data file and count the read"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+        record_read(f.tell())
+    return data
+
+def _write_json(path, data):
+    """Write a JSON data file and count the write"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+        record_write(f.tell())
 
 def initialize_files():
     """Initialize all required files"""
@@ -50,17 +72,19 @@ def initialize_school_config():
                 "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }, f)
 
+# Columns of the fees ledger (fees_data.csv)
+LEDGER_COLUMNS = [
+    "ID", "Student Name", "Father Name", "Student Phone", "Class Category", "Class Section", 
+    "Address", "Age", "Month", 
+    "Monthly Fee", "Annual Charges", "Admission Fee", 
+    "Received Amount", "Payment Method", "Date", "Signature", 
+    "Entry Timestamp", "Academic Year"
+]
+
 def initialize_csv():
     """Initialize the CSV file with proper columns if it doesn't exist"""
     if not os.path.exists("fees_data.csv"):
-        columns = [
-            "ID", "Student Name", "Father Name", "Student Phone", "Class Category", "Class Section", 
-            "Address", "Age", "Month", 
-            "Monthly Fee", "Annual Charges", "Admission Fee", 
-            "Received Amount", "Payment Method", "Date", "Signature", 
-            "Entry Timestamp", "Academic Year"
-        ]
-        pd.DataFrame(columns=columns).to_csv("fees_data.csv", index=False)
+        pd.DataFrame(columns=LEDGER_COLUMNS).to_csv("fees_data.csv", index=False)
 
 def initialize_student_details():
     """Initialize the student details JSON file if it doesn't exist"""
@@ -73,30 +97,90 @@ def generate_student_id(student_name, class_category):
     unique_str = f"{student_name}_{class_category}".encode('utf-8')
     return md5(unique_str).hexdigest()[:8].upper()
 
+def replace_ledger(df):
+    """Write the whole ledger to a temp file and swap it in, so readers never see half a file"""
+    temp_path = "fees_data.csv.tmp"
+    df.to_csv(temp_path, index=False)
+    os.replace(temp_path, "fees_data.csv")
+
 def save_to_csv(data):
-    """Save data to CSV with proper validation"""
+    """Save data to CSV with proper validation.
+    
+    Rows are appended under the ledger lock; only rows bringing columns the
+    ledger doesn't have yet make it rewrite the file.
+    """
     try:
-        if os.path.exists("fees_data.csv"):
-            df = pd.read_csv("fees_data.csv")
-        else:
-            df = pd.DataFrame(columns=data[0].keys())
-        
         new_df = pd.DataFrame(data)
-        df = pd.concat([df, new_df], ignore_index=True)
+        with get_file_lock(LEDGER_LOCK_FILE):
+            header = None
+            if os.path.exists("fees_data.csv"):
+                with open("fees_data.csv", 'r', newline='') as f:
+                    header = next(csv.reader(f), None)
+            
+            if header and set(new_df.columns) <= set(header):
+                # A last line without a newline would swallow the first new row
+                with open("fees_data.csv", 'rb') as f:
+                    size = f.seek(0, os.SEEK_END)
+                    if size:
+                        f.seek(-1, os.SEEK_END)
+                    needs_newline = size > 0 and f.read(1) != b"\n"
+                with open("fees_data.csv", 'a', newline='') as f:
+                    if needs_newline:
+                        f.write("\n")
+                    new_df.reindex(columns=header).to_csv(f, header=False, index=False)
+            else:
+                if header:
+                    df = pd.read_csv("fees_data.csv")
+                    record_read(os.path.getsize("fees_data.csv"), len(df))
+                    new_df = pd.concat([df, new_df], ignore_index=True)
+                replace_ledger(new_df)
         
-        df.to_csv("fees_data.csv", index=False)
+        record_write(os.path.getsize("fees_data.csv"), len(data))
+        invalidate_ledger_cache()
         return True
     except Exception as e:
         st.error(f"Error saving data: {str(e)}")
         return False
 
+def ledger_version():
+    """Get a version key for fees_data.csv that changes whenever the file does"""
+    try:
+        stat = os.stat("fees_data.csv")
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def invalidate_ledger_cache():
+    """Drop the cached ledger so the next load re-reads fees_data.csv"""
+    global _LEDGER_CACHE
+    _LEDGER_CACHE = None
+
 def load_data():
     """Load data from CSV with robust error handling"""
-    if not os.path.exists("fees_data.csv"):
+    return _load_ledger().copy()
+
+def iter_ledger_chunks(chunk_rows=5000):
+    """Yield the ledger in slices of chunk_rows rows without copying all of it"""
+    ledger = _load_ledger()
+    for start in range(0, len(ledger), chunk_rows):
+        yield ledger.iloc[start:start + chunk_rows]
+
+def _load_ledger():
+    """The cached ledger DataFrame (shared, so callers must not modify it)"""
+    global _LEDGER_CACHE
+    
+    version = ledger_version()
+    if version is None:
         return pd.DataFrame()
     
+    cached = _LEDGER_CACHE
+    if cached is not None and cached[0] == version:
+        record_rows(len(cached[1]))
+        return cached[1]
+    
     try:
         df = pd.read_csv("fees_data.csv")
+        record_read(version[1], len(df))
         
         expected_columns = [
             "ID", "Student Name", "Class Category", "Class Section", "Month", 
@@ -119,7 +203,9 @@ def load_data():
         except:
             pass
         
-        return df.dropna(how='all')
+        df = df.dropna(how='all')
+        _LEDGER_CACHE = (version, df)
+        return df
     
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
@@ -128,7 +214,10 @@ def load_data():
 def update_data(updated_df):
     """Update the CSV file with the modified DataFrame"""
     try:
-        updated_df.to_csv("fees_data.csv", index=False)
+        with get_file_lock(LEDGER_LOCK_FILE):
+            replace_ledger(updated_df)
+        record_write(os.path.getsize("fees_data.csv"), len(updated_df))
+        invalidate_ledger_cache()
         return True
     except Exception as e:
         st.error(f"Error updating data: {str(e)}")
@@ -138,8 +227,7 @@ def load_student_fees():
     """Load student-specific fees from JSON file"""
     try:
         if os.path.exists("student_fees.json"):
-            with open("student_fees.json", 'r') as f:
-                return json.load(f)
+            return _read_json("student_fees.json")
         return {}
     except Exception as e:
         st.error(f"Error loading student fees: {str(e)}")
@@ -148,8 +236,7 @@ def load_student_fees():
 def save_student_fees(fees_data):
     """Save student-specific fees to JSON file"""
     try:
-        with open("student_fees.json", 'w') as f:
-            json.dump(fees_data, f, indent=4)
+        _write_json("student_fees.json", fees_data)
         return True
     except Exception as e:
         st.error(f"Error saving student fees: {str(e)}")
@@ -159,8 +246,7 @@ def load_default_fees():
     """Load default fees from JSON file"""
     try:
         if os.path.exists("default_fees.json"):
-            with open("default_fees.json", 'r') as f:
-                return json.load(f)
+            return _read_json("default_fees.json")
         return {
             "monthly_fee": 3000,
             "annual_charges": 3500,
@@ -178,8 +264,7 @@ def save_default_fees(fees_data):
     """Save default fees to JSON file"""
     try:
         fees_data["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("default_fees.json", 'w') as f:
-            json.dump(fees_data, f, indent=4)
+        _write_json("default_fees.json", fees_data)
         return True
     except Exception as e:
         st.error(f"Error saving default fees: {str(e)}")
@@ -244,8 +329,7 @@ def load_school_config():
     """Load school configuration from JSON file"""
     try:
         if os.path.exists("school_config.json"):
-            with open("school_config.json", 'r') as f:
-                return json.load(f)
+            return _read_json("school_config.json")
         return {
             "school_name": "Your School Name",
             "school_logo": None
@@ -261,8 +345,7 @@ def save_school_config(config_data):
     """Save school configuration to JSON file"""
     try:
         config_data["last_updated"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("school_config.json", 'w') as f:
-            json.dump(config_data, f, indent=4)
+        _write_json("school_config.json", config_data)
         return True
     except Exception as e:
         st.error(f"Error saving school config: {str(e)}")
@@ -271,8 +354,7 @@ def save_school_config(config_data):
 def save_student_details(student_details_data):
     """Save student details to JSON file"""
     try:
-        with open("student_details.json", 'w') as f:
-            json.dump(student_details_data, f, indent=4)
+        _write_json("student_details.json", student_details_data)
         return True
     except Exception as e:
         st.error(f"Error saving student details: {str(e)}")
@@ -282,8 +364,7 @@ def load_student_details():
     """Load student details from JSON file"""
     try:
         if os.path.exists("student_details.json"):
-            with open("student_details.json", 'r') as f:
-                return json.load(f)
+            return _read_json("student_details.json")
         return {}
     except Exception as e:
         st.error(f"Error loading student details: {str(e)}")
@@ -49,7 +49,7 @@ class EasyPaisaPayment:
             
             return {
                 'success': True,
-                'payment_url': 'https://easypay.easypaisa.com.pk/easypay/Index.jsf',
+                'payment_url': self.config.get('payment_url', 'https://easypay.easypaisa.com.pk/easypay/Index.jsf'),
                 'payment_data': payment_data,
                 'transaction_id': transaction_id
             }
@@ -86,6 +86,23 @@ class EasyPaisaPayment:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def check_status(self, order_id):
+        """Ask EasyPaisa for the current status of a transaction"""
+        from gateway_client import get_gateway_client, DEFAULT_SETTINGS
+        try:
+            client = get_gateway_client("EasyPaisa", {key: self.config[key] for key in DEFAULT_SETTINGS if key in self.config})
+            response = client.inquire(
+                self.config.get('status_url', 'https://easypay.easypaisa.com.pk/easypay-service/rest/v4/inquire-transaction'),
+                {
+                    'orderId': order_id,
+                    'storeId': self.config['store_id'],
+                    'accountNum': self.config['account_num']
+                }
+            )
+            return self.verify_payment(response)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
     def show_payment_interface(self, student_id, student_name, amount, description):
         """Show EasyPaisa payment interface"""
         st.subheader("📲 EasyPaisa Payment")
@@ -135,7 +152,11 @@ class EasyPaisaPayment:
                     'status': 'pending_verification'
                 }
                 
-                if payment_system._save_payment_record(payment_record):
+                result = payment_system.record_gateway_payment(payment_record)
+                if result["duplicate"]:
+                    st.info(f"ℹ️ Transaction {result['payment']['transaction_id']} was already submitted "
+                            f"on {result['payment'].get('created_at', 'N/A')} - no duplicate payment was recorded")
+                elif result["success"]:
                     st.success("🎉 Payment submitted for verification!")
                     st.info("Payment will be verified by admin within 24 hours")
                 else:
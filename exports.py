@@ -0,0 +1,205 @@
+# [file name]: exports.py
+# [file content begin]
+# type:ignore
+"""Download files built on demand, written in chunks and cached on disk.
+
+Pages pass a source (a function returning a DataFrame, an iterable of
+DataFrame chunks or CSV text already rendered, wrapped in CsvText)
+instead of encoded bytes. Nothing is built until the
+download button is clicked; the file is then written chunk by chunk as
+CSV, gzipped CSV or XLSX and kept in exports/ keyed by the export name,
+its query (filters) and the version of the data it came from, so the
+same download for unchanged data is served from disk.
+"""
+import csv
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+EXPORT_DIR = "exports"
+
+# Rows written per chunk
+CHUNK_ROWS = 5000
+
+# Most recently built exports kept on disk
+MAX_CACHED_EXPORTS = 100
+
+# Format -> (label, mime type, file extension)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "text/csv", ".csv"),
+    "csv.gz": ("CSV (gzip)", "application/gzip", ".csv.gz"),
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx"),
+}
+
+_prune_lock = threading.Lock()
+
+class CsvText:
+    """A source already rendered as CSV: an iterable of text pieces, header first.
+
+    Written as-is to CSV exports; parsed back into rows for XLSX.
+    """
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    def _lines(self):
+        pending = ""
+        for piece in self.pieces:
+            *lines, pending = (pending + piece).split("\n")
+            for line in lines:
+                yield line + "\n"
+        if pending:
+            yield pending
+
+    def rows(self):
+        """Parsed rows (lists of strings); quoted fields may span lines"""
+        return csv.reader(self._lines())
+
+def data_version(*paths):
+    """Version key for data files: (mtime, size) of each, None for missing ones"""
+    versions = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            versions.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            versions.append(None)
+    return versions
+
+def iter_chunks(source, chunk_rows=CHUNK_ROWS):
+    """DataFrames of at most chunk_rows rows from a DataFrame or an iterable of DataFrames"""
+    import pandas as pd
+
+    frames = [source] if isinstance(source, pd.DataFrame) else source
+    for frame in frames:
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows]
+
+def write_csv(source, path, compress=False):
+    """Write chunks as one CSV file (gzipped if compress), header from the first chunk"""
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', newline='', encoding='utf-8') as f:
+        if isinstance(source, CsvText):
+            for piece in source.pieces:
+                f.write(piece)
+            return
+        header = True
+        for chunk in iter_chunks(source):
+            chunk.to_csv(f, index=False, header=header)
+            header = False
+
+def write_xlsx(sheets, path):
+    """Write {sheet name: source} as one workbook, streaming rows (openpyxl write-only mode)"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, source in sheets.items():
+        # Sheet names are limited to 31 characters
+        sheet = workbook.create_sheet(str(sheet_name)[:31])
+        if isinstance(source, CsvText):
+            for row in source.rows():
+                sheet.append(row)
+            continue
+        header = True
+        for chunk in iter_chunks(source):
+            if header:
+                sheet.append([str(column) for column in chunk.columns])
+                header = False
+            values = chunk.astype(object).where(chunk.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                sheet.append(row)
+    workbook.save(path)
+
+def export_key(name, query, export_format, version):
+    """Cache key for an export of some data, with some filters, in some format"""
+    payload = json.dumps(
+        {"name": name, "query": query, "format": export_format, "version": version},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+def build_export(name, source, export_format="csv", query=None, version=None, directory=EXPORT_DIR):
+    """Path of the export file, building it from source() only if it isn't cached.
+
+    version defaults to the ledger's, so ledger exports rebuild when
+    fees_data.csv changes; pass the version of whatever else the data
+    comes from.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if version is None:
+        version = data_version("fees_data.csv")
+
+    key = export_key(name, query, export_format, version)
+    path = os.path.join(directory, key + EXPORT_FORMATS[export_format][2])
+    if os.path.exists(path):
+        os.utime(path)  # mark as recently used
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        if export_format == "xlsx":
+            write_xlsx({name: source()}, temp_path)
+        else:
+            write_csv(source(), temp_path, compress=export_format == "csv.gz")
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    prune_exports(directory)
+    return path
+
+def prune_exports(directory=EXPORT_DIR, keep=MAX_CACHED_EXPORTS):
+    """Delete all but the most recently used export files"""
+    with _prune_lock:
+        try:
+            entries = [entry for entry in os.scandir(directory) if entry.is_file() and not entry.name.endswith(".tmp")]
+        except OSError:
+            return 0
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        removed = 0
+        for entry in entries[keep:]:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+def export_bytes(name, source, export_format="csv", query=None, version=None):
+    """Contents of an export, built or read from the cache"""
+    with open(build_export(name, source, export_format, query, version), 'rb') as f:
+        return f.read()
+
+def download_export(label, name, source, file_stem, query=None, version=None,
+                    formats=tuple(EXPORT_FORMATS), key=None, **button_kwargs):
+    """Format picker and a download button that builds the file only when clicked.
+
+    source() must not use Streamlit commands; it runs on a separate thread
+    when the button is clicked.
+    """
+    import streamlit as st
+
+    key = key or f"export_{name}"
+    export_format = formats[0]
+    if len(formats) > 1:
+        export_format = st.radio(
+            "Format", formats, format_func=lambda f: EXPORT_FORMATS[f][0],
+            horizontal=True, key=f"{key}_format", label_visibility="collapsed"
+        )
+    _, mime, extension = EXPORT_FORMATS[export_format]
+
+    return st.download_button(
+        label=label,
+        data=lambda: export_bytes(name, source, export_format, query, version),
+        file_name=f"{file_stem}{extension}",
+        mime=mime,
+        key=key,
+        **button_kwargs
+    )
+# [file content end]
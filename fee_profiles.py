@@ -0,0 +1,211 @@
+# [file name]: fee_profiles.py
+# [file content begin]
+# type:ignore
+import streamlit as st
+import os
+import numpy as np
+import pandas as pd
+from database import (
+    load_data, load_student_details, load_student_fees, load_default_fees,
+    ledger_version
+)
+from instrumentation import record_rows
+
+MONTHS = [
+    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
+]
+
+RECENT_ACTIVITY_ROWS = 5
+FAMILY_RECENT_ROWS = 10
+
+def _file_key(path):
+    """Get (mtime, size) for a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def data_version():
+    """Version key covering every file a fee profile is computed from"""
+    return (
+        ledger_version(),
+        _file_key("student_details.json"),
+        _file_key("student_fees.json"),
+        _file_key("default_fees.json")
+    )
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _ledger_index(version):
+    """Parse the ledger once per version and index its rows by student ID.
+
+    Kept as a shared resource (not copied per call), so callers must not
+    modify the returned DataFrame.
+    """
+    df = load_data()
+    if df.empty or 'ID' not in df.columns:
+        return df, {}
+    return df, df.groupby('ID', sort=False).indices
+
+def get_student_records(student_id):
+    """Get a student's ledger rows without scanning the whole ledger"""
+    df, index = _ledger_index(ledger_version())
+    positions = index.get(student_id)
+    if positions is None:
+        return df.iloc[0:0].copy()
+
+    record_rows(len(positions))
+    return df.iloc[positions].copy()
+
+def _monthly_fee(student_id, student_fees, default_fees):
+    """Student's monthly fee, falling back to the default fee"""
+    if student_id in student_fees:
+        return student_fees[student_id].get('monthly_fee', 3000)
+    return default_fees.get('monthly_fee', 3000)
+
+def _recent_activity(student_records):
+    """Most recent payments for a student, newest first"""
+    if student_records.empty:
+        return []
+
+    recent = student_records[['Date', 'Month', 'Received Amount', 'Payment Method']].copy()
+    recent['_sort'] = pd.to_datetime(recent['Date'], format='%d-%m-%Y', errors='coerce')
+    recent = recent.sort_values('_sort', ascending=False).head(RECENT_ACTIVITY_ROWS)
+    return recent.drop(columns='_sort').to_dict('records')
+
+def build_fee_profile(student_id, student_info, student_records, monthly_fee_amount):
+    """Compute paid/unpaid months, totals and balance from a student's ledger rows"""
+    # One pass over the student's rows: the first monthly payment per month
+    monthly_rows = student_records[student_records['Monthly Fee'] > 0].drop_duplicates('Month')
+    paid_by_month = {
+        row['Month']: {
+            'month': row['Month'],
+            'amount': row['Monthly Fee'],
+            'date': row['Date'] if 'Date' in monthly_rows.columns else 'N/A'
+        }
+        for row in monthly_rows[['Month', 'Monthly Fee', 'Date']].to_dict('records')
+    }
+
+    paid_months = [paid_by_month[month] for month in MONTHS if month in paid_by_month]
+    unpaid_months = [month for month in MONTHS if month not in paid_by_month]
+
+    if student_records.empty:
+        total_monthly = total_annual = total_admission = total_received = 0
+        total_annual_due = total_admission_due = 0
+    else:
+        totals = student_records[['Monthly Fee', 'Annual Charges', 'Admission Fee', 'Received Amount']].sum()
+        total_monthly = totals['Monthly Fee']
+        total_annual = totals['Annual Charges']
+        total_admission = totals['Admission Fee']
+        total_received = totals['Received Amount']
+        total_annual_due = student_records['Annual Charges'].max()
+        total_admission_due = student_records['Admission Fee'].max()
+
+    total_monthly_due = monthly_fee_amount * 12
+    total_due = total_monthly_due + total_annual_due + total_admission_due
+    balance_due = max(0, total_due - total_received)
+
+    return {
+        "student_id": student_id,
+        "student_name": student_info.get('student_name', 'N/A'),
+        "father_name": student_info.get('father_name', 'N/A'),
+        "class": student_info.get('class_category', 'N/A'),
+        "phone": student_info.get('phone', 'N/A'),
+        "monthly_fee": monthly_fee_amount,
+        "total_monthly": total_monthly,
+        "total_annual": total_annual,
+        "total_admission": total_admission,
+        "total_received": total_received,
+        "total_due": total_due,
+        "balance_due": balance_due,
+        "percentage_paid": round((total_received / total_due * 100) if total_due > 0 else 0, 1),
+        "paid_months": paid_months,
+        "unpaid_months": unpaid_months,
+        "total_paid_months": len(paid_months),
+        "total_unpaid_months": len(unpaid_months),
+        "recent_activity": _recent_activity(student_records)
+    }
+
+@st.cache_data(show_spinner=False, max_entries=10000)
+def _cached_profile(student_id, version):
+    """Fee profile for one student at one data version"""
+    student_details = load_student_details()
+    if student_id not in student_details:
+        return None
+
+    return build_fee_profile(
+        student_id,
+        student_details[student_id],
+        get_student_records(student_id),
+        _monthly_fee(student_id, load_student_fees(), load_default_fees())
+    )
+
+def get_fee_profile(student_id):
+    """Get a student's fee profile, computed once per student and data version"""
+    try:
+        return _cached_profile(student_id, data_version())
+    except Exception as e:
+        print(f"Error getting fee profile: {str(e)}")
+        return None
+
+@st.cache_data(show_spinner=False, max_entries=2000)
+def _cached_family(student_ids, version):
+    """Fee profiles for several students from one ledger query"""
+    student_details = load_student_details()
+    student_fees = load_student_fees()
+    default_fees = load_default_fees()
+
+    known_ids = [student_id for student_id in student_ids if student_id in student_details]
+
+    # One take from the ledger for all children, then split by student
+    df, index = _ledger_index(version[0])
+    positions = [index[student_id] for student_id in known_ids if student_id in index]
+    family_records = df.iloc[np.concatenate(positions)] if positions else df.iloc[0:0]
+    record_rows(len(family_records))
+
+    records_by_student = dict(tuple(family_records.groupby('ID', sort=False))) if positions else {}
+    no_records = family_records.iloc[0:0]
+
+    children = [
+        build_fee_profile(
+            student_id,
+            student_details[student_id],
+            records_by_student.get(student_id, no_records),
+            _monthly_fee(student_id, student_fees, default_fees)
+        )
+        for student_id in known_ids
+    ]
+
+    recent = pd.DataFrame([
+        dict(activity, **{"Student Name": child["student_name"]})
+        for child in children
+        for activity in child["recent_activity"]
+    ])
+    if not recent.empty:
+        recent['_sort'] = pd.to_datetime(recent['Date'], format='%d-%m-%Y', errors='coerce')
+        recent = recent.sort_values('_sort', ascending=False).drop(columns='_sort')
+    recent_payments = recent.to_dict('records')
+
+    total_due = sum(child["total_due"] for child in children)
+    total_received = sum(child["total_received"] for child in children)
+
+    return {
+        "children": children,
+        "missing_ids": [student_id for student_id in student_ids if student_id not in student_details],
+        "total_due": total_due,
+        "total_received": total_received,
+        "balance_due": sum(child["balance_due"] for child in children),
+        "percentage_paid": round((total_received / total_due * 100) if total_due > 0 else 0, 1),
+        "unpaid_months": sum(child["total_unpaid_months"] for child in children),
+        "recent_payments": recent_payments[:FAMILY_RECENT_ROWS]
+    }
+
+def get_family_profiles(student_ids):
+    """Get fee profiles and combined totals for all of a parent's children"""
+    try:
+        return _cached_family(tuple(student_ids), data_version())
+    except Exception as e:
+        print(f"Error getting family profiles: {str(e)}")
+        return None
+# [file content end]
@@ -5,7 +5,13 @@ from datetime import datetime
 import pandas as pd
 from database import generate_student_id, save_to_csv, load_data, load_student_fees, get_student_fee_amount, load_school_config, get_student_detail
 from utils import format_currency, get_academic_year, check_annual_admission_paid, get_unpaid_months
-from slip_generator import generate_fee_slip, share_slip_via_whatsapp, display_menu_bar
+from slip_generator import (
+    generate_fee_slip_bytes, slip_archiving_enabled,
+    share_slip_via_whatsapp, display_menu_bar
+)
+
+# Generated slips kept in the session for display/download
+SLIP_CACHE_SIZE = 5
 
 
 def fees_entry_page():
@@ -50,6 +56,8 @@ def fees_entry_page():
         st.session_state.previous_month_selection = "Select a month"
     if 'last_generated_slip' not in st.session_state:
         st.session_state.last_generated_slip = None
+    if 'slip_cache' not in st.session_state:
+        st.session_state.slip_cache = {}
     if 'show_share_options' not in st.session_state:
         st.session_state.show_share_options = False
     if 'fee_breakdown' not in st.session_state:
@@ -231,20 +239,18 @@ def show_whatsapp_share_options():
     
     with col_image:
         st.markdown("#### 📄 Fee Slip Image")
-        if st.session_state.last_generated_slip:
-            from PIL import Image
-            slip_image = Image.open(st.session_state.last_generated_slip)
-            st.image(slip_image, use_container_width=True)
+        slip = st.session_state.slip_cache.get(st.session_state.last_generated_slip)
+        if slip:
+            st.image(slip["data"], use_container_width=True)
             
             # Download button for slip image
-            with open(st.session_state.last_generated_slip, "rb") as file:
-                st.download_button(
-                    label="⬇️ Download Slip Image",
-                    data=file,
-                    file_name=f"fee_slip_{student_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png",
-                    mime="image/png",
-                    use_container_width=True
-                )
+            st.download_button(
+                label="⬇️ Download Slip Image",
+                data=slip["data"],
+                file_name=slip["file_name"],
+                mime=slip["mime"],
+                use_container_width=True
+            )
             
             # Share button with instructions
             if st.button("📤 Share", use_container_width=True, key="share_slip_button"):
@@ -309,6 +315,14 @@ def show_whatsapp_share_options():
         st.session_state.show_share_options = False
         st.rerun()
 
+def remember_slip(slip):
+    """Keep a generated slip in the session, dropping the oldest beyond SLIP_CACHE_SIZE"""
+    cache = st.session_state.slip_cache
+    cache.pop(slip["slip_id"], None)
+    cache[slip["slip_id"]] = slip
+    while len(cache) > SLIP_CACHE_SIZE:
+        cache.pop(next(iter(cache)))
+
 def generate_fee_details_message(student_name, class_category, total_amount, fee_breakdown):
     """Generate WhatsApp message with complete fee breakdown - plain text format"""
     from datetime import datetime
@@ -746,9 +760,14 @@ def handle_form_submission(
                 "pay_admission": pay_admission
             }
             
-            # Generate slip image
-            slip_image_path = generate_fee_slip(slip_data)
-            st.session_state.last_generated_slip = slip_image_path
+            # Generate slip image in memory; the archive copy is written in the background
+            if slip_archiving_enabled():
+                from slip_archive import get_slip_archive
+                slip = get_slip_archive().get_or_create(slip_data, records=fee_records, background=True)
+            else:
+                slip = generate_fee_slip_bytes(slip_data)
+            remember_slip(slip)
+            st.session_state.last_generated_slip = slip["slip_id"]
             st.session_state.show_share_options = True
             
             # Store the success message in session state to display after rerun
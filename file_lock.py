@@ -0,0 +1,96 @@
+# [file name]: file_lock.py
+# [file content begin]
+# type:ignore
+"""Exclusive locks shared by threads and processes through a lock file.
+
+The Streamlit app, the gateway callback receiver and the command-line jobs
+are separate processes working on the same data files, so a threading lock
+alone doesn't keep them apart.
+"""
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def _lock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        # LK_LOCK gives up after ten one-second tries, so keep asking
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass
+
+def _unlock(f):
+    if fcntl:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class FileLock:
+    """Lock held through <path> by one thread in one process at a time.
+
+    Re-entrant within a thread: nested acquires only count, and the file
+    lock is released when the outermost one is.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, 'a+')
+                _lock(self._file)
+            except Exception:
+                if self._file:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                _unlock(self._file)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+def get_file_lock(path):
+    """Get the shared lock for a lock file (one per process and path)"""
+    key = os.path.abspath(path)
+    with _locks_lock:
+        if key not in _locks:
+            _locks[key] = FileLock(path)
+        return _locks[key]
+# [file content end]
@@ -0,0 +1,336 @@
+# [file name]: gateway_callbacks.py
+# [file content begin]
+# type:ignore
+"""Receive JazzCash/EasyPaisa server-to-server callbacks and apply them off the UI thread.
+
+Usage:
+    python gateway_callbacks.py --port 8766 --workers 2 --batch-size 100
+"""
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+CALLBACK_PATHS = {
+    "/callbacks/jazzcash": "JazzCash",
+    "/callbacks/easypaisa": "EasyPaisa"
+}
+HEALTH_PATH = "/callbacks/health"
+
+class CallbackProcessor:
+    """Verifies gateway callbacks on worker threads and applies them to the ledger in batches.
+
+    Callbacks go through two queues: a bounded number of verifier threads
+    check signatures and confirm each transaction with a status inquiry to
+    the gateway, and a single applier thread records the payments in the
+    payment store and credits confirmed ones with one ledger write per batch.
+    Batches that fail to write are retried with backoff.
+    """
+
+    def __init__(self, workers=2, batch_size=100, flush_interval=0.5, max_queue=10000, max_retries=5, retry_delay=0.2):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.incoming = queue.Queue(maxsize=max_queue)
+        self.confirmed = queue.Queue()
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def start(self):
+        """Start the verifier and applier threads"""
+        if self._threads:
+            return self
+        for number in range(self.workers):
+            self._threads.append(threading.Thread(target=self._verify_loop, name=f"callback-verify-{number}", daemon=True))
+        self._threads.append(threading.Thread(target=self._apply_loop, name="callback-apply", daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        """Finish queued callbacks, then stop the threads"""
+        self.incoming.join()
+        self.confirmed.join()
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, payment_method, data):
+        """Queue a callback; returns False if the queue is full"""
+        try:
+            self.incoming.put_nowait((payment_method, data))
+        except queue.Full:
+            self._count("rejected_full")
+            return False
+        self._count("received")
+        return True
+
+    def snapshot(self):
+        """Counters plus current queue depths"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["incoming_depth"] = self.incoming.qsize()
+        stats["confirmed_depth"] = self.confirmed.qsize()
+        return stats
+
+    def _verify_loop(self):
+        from jazz_cash import JazzCashPayment
+        from easy_paisa import EasyPaisaPayment
+
+        # Each verifier thread uses its own gateway clients
+        gateways = {"JazzCash": JazzCashPayment(), "EasyPaisa": EasyPaisaPayment()}
+        while not self._stop.is_set():
+            try:
+                payment_method, data = self.incoming.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            try:
+                payment = verify_callback(gateways[payment_method], payment_method, data)
+                if payment is None:
+                    self._count("bad_signature")
+                elif payment.get("declined"):
+                    self._count("declined")
+                else:
+                    self._count("verified" if payment["confirmed"] else "unconfirmed")
+                    self.confirmed.put(payment)
+            except Exception as e:
+                print(f"Error verifying {payment_method} callback: {str(e)}")
+                self._count("errors")
+            finally:
+                self.incoming.task_done()
+
+    def _next_batch(self):
+        """Collect confirmed payments until the batch is full or the flush interval passes"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 and batch:
+                break
+            try:
+                batch.append(self.confirmed.get(timeout=max(remaining, 0.05)))
+            except queue.Empty:
+                if batch or self._stop.is_set():
+                    break
+        return batch
+
+    def _apply_loop(self):
+        while not self._stop.is_set() or not self.confirmed.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        if apply_confirmed_payments(batch, self):
+                            break
+                    except OSError as e:
+                        print(f"Ledger write contention: {str(e)}")
+                    self._count("retries")
+                    time.sleep(self.retry_delay * (2 ** attempt))
+                else:
+                    self._count("failed", len(batch))
+            finally:
+                for _ in batch:
+                    self.confirmed.task_done()
+
+def verify_callback(gateway, payment_method, data):
+    """Check a callback's signature and confirm it with a status inquiry to the gateway.
+
+    The callback only says which transaction to ask about: the amount and
+    reference credited come from the gateway's signed inquiry response. A
+    payment is "confirmed" (credited without an admin) only if the gateway
+    answered and the student comes from a signed field - JazzCash's bill
+    reference; EasyPaisa signs none. Returns None for a bad signature and
+    {"declined": True} if the gateway reports the payment failed.
+    """
+    from real_payment_system import normalize_transaction_id
+
+    verified = gateway.verify_payment(data)
+    if not verified.get('success'):
+        return None
+
+    status = gateway.check_status(verified['transaction_id'])
+    answered = status.get('success') and normalize_transaction_id(status['transaction_id']) == normalize_transaction_id(verified['transaction_id'])
+    if answered and not status.get('status'):
+        return {"declined": True}
+
+    # Without an answer from the gateway, the callback's own figures go to the admin queue
+    source = status if answered else verified
+    signed_student_id = source.get('bill_reference', '')
+    return {
+        # An unsigned student ID is only ever shown to the admin who approves the payment
+        "student_id": signed_student_id or data.get('bankIdentificationNumber') or "",
+        "amount": source['amount'],
+        "payment_method": payment_method,
+        "transaction_id": source['transaction_id'],
+        "confirmed": bool(answered and signed_student_id)
+    }
+
+def apply_confirmed_payments(batch, processor=None):
+    """Record verified callbacks and credit the gateway-confirmed ones to the ledger in one write.
+
+    Confirmed payments are approved; the rest are recorded as
+    pending_verification for an admin. A confirmed payment already recorded
+    by the parent portal is only approved if its student and amount match the
+    gateway's. Already-verified transaction IDs are skipped, so a batch can be
+    retried safely. Returns False if the ledger write failed.
+    """
+    from database import load_student_details
+    from payment_verification import verify_payments
+    from real_payment_system import RealPaymentSystem, normalize_transaction_id
+
+    payment_system = RealPaymentSystem()
+    store = payment_system.store
+    student_details = load_student_details()
+    count = processor._count if processor else (lambda key, amount=1: None)
+
+    with store.write_lock:
+        new_payments = {}
+        confirmed = set()
+        payment_ids = []
+        for payment in batch:
+            transaction_id = normalize_transaction_id(payment["transaction_id"])
+            existing = payment_system.find_existing_payment(transaction_id)
+            if existing:
+                # Recorded by the parent portal or an earlier (possibly failed) attempt
+                matches = (
+                    str(existing.get("student_id", "")) == payment["student_id"]
+                    and float(existing.get("amount") or 0) == float(payment["amount"])
+                )
+                if payment["confirmed"] and matches:
+                    payment_ids.append(existing["payment_id"])
+                else:
+                    count("held_for_review")
+                continue
+            if transaction_id in new_payments:
+                if payment["confirmed"]:
+                    confirmed.add(transaction_id)
+                    new_payments[transaction_id].update(student_id=payment["student_id"], amount=payment["amount"])
+                count("duplicates")
+                continue
+            if payment["confirmed"]:
+                confirmed.add(transaction_id)
+            else:
+                count("held_for_review")
+            new_payments[transaction_id] = {
+                "student_id": payment["student_id"],
+                "student_name": student_details.get(payment["student_id"], {}).get("student_name", ""),
+                "amount": payment["amount"],
+                "payment_method": payment["payment_method"],
+                "transaction_id": transaction_id,
+                "status": "pending_verification",
+                "source": "gateway_callback",
+                "ledger_recorded": False
+            }
+        if new_payments:
+            added = store.add_many(list(new_payments.values()))
+            payment_ids.extend(
+                payment_id for transaction_id, payment_id in zip(new_payments, added) if transaction_id in confirmed
+            )
+
+    result = verify_payments(payment_ids, approve=True, verified_by="gateway callback", note="Confirmed by gateway status inquiry", store=store)
+    if not result["success"]:
+        return False
+
+    count("applied", result["updated"])
+    count("duplicates", result["skipped"])
+    count("batches")
+    return True
+
+def _read_body(handler):
+    """Parse a JSON or form-encoded request body"""
+    length = int(handler.headers.get('Content-Length') or 0)
+    body = handler.rfile.read(length).decode('utf-8') if length else ""
+    if 'json' in (handler.headers.get('Content-Type') or ''):
+        return json.loads(body or "{}")
+    return dict(parse_qsl(body))
+
+class CallbackRequestHandler(BaseHTTPRequestHandler):
+    """Accepts callbacks and answers immediately; processing happens on the queue"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _reply(self, status, payload):
+        encoded = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        if self.path.split('?')[0] == HEALTH_PATH:
+            self._reply(200, self.server.processor.snapshot())
+        else:
+            self._reply(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        payment_method = CALLBACK_PATHS.get(self.path.split('?')[0])
+        if payment_method is None:
+            self._reply(404, {'error': 'Not found'})
+            return
+
+        try:
+            data = _read_body(self)
+        except ValueError:
+            self._reply(400, {'error': 'Malformed request body'})
+            return
+
+        if self.server.processor.submit(payment_method, data):
+            self._reply(202, {'status': 'queued'})
+        else:
+            self._reply(503, {'status': 'busy', 'error': 'Callback queue is full, retry later'})
+
+    def log_message(self, format, *args):
+        pass
+
+def start_callback_server(host="127.0.0.1", port=0, processor=None):
+    """Start the callback receiver on a background thread and return (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), CallbackRequestHandler)
+    server.daemon_threads = True
+    server.processor = processor or CallbackProcessor().start()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive JazzCash/EasyPaisa payment callbacks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=2, help="Signature verification threads")
+    parser.add_argument("--batch-size", type=int, default=100, help="Most payments credited per ledger write")
+    parser.add_argument("--flush-interval", type=float, default=0.5, help="Longest wait (seconds) before writing a partial batch")
+    parser.add_argument("--max-queue", type=int, default=10000, help="Callbacks held before answering 503")
+    args = parser.parse_args()
+
+    processor = CallbackProcessor(args.workers, args.batch_size, args.flush_interval, args.max_queue).start()
+    server, base_url = start_callback_server(args.host, args.port, processor)
+    print(f"Callback receiver listening on {base_url}")
+    for path, payment_method in CALLBACK_PATHS.items():
+        print(f"  {payment_method}: {base_url}{path}")
+
+    try:
+        while True:
+            time.sleep(60)
+            print(processor.snapshot(), flush=True)
+    except KeyboardInterrupt:
+        server.shutdown()
+        processor.stop()
+
+if __name__ == "__main__":
+    main()
+# [file content end]
@@ -0,0 +1,121 @@
+# [file name]: gateway_client.py
+# [file content begin]
+# type:ignore
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Overridable per provider through the keys of the same name in its config file
+DEFAULT_SETTINGS = {
+    "connect_timeout": 3.05,
+    "read_timeout": 10,
+    "max_retries": 3,
+    "backoff_factor": 0.5,
+    "pool_size": 10
+}
+
+# Gateway answers worth retrying (overload / temporary outage)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class GatewayClient:
+    """Keep-alive HTTP session for one payment gateway, with timeouts and retries.
+
+    Retries apply to status inquiries only. Payment requests are sent once,
+    since a retried POST could charge the parent twice.
+    """
+
+    def __init__(self, provider, settings=None):
+        self.provider = provider
+        self.settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.timeout = (self.settings["connect_timeout"], self.settings["read_timeout"])
+
+        retry = Retry(
+            total=self.settings["max_retries"],
+            backoff_factor=self.settings["backoff_factor"],
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET", "POST"]),
+            raise_on_status=False
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.settings["pool_size"], max_retries=retry))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.settings["pool_size"], max_retries=retry))
+
+        # Separate pool without retries, for requests that must not be repeated
+        self._single_session = requests.Session()
+        self._single_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.settings["pool_size"], max_retries=0))
+        self._single_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.settings["pool_size"], max_retries=0))
+
+    def inquire(self, url, data):
+        """POST a status inquiry (safe to retry) and return the JSON response"""
+        response = self.session.post(url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def send_once(self, url, data):
+        """POST a request that must not be retried (e.g. a payment) and return the JSON response"""
+        response = self._single_session.post(url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+        self._single_session.close()
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_gateway_client(provider, settings=None):
+    """Get the shared client for a provider ("JazzCash" or "EasyPaisa") and its settings.
+
+    Clients are keyed on the effective settings, so a changed config file
+    gets a new client instead of the first caller's timeouts and retries.
+    """
+    effective = dict(DEFAULT_SETTINGS, **(settings or {}))
+    key = (provider, tuple(sorted(effective.items())))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = GatewayClient(provider, effective)
+        return _clients[key]
+
+def reset_gateway_clients():
+    """Close the shared clients so the next call picks up new settings"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+def _gateway(payment_method):
+    """Gateway object for a payment method, or None"""
+    if payment_method == "JazzCash":
+        from jazz_cash import JazzCashPayment
+        return JazzCashPayment()
+    if payment_method == "EasyPaisa":
+        from easy_paisa import EasyPaisaPayment
+        return EasyPaisaPayment()
+    return None
+
+def check_statuses(payments, max_workers=8, gateways=None):
+    """Run gateway status inquiries for several payments concurrently.
+
+    payments: records with payment_method and transaction_id (other methods
+    are skipped). gateways optionally maps payment method -> gateway object.
+    Returns {transaction_id: status result}.
+    """
+    gateways = dict(gateways or {})
+    jobs = []
+    for payment in payments:
+        method = payment.get("payment_method")
+        if method not in gateways:
+            gateways[method] = _gateway(method)
+        if gateways[method] and payment.get("transaction_id"):
+            jobs.append((gateways[method], payment["transaction_id"]))
+
+    if not jobs:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda job: job[0].check_status(job[1]), jobs)
+        return {transaction_id: result for (_, transaction_id), result in zip(jobs, results)}
+# [file content end]
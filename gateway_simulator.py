@@ -0,0 +1,367 @@
+# [file name]: gateway_simulator.py
+# [file content begin]
+# type:ignore
+"""Local stand-in for the JazzCash and EasyPaisa gateways, plus a load harness.
+
+Usage:
+    python gateway_simulator.py serve --port 8765
+    python gateway_simulator.py load --cycles 2000 --concurrency 8 --output gateway_load.json
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+JAZZCASH_PAY_PATH = "/jazzcash/DoTransaction"
+JAZZCASH_STATUS_PATH = "/jazzcash/PaymentInquiry"
+EASYPAISA_PAY_PATH = "/easypaisa/Index"
+EASYPAISA_STATUS_PATH = "/easypaisa/inquireTransaction"
+
+SUCCESS_CODE = "000"
+DECLINED_CODE = "124"
+
+class GatewaySimulator:
+    """Gateway behaviour shared by all request handler threads"""
+
+    def __init__(self, latency_ms=0, decline_rate=0.0, seed=None, error_rate=0.0):
+        from jazz_cash import JazzCashPayment
+        from easy_paisa import EasyPaisaPayment
+
+        # Same configuration (and so the same secrets) as the app's clients
+        self.jazzcash = JazzCashPayment()
+        self.easypaisa = EasyPaisaPayment()
+        self.latency_ms = latency_ms
+        self.decline_rate = decline_rate
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.transactions = {}
+
+    def _response_code(self):
+        """Approve or decline a payment at the configured rate"""
+        with self._lock:
+            return DECLINED_CODE if self._random.random() < self.decline_rate else SUCCESS_CODE
+
+    def _fail(self):
+        """Whether to answer this request with a temporary error"""
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _remember(self, provider, transaction_id, response):
+        with self._lock:
+            self.transactions[(provider, transaction_id)] = response
+
+    def jazzcash_pay(self, data):
+        """Check a JazzCash payment request and return the signed response"""
+        expected = self.jazzcash.generate_secure_hash(data.get('pp_Amount'), data.get('pp_BillReference'), data.get('pp_Description'))
+        if data.get('pp_SecureHash') != expected:
+            return 400, {'pp_ResponseCode': '110', 'pp_ResponseMessage': 'Invalid secure hash'}
+
+        code = self._response_code()
+        response = {
+            'pp_TxnRefNo': data.get('pp_TxnRefNo'),
+            'pp_Amount': data.get('pp_Amount'),
+            'pp_BillReference': data.get('pp_BillReference'),
+            'pp_Description': data.get('pp_Description'),
+            'pp_ResponseCode': code,
+            'pp_ResponseMessage': 'Thank you for Using JazzCash' if code == SUCCESS_CODE else 'Transaction declined',
+            'pp_RetreivalReferenceNo': f"{random.randint(10 ** 11, 10 ** 12 - 1)}",
+            'pp_TxnDateTime': datetime.now().strftime('%Y%m%d%H%M%S'),
+            'pp_SecureHash': expected
+        }
+        self._remember("jazzcash", data.get('pp_TxnRefNo'), response)
+        return 200, response
+
+    def easypaisa_pay(self, data):
+        """Check an EasyPaisa payment request and return the signed response"""
+        expected = self.easypaisa._generate_signature(data.get('orderId'), data.get('transactionAmount'))
+        if data.get('signature') != expected:
+            return 400, {'responseCode': '0001', 'responseDesc': 'Invalid signature'}
+
+        code = self._response_code()
+        response = {
+            'orderId': data.get('orderId'),
+            'storeId': data.get('storeId'),
+            'transactionAmount': data.get('transactionAmount'),
+            'bankIdentificationNumber': data.get('bankIdentificationNumber'),
+            'transactionId': f"EP{random.randint(10 ** 9, 10 ** 10 - 1)}",
+            'responseCode': code,
+            'responseDesc': 'SUCCESS' if code == SUCCESS_CODE else 'DECLINED',
+            'transactionDateTime': datetime.now().strftime('%Y%m%d%H%M%S'),
+            'signature': expected
+        }
+        self._remember("easypaisa", data.get('orderId'), response)
+        return 200, response
+
+    def status(self, provider, transaction_id):
+        """Return the stored response for a transaction (status inquiry)"""
+        with self._lock:
+            response = self.transactions.get((provider, transaction_id))
+        if response is None:
+            return 404, {'error': 'Transaction not found'}
+        return 200, response
+
+    def handle(self, path, data):
+        """Route a request to the right gateway behaviour"""
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        if self.error_rate and self._fail():
+            return 503, {'error': 'Service temporarily unavailable'}
+
+        if path == JAZZCASH_PAY_PATH:
+            return self.jazzcash_pay(data)
+        if path == EASYPAISA_PAY_PATH:
+            return self.easypaisa_pay(data)
+        if path == JAZZCASH_STATUS_PATH:
+            return self.status("jazzcash", data.get('pp_TxnRefNo'))
+        if path == EASYPAISA_STATUS_PATH:
+            return self.status("easypaisa", data.get('orderId'))
+        return 404, {'error': f'Unknown path {path}'}
+
+class SimulatorRequestHandler(BaseHTTPRequestHandler):
+    """Accepts JSON or form-encoded POSTs, like the real gateways"""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes on keep-alive connections
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length).decode('utf-8') if length else ""
+        try:
+            if 'json' in (self.headers.get('Content-Type') or ''):
+                data = json.loads(body or "{}")
+            else:
+                data = dict(parse_qsl(body))
+        except ValueError:
+            status, payload = 400, {'error': 'Malformed request body'}
+        else:
+            status, payload = self.server.simulator.handle(self.path.split('?')[0], data)
+
+        encoded = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        # Keep load runs quiet
+        pass
+
+def start_simulator(host="127.0.0.1", port=0, latency_ms=0, decline_rate=0.0, seed=None, error_rate=0.0):
+    """Start the simulator on a background thread and return (server, base_url)"""
+    server = ThreadingHTTPServer((host, port), SimulatorRequestHandler)
+    server.daemon_threads = True
+    server.simulator = GatewaySimulator(latency_ms, decline_rate, seed, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def point_clients_at(base_url, jazzcash, easypaisa):
+    """Send the clients' payment and status requests to the simulator instead of the sandboxes"""
+    jazzcash.config['payment_url'] = base_url + JAZZCASH_PAY_PATH
+    jazzcash.config['status_url'] = base_url + JAZZCASH_STATUS_PATH
+    easypaisa.config['payment_url'] = base_url + EASYPAISA_PAY_PATH
+    easypaisa.config['status_url'] = base_url + EASYPAISA_STATUS_PATH
+
+def _percentiles(timings):
+    """Median/p95/p99/max of a list of milliseconds"""
+    if not timings:
+        return {}
+    ordered = sorted(timings)
+
+    def pick(fraction):
+        return round(ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))], 2)
+
+    return {
+        "count": len(ordered),
+        "median_ms": round(statistics.median(ordered), 2),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1], 2)
+    }
+
+def run_load(base_url, cycles, concurrency, duplicate_rate=0.0, seed=42):
+    """Drive initiate -> gateway -> verify_payment -> handle_parent_payment cycles"""
+    import requests
+    from gateway_client import get_gateway_client, check_statuses
+    from jazz_cash import JazzCashPayment
+    from easy_paisa import EasyPaisaPayment
+    from real_payment_system import RealPaymentSystem
+    from database import load_student_details
+
+    students = sorted(load_student_details().items())
+    if not students:
+        raise ValueError("No students in the data directory")
+
+    jazzcash = JazzCashPayment()
+    easypaisa = EasyPaisaPayment()
+    point_clients_at(base_url, jazzcash, easypaisa)
+    payment_system = RealPaymentSystem()
+
+    rng = random.Random(seed)
+    plan = [
+        (rng.choice(["JazzCash", "EasyPaisa"]), students[rng.randrange(len(students))], rng.randint(1, 10) * 500, rng.random() < duplicate_rate)
+        for _ in range(cycles)
+    ]
+
+    stages = {"initiate": [], "gateway": [], "verify": [], "record": [], "total": []}
+    outcome = {"recorded": 0, "duplicates": 0, "declined": 0, "failed": 0}
+    recorded = []
+    lock = threading.Lock()
+
+    def cycle(step):
+        method, (student_id, info), amount, replay = step
+        gateway = jazzcash if method == "JazzCash" else easypaisa
+
+        timings = {}
+        started = time.perf_counter()
+
+        mark = time.perf_counter()
+        initiated = gateway.initiate_payment(amount, student_id, info.get('student_name', ''), f"School Fees - {info.get('class_category', '')}")
+        timings["initiate"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        try:
+            callback = get_gateway_client(method).send_once(initiated['payment_url'], initiated['payment_data'])
+        except (requests.RequestException, ValueError):
+            callback = {}
+        timings["gateway"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        verified = gateway.verify_payment(callback)
+        timings["verify"] = time.perf_counter() - mark
+
+        result = "failed"
+        if verified.get('success') and not verified.get('status'):
+            result = "declined"
+        elif verified.get('success'):
+            mark = time.perf_counter()
+            for _ in range(2 if replay else 1):
+                ingested = payment_system.ingest_parent_payment(
+                    student_id, info.get('student_name', ''), verified['amount'], method, verified['transaction_id']
+                )
+            timings["record"] = time.perf_counter() - mark
+            if ingested["success"]:
+                result = "duplicates" if ingested["duplicate"] else "recorded"
+        timings["total"] = time.perf_counter() - started
+
+        with lock:
+            outcome[result] += 1
+            if result in ("recorded", "duplicates"):
+                recorded.append({"payment_method": method, "transaction_id": verified['transaction_id']})
+            for stage, seconds in timings.items():
+                stages[stage].append(seconds * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(cycle, plan))
+    elapsed = time.perf_counter() - started
+
+    # Status inquiries for every recorded payment, concurrently over the pooled clients
+    started = time.perf_counter()
+    statuses = check_statuses(recorded, max_workers=concurrency, gateways={"JazzCash": jazzcash, "EasyPaisa": easypaisa})
+    inquiry_seconds = time.perf_counter() - started
+
+    return {
+        "cycles": cycles,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "cycles_per_second": round(cycles / elapsed, 1) if elapsed else 0,
+        "outcome": outcome,
+        "stages": {stage: _percentiles(timings) for stage, timings in stages.items()},
+        "status_inquiries": {
+            "count": len(statuses),
+            "confirmed": sum(1 for status in statuses.values() if status.get('success') and status.get('status')),
+            "errors": sum(1 for status in statuses.values() if not status.get('success')),
+            "seconds": round(inquiry_seconds, 3),
+            "per_second": round(len(statuses) / inquiry_seconds, 1) if inquiry_seconds else 0
+        }
+    }
+
+def _load(args):
+    """Run the load harness against a synthetic data directory"""
+    work_dir = tempfile.mkdtemp(prefix="gateway_load_")
+    original_dir = os.getcwd()
+    output_path = os.path.abspath(args.output)
+
+    try:
+        from synthetic_data import generate_dataset
+        generate_dataset(work_dir, args.students, 1, args.seed)
+        os.chdir(work_dir)
+
+        server, base_url = (None, args.url) if args.url else start_simulator(
+            latency_ms=args.latency_ms, decline_rate=args.decline_rate, seed=args.seed, error_rate=args.error_rate
+        )
+        try:
+            report = run_load(base_url, args.cycles, args.concurrency, args.duplicate_rate, args.seed)
+        finally:
+            if server:
+                server.shutdown()
+    finally:
+        os.chdir(original_dir)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report["created_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    print(f"{report['cycles']} cycles in {report['elapsed_seconds']}s ({report['cycles_per_second']}/s)")
+    print(f"Outcome: {report['outcome']}")
+    for stage, summary in report["stages"].items():
+        if summary:
+            print(f"  {stage:<10} median {summary['median_ms']:>8.2f} ms  p95 {summary['p95_ms']:>8.2f} ms  p99 {summary['p99_ms']:>8.2f} ms")
+    inquiries = report["status_inquiries"]
+    print(f"Status inquiries: {inquiries['count']} in {inquiries['seconds']}s ({inquiries['per_second']}/s), "
+          f"{inquiries['confirmed']} confirmed, {inquiries['errors']} errors")
+
+    with open(output_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Report written to {output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JazzCash/EasyPaisa gateway simulator")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the simulator until interrupted")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response")
+    serve.add_argument("--decline-rate", type=float, default=0.0, help="Share of payments declined")
+    serve.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+
+    load = commands.add_parser("load", help="Drive payment cycles through the app's gateway code")
+    load.add_argument("--cycles", type=int, default=1000)
+    load.add_argument("--concurrency", type=int, default=8)
+    load.add_argument("--students", type=int, default=500, help="Synthetic dataset size")
+    load.add_argument("--seed", type=int, default=42)
+    load.add_argument("--latency-ms", type=float, default=0, help="Delay added to every simulator response")
+    load.add_argument("--decline-rate", type=float, default=0.05, help="Share of payments the simulator declines")
+    load.add_argument("--error-rate", type=float, default=0.0, help="Share of simulator requests answered with 503")
+    load.add_argument("--duplicate-rate", type=float, default=0.05, help="Share of callbacks delivered twice")
+    load.add_argument("--url", help="Use an already running simulator instead of starting one")
+    load.add_argument("--output", default="gateway_load.json", help="Where to write the JSON report")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server, base_url = start_simulator(args.host, args.port, args.latency_ms, args.decline_rate, error_rate=args.error_rate)
+        print(f"Gateway simulator listening on {base_url}")
+        print(f"  JazzCash:  {base_url}{JAZZCASH_PAY_PATH}")
+        print(f"  EasyPaisa: {base_url}{EASYPAISA_PAY_PATH}")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        _load(args)
+
+if __name__ == "__main__":
+    main()
+# [file content end]
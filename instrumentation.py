@@ -0,0 +1,131 @@
+# [file name]: instrumentation.py
+# [file content begin]
+# type:ignore
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_FILE = "metrics.jsonl"
+
+# Rolling window: once the file grows past MAX_METRICS_BYTES it is trimmed
+# back to the most recent MAX_METRICS_ROWS renders
+MAX_METRICS_ROWS = 5000
+MAX_METRICS_BYTES = 2 * 1024 * 1024
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+def _active_records():
+    """Get the stack of renders being measured on this thread"""
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def record_read(bytes_read=0, rows=0):
+    """Count a file read (and rows parsed) against the renders in progress"""
+    for record in _active_records():
+        record["file_reads"] += 1
+        record["bytes_read"] += bytes_read
+        record["rows"] += rows
+
+def record_write(bytes_written=0, rows=0):
+    """Count a file write (and rows written) against the renders in progress"""
+    for record in _active_records():
+        record["file_writes"] += 1
+        record["bytes_written"] += bytes_written
+        record["rows"] += rows
+
+def record_rows(rows):
+    """Count ledger rows touched without a file read (e.g. served from cache)"""
+    for record in _active_records():
+        record["rows"] += rows
+
+@contextmanager
+def page_render(page, user=None):
+    """Measure wall time and file I/O of a page render and log it"""
+    record = {
+        "page": page,
+        "user": user or "",
+        "file_reads": 0,
+        "file_writes": 0,
+        "bytes_read": 0,
+        "bytes_written": 0,
+        "rows": 0
+    }
+    stack = _active_records()
+    stack.append(record)
+    started = time.perf_counter()
+
+    try:
+        yield record
+    finally:
+        record["wall_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        record["ts"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        stack.remove(record)
+        save_metric(record)
+
+def save_metric(record):
+    """Append a render record to the rolling metrics file"""
+    try:
+        line = json.dumps(record) + "\n"
+        with _write_lock:
+            with open(METRICS_FILE, 'a') as f:
+                f.write(line)
+            if os.path.getsize(METRICS_FILE) > MAX_METRICS_BYTES:
+                _trim_metrics()
+        return True
+    except Exception as e:
+        print(f"Error saving metric: {str(e)}")
+        return False
+
+def _trim_metrics():
+    """Keep only the most recent MAX_METRICS_ROWS records"""
+    with open(METRICS_FILE, 'r') as f:
+        lines = f.readlines()[-MAX_METRICS_ROWS:]
+
+    temp_path = f"{METRICS_FILE}.tmp"
+    with open(temp_path, 'w') as f:
+        f.writelines(lines)
+    os.replace(temp_path, METRICS_FILE)
+
+def load_metrics():
+    """Load recorded page renders"""
+    records = []
+    if not os.path.exists(METRICS_FILE):
+        return records
+
+    with open(METRICS_FILE, 'r') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+def summarize_metrics(records):
+    """Summarize renders by page with p50/p95 wall time and mean I/O"""
+    import pandas as pd
+
+    if not records:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(records)
+    grouped = df.groupby("page")
+
+    summary = pd.DataFrame({
+        "Renders": grouped.size(),
+        "p50 (ms)": grouped["wall_ms"].quantile(0.5),
+        "p95 (ms)": grouped["wall_ms"].quantile(0.95),
+        "Max (ms)": grouped["wall_ms"].max(),
+        "Avg Reads": grouped["file_reads"].mean(),
+        "Avg Writes": grouped["file_writes"].mean(),
+        "Avg KB Parsed": grouped["bytes_read"].mean() / 1024,
+        "Avg Rows": grouped["rows"].mean(),
+        "Users": grouped["user"].nunique()
+    }).reset_index().rename(columns={"page": "Page"})
+
+    return summary.sort_values("p95 (ms)", ascending=False).round(1)
+# [file content end]
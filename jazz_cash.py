@@ -33,7 +33,7 @@ class JazzCashPayment:
     
     def generate_secure_hash(self, pp_amount, pp_bill_reference, pp_description):
         """Generate secure hash for JazzCash"""
-        data_string = f"{self.config['integrity_salt']}&{pp_amount}&{self.config['bank_code']}&{pp_bill_reference}&{self.config['currency']}&{pp_description}&{self.config['language']}&{self.config['merchant_id']}&{self.config['password']}&{self.config['return_url']}&{self.config['version']}"
+        data_string = f"{self.config['integrity_salt']}&{pp_amount}&{self.config.get('bank_code', '')}&{pp_bill_reference}&{self.config['currency']}&{pp_description}&{self.config['language']}&{self.config['merchant_id']}&{self.config['password']}&{self.config['return_url']}&{self.config['version']}"
         
         return hashlib.sha256(data_string.encode()).hexdigest().upper()
     
@@ -76,7 +76,7 @@ class JazzCashPayment:
             
             return {
                 'success': True,
-                'payment_url': 'https://sandbox.jazzcash.com.pk/ApplicationAPI/API/Payment/DoTransaction',
+                'payment_url': self.config.get('payment_url', 'https://sandbox.jazzcash.com.pk/ApplicationAPI/API/Payment/DoTransaction'),
                 'payment_data': payment_data,
                 'transaction_id': pp_txn_ref_no
             }
@@ -100,6 +100,8 @@ class JazzCashPayment:
                     'verified': True,
                     'transaction_id': transaction_data['pp_TxnRefNo'],
                     'amount': float(transaction_data['pp_Amount']) / 100,
+                    # Covered by the secure hash, unlike the reference and response code
+                    'bill_reference': transaction_data['pp_BillReference'],
                     'status': transaction_data['pp_ResponseCode'] == '000'
                 }
             else:
@@ -108,6 +110,23 @@ class JazzCashPayment:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def check_status(self, pp_txn_ref_no):
+        """Ask JazzCash for the current status of a transaction"""
+        from gateway_client import get_gateway_client, DEFAULT_SETTINGS
+        try:
+            client = get_gateway_client("JazzCash", {key: self.config[key] for key in DEFAULT_SETTINGS if key in self.config})
+            response = client.inquire(
+                self.config.get('status_url', 'https://sandbox.jazzcash.com.pk/ApplicationAPI/API/PaymentInquiry/Inquire'),
+                {
+                    'pp_TxnRefNo': pp_txn_ref_no,
+                    'pp_MerchantID': self.config['merchant_id'],
+                    'pp_Password': self.config['password']
+                }
+            )
+            return self.verify_payment(response)
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
     def show_payment_interface(self, student_id, student_name, amount, description):
         """Show JazzCash payment interface"""
         st.subheader("📱 JazzCash Payment")
@@ -157,7 +176,11 @@ class JazzCashPayment:
                     'status': 'pending_verification'
                 }
                 
-                if payment_system._save_payment_record(payment_record):
+                result = payment_system.record_gateway_payment(payment_record)
+                if result["duplicate"]:
+                    st.info(f"ℹ️ Transaction {result['payment']['transaction_id']} was already submitted "
+                            f"on {result['payment'].get('created_at', 'N/A')} - no duplicate payment was recorded")
+                elif result["success"]:
                     st.success("🎉 Payment submitted for verification!")
                     st.info("Payment will be verified by admin within 24 hours")
                 else:
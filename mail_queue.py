@@ -0,0 +1,407 @@
+# [file name]: mail_queue.py
+# [file content begin]
+# type:ignore
+"""Outbound mail queue with a background sender.
+
+Mail is appended to a persistent queue (mail_queue.jsonl) and returned to
+the caller immediately. A worker thread sends queued mail in batches over
+one authenticated SMTP connection, and retries failed sends with backoff.
+
+SMTP settings come from mail_config.json, overridden by environment
+variables (SMTP_HOST, SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD,
+SMTP_STARTTLS, MAIL_FROM, MAIL_ADMIN).
+
+Usage:
+    python mail_queue.py debug-server --port 1025
+    python mail_queue.py send-test --to admin@example.com
+    python mail_queue.py status
+"""
+import argparse
+import json
+import os
+import smtplib
+import socketserver
+import threading
+import time
+import uuid
+from datetime import datetime
+from email.message import EmailMessage
+
+MAIL_CONFIG_FILE = "mail_config.json"
+MAIL_QUEUE_LOG = "mail_queue.jsonl"
+
+DEFAULT_MAIL_CONFIG = {
+    "smtp_host": "smtp.gmail.com",
+    "smtp_port": 587,
+    "smtp_starttls": True,
+    "smtp_username": "",
+    "smtp_password": "",
+    "from_address": "",
+    "from_name": "School Management System",
+    "admin_address": "",
+    "timeout": 20,
+    "batch_size": 20,
+    "max_attempts": 6,
+    "retry_delay": 30,
+    "idle_timeout": 60
+}
+
+# Environment variable -> config key
+ENV_OVERRIDES = {
+    "SMTP_HOST": "smtp_host",
+    "SMTP_PORT": "smtp_port",
+    "SMTP_STARTTLS": "smtp_starttls",
+    "SMTP_USERNAME": "smtp_username",
+    "SMTP_PASSWORD": "smtp_password",
+    "MAIL_FROM": "from_address",
+    "MAIL_ADMIN": "admin_address"
+}
+
+def load_mail_config(path=MAIL_CONFIG_FILE):
+    """SMTP settings: defaults, then mail_config.json, then environment variables"""
+    config = dict(DEFAULT_MAIL_CONFIG)
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                config.update(json.load(f))
+    except Exception as e:
+        print(f"Error loading mail config: {str(e)}")
+
+    for variable, key in ENV_OVERRIDES.items():
+        if os.environ.get(variable):
+            config[key] = os.environ[variable]
+
+    config["smtp_port"] = int(config["smtp_port"])
+    if isinstance(config["smtp_starttls"], str):
+        config["smtp_starttls"] = config["smtp_starttls"].lower() in ("1", "true", "yes")
+    config["from_address"] = config["from_address"] or config["smtp_username"]
+    config["admin_address"] = config["admin_address"] or config["from_address"]
+    return config
+
+def mail_configured(config=None):
+    """Whether there is enough configuration to send mail"""
+    config = config or load_mail_config()
+    return bool(config["smtp_host"] and config["from_address"] and config["admin_address"])
+
+class MailQueue:
+    """Append-only log of outbound mail plus the worker that sends it.
+
+    Each line of the log is an event: {"op": "add", "mail": {...}},
+    {"op": "retry", "mail_id", "error", "next_attempt_at"},
+    {"op": "sent", "mail_id"} or {"op": "failed", "mail_id", "error"}.
+    """
+
+    def __init__(self, path=MAIL_QUEUE_LOG, config=None):
+        self.path = path
+        self.config = config or load_mail_config()
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._smtp = None
+        self._last_used = 0
+        self._offset = 0
+        self.mail = {}
+
+    # Log
+
+    def _apply(self, event):
+        op = event.get("op")
+        if op == "add":
+            mail = event["mail"]
+            self.mail[mail["mail_id"]] = dict(mail, status="queued", attempts=0, next_attempt_at=0)
+            return
+        mail = self.mail.get(event.get("mail_id"))
+        if mail is None:
+            return
+        if op == "retry":
+            mail["attempts"] += 1
+            mail["error"] = event.get("error", "")
+            mail["next_attempt_at"] = event.get("next_attempt_at", 0)
+        elif op in ("sent", "failed"):
+            mail["status"] = op
+            mail["error"] = event.get("error", "")
+
+    def refresh(self):
+        """Read events appended since the last refresh"""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                return
+            if size < self._offset:
+                self._offset = 0
+                self.mail = {}
+            if size == self._offset:
+                return
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+            complete = data.rfind(b'\n') + 1
+            for line in data[:complete].splitlines():
+                if line.strip():
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        print(f"Skipping bad mail queue line at offset {self._offset}")
+            self._offset += complete
+
+    def _append(self, events):
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        with self._lock:
+            self.refresh()
+            with open(self.path, 'a') as f:
+                f.write(lines)
+            self.refresh()
+
+    def enqueue(self, to, subject, body):
+        """Queue a message and wake the sender; returns the mail ID"""
+        mail = {
+            "mail_id": f"MAIL_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            "to": to,
+            "subject": subject,
+            "body": body,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self._append([{"op": "add", "mail": mail}])
+        self._wake.set()
+        return mail["mail_id"]
+
+    def due(self, now=None):
+        """Queued mail ready to send, oldest first"""
+        now = now or time.time()
+        self.refresh()
+        return [
+            mail for mail in self.mail.values()
+            if mail["status"] == "queued" and mail["next_attempt_at"] <= now
+        ]
+
+    def counts(self):
+        """Number of messages in each status"""
+        self.refresh()
+        counts = {}
+        for mail in self.mail.values():
+            counts[mail["status"]] = counts.get(mail["status"], 0) + 1
+        return counts
+
+    # Sending
+
+    def _connect(self):
+        """Open (or reuse) the SMTP connection"""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException:
+                pass
+            self._close()
+
+        config = self.config
+        smtp = smtplib.SMTP(config["smtp_host"], config["smtp_port"], timeout=config["timeout"])
+        if config["smtp_starttls"]:
+            smtp.starttls()
+        if config["smtp_username"]:
+            smtp.login(config["smtp_username"], config["smtp_password"])
+        self._smtp = smtp
+        return smtp
+
+    def _close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def _message(self, mail):
+        message = EmailMessage()
+        message["From"] = f"{self.config['from_name']} <{self.config['from_address']}>"
+        message["To"] = mail["to"]
+        message["Subject"] = mail["subject"]
+        message.set_content(mail["body"])
+        return message
+
+    def _retry_event(self, mail, error):
+        attempts = mail["attempts"] + 1
+        if attempts >= self.config["max_attempts"]:
+            return {"op": "failed", "mail_id": mail["mail_id"], "error": error}
+        delay = self.config["retry_delay"] * (2 ** (attempts - 1))
+        return {"op": "retry", "mail_id": mail["mail_id"], "error": error, "next_attempt_at": time.time() + delay}
+
+    def send_batch(self):
+        """Send up to batch_size due messages over one connection; returns how many were sent"""
+        batch = self.due()[:self.config["batch_size"]]
+        if not batch:
+            return 0
+
+        events = []
+        try:
+            smtp = self._connect()
+        except (smtplib.SMTPException, OSError) as e:
+            # Can't reach the relay: every message in the batch waits for a retry
+            self._close()
+            self._append([self._retry_event(mail, f"connect: {str(e)}") for mail in batch])
+            return 0
+
+        sent = 0
+        for mail in batch:
+            try:
+                smtp.send_message(self._message(mail))
+                events.append({"op": "sent", "mail_id": mail["mail_id"]})
+                sent += 1
+            except smtplib.SMTPRecipientsRefused as e:
+                events.append({"op": "failed", "mail_id": mail["mail_id"], "error": str(e)})
+            except (smtplib.SMTPException, OSError) as e:
+                events.append(self._retry_event(mail, str(e)))
+                # Connection-level failure: the rest of the batch waits for a new connection
+                if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                    self._close()
+                    events += [self._retry_event(m, "connection lost") for m in batch[batch.index(mail) + 1:]]
+                    break
+
+        self._last_used = time.time()
+        self._append(events)
+        return sent
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while self.send_batch():
+                    pass
+            except Exception as e:
+                print(f"Mail worker error: {str(e)}")
+
+            if self._smtp is not None and time.time() - self._last_used > self.config["idle_timeout"]:
+                self._close()
+
+            # Sleep until new mail arrives or the next retry is due
+            waiting = [mail["next_attempt_at"] for mail in self.mail.values() if mail["status"] == "queued"]
+            timeout = min([max(0.5, t - time.time()) for t in waiting] + [self.config["idle_timeout"]])
+            self._wake.wait(timeout)
+            self._wake.clear()
+        self._close()
+
+    def start(self):
+        """Start the background sender (once)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="mail-queue", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+def get_mail_queue(path=MAIL_QUEUE_LOG):
+    """Get the shared mail queue for this process, with its sender running"""
+    key = os.path.abspath(path)
+    with _queues_lock:
+        if key not in _queues:
+            _queues[key] = MailQueue(path).start()
+        return _queues[key]
+
+def queue_admin_notification(subject, body):
+    """Queue a message to the admin address; returns False if mail isn't configured"""
+    config = load_mail_config()
+    if not mail_configured(config):
+        print("Mail is not configured (see mail_config.json); notification not queued")
+        return False
+    get_mail_queue().enqueue(config["admin_address"], subject, body)
+    return True
+
+class DebuggingSMTPHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP sink that prints each message it receives (for local testing)"""
+
+    def _reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self._reply("220 localhost debugging SMTP server")
+        in_data, lines = False, []
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.received.append("\n".join(lines))
+                    print("---------- MESSAGE ----------\n" + "\n".join(lines), flush=True)
+                    self._reply("250 OK: queued")
+                    lines = []
+                else:
+                    lines.append(line[1:] if line.startswith("..") else line)
+                continue
+
+            command = line.split(" ", 1)[0].upper()
+            if command in ("EHLO", "HELO"):
+                self._reply("250 localhost")
+            elif command == "DATA":
+                in_data = True
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            elif command == "RCPT" and line.split(":", 1)[-1].strip(" <>").lower() in self.server.refused:
+                self._reply("550 No such user here")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self._reply("250 OK")
+            else:
+                self._reply("502 Command not implemented")
+
+def start_debugging_server(host="127.0.0.1", port=0, refused=()):
+    """Run the SMTP sink on a background thread; returns (server, port).
+
+    Recipients listed in refused are rejected with 550, like an unknown mailbox.
+    """
+    server = socketserver.ThreadingTCPServer((host, port), DebuggingSMTPHandler)
+    server.daemon_threads = True
+    server.received = []
+    server.connections = 0
+    server.refused = {address.lower() for address in refused}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, server.server_address[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Outbound mail queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    debug = subparsers.add_parser("debug-server", help="Run a local SMTP server that prints received mail")
+    debug.add_argument("--host", default="127.0.0.1")
+    debug.add_argument("--port", type=int, default=1025)
+
+    send = subparsers.add_parser("send-test", help="Queue a test message and send the queue")
+    send.add_argument("--to", help="Recipient (default: the admin address)")
+
+    subparsers.add_parser("status", help="Show queue counts")
+    args = parser.parse_args()
+
+    if args.command == "debug-server":
+        server, port = start_debugging_server(args.host, args.port)
+        print(f"Debugging SMTP server on {args.host}:{port} (set SMTP_HOST/SMTP_PORT, SMTP_STARTTLS=false)")
+        try:
+            while True:
+                time.sleep(60)
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.command == "send-test":
+        mail_queue = MailQueue()
+        to = args.to or mail_queue.config["admin_address"]
+        mail_queue.enqueue(to, "Test message - School Fees Management System", "This is a test message from the mail queue.")
+        while mail_queue.send_batch():
+            pass
+        mail_queue._close()
+        print(mail_queue.counts())
+    else:
+        print(MailQueue().counts())
+
+if __name__ == "__main__":
+    main()
+# [file content end]
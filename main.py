@@ -4,16 +4,12 @@
 import streamlit as st
 from auth import check_authentication, logout, login_page
 from home import home_page
-from fees_entry import fees_entry_page
-from reports import reports_page
-from admin import admin_page, set_default_fees
 from utils import hide_streamlit_elements, navbar_collapsible_component
-from database import initialize_files, load_school_config
+from database import load_school_config
+from bootstrap import bootstrap
 from datetime import datetime
-from payment_config import payment_config_page
-from real_payment_system import real_payment_page
-from jazz_cash import jazzcash_payment_page
-from easy_paisa import easypaisa_payment_page
+from routes import render_route
+from instrumentation import page_render
 
 def is_parent_portal():
     """Check if the app is being accessed via parent portal link"""
@@ -34,8 +30,8 @@ def is_parent_portal():
     return st.session_state.get('is_parent_portal', False)
 
 def main():
-    # Initialize files and hide elements
-    initialize_files()
+    # One-time process bootstrap (cached after the first run) and hide elements
+    bootstrap()
     hide_streamlit_elements()
     
     school_config = load_school_config()
@@ -51,8 +47,7 @@ def main():
     
     # If parent portal, show parent interface
     if st.session_state.is_parent_portal:
-        from parent_portal import parent_portal_page
-        parent_portal_page()
+        render_route("Parent Portal")
         return
     
     # Check authentication status for admin portal
@@ -61,9 +56,11 @@ def main():
     # If not authenticated, show home page or login page
     if not is_authenticated:
         if st.session_state.show_login:
-            login_page()
+            with page_render("Login"):
+                login_page()
         else:
-            home_page()
+            with page_render("Home"):
+                home_page()
         return
     
     # If authenticated, show main app with navbar
@@ -76,12 +73,19 @@ def main():
             "Enter Fees", 
             "View All Records", 
             "Paid & Unpaid Students Record", 
-            "Student Yearly Report"
+            "Student Yearly Report",
+            "Payment Verification",
+            "Bank Reconciliation",
+            "Batch Fee Slips"
         ]
         
         today = datetime.now()
         if today.day >= 8:
             menu_options.insert(1, "📢 Fee Reminder")
+            
+            # Keep the reminder page's unpaid list precomputed in the background
+            from reminder_snapshot import start_snapshot_scheduler
+            start_snapshot_scheduler()
     else:
         # Regular users (parents/staff) see different menu
         menu_options = [
@@ -94,21 +98,10 @@ def main():
     selected_menu = navbar_collapsible_component(menu_options)
     
     # Route to appropriate page based on navbar selection
-    if selected_menu == "Dashboard":
-        from admin_dashboard import admin_dashboard
-        admin_dashboard()
-    elif selected_menu == "Enter Fees":
-        fees_entry_page()
-    elif selected_menu in ["View All Records", "Paid & Unpaid Students Record", "Student Yearly Report"]:
-        reports_page(selected_menu)
-    elif selected_menu == "📢 Fee Reminder":
-        from reminder import fee_reminder_page
-        fee_reminder_page()
-    elif selected_menu == "Parent Portal":
-        from parent_portal import parent_portal_page
-        parent_portal_page()
-    elif selected_menu == "View Records":
-        reports_page("View All Records")
+    # (page modules are imported on first use by the route registry)
+    if selected_menu:
+        with page_render(selected_menu, user=st.session_state.get('current_user')):
+            render_route(selected_menu)
 
 if __name__ == "__main__":
     main()
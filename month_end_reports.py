@@ -0,0 +1,240 @@
+# [file name]: month_end_reports.py
+# [file content begin]
+# type:ignore
+"""Run the fee reports from the command line and write CSV/XLSX/JSON files.
+
+Uses the same computations as the report pages (paid & unpaid records,
+student yearly report, class-wise fee details and analytics) directly on
+the data files, without going through Streamlit. With --all-classes each
+class also gets its own report folder, built on a pool of worker processes.
+
+Usage:
+    python month_end_reports.py
+    python month_end_reports.py --reports paid_unpaid class_wise --formats xlsx
+    python month_end_reports.py --year 2025-2026 --all-classes --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from exports import write_xlsx
+from school_classes import class_sort_key, safe_name
+
+REPORTS = ("paid_unpaid", "yearly", "class_wise", "analytics")
+OUTPUT_FORMATS = ("csv", "xlsx", "json")
+
+# Reports that can be run for a single class
+CLASS_REPORTS = ("paid_unpaid", "yearly", "class_wise")
+
+OUTPUT_DIR = "report_packs"
+
+def paid_unpaid_tables(df, fees_data):
+    """Monthly summary, per-student summary and full status of the paid & unpaid report"""
+    from reports import build_payment_status, monthly_payment_summary, student_payment_summary
+
+    merged = build_payment_status(df, fees_data)
+    return {
+        "monthly_summary": monthly_payment_summary(merged),
+        "student_summary": student_payment_summary(merged),
+        "status": merged[[
+            "ID", "Student Name", "Father Name", "Class Category", "Month",
+            "Estimated Monthly Fee", "Received Amount", "Outstanding", "Status"
+        ]]
+    }
+
+def yearly_tables(df):
+    """Month-by-month yearly report and fee totals for every student"""
+    from reports import yearly_report_table
+
+    totals = df.groupby(["ID", "Student Name", "Class Category"])[
+        ["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]
+    ].sum().reset_index()
+    return {"yearly_report": yearly_report_table(df), "totals": totals}
+
+def class_wise_tables(df, student_details, classes):
+    """Per-class statistics and the student-wise analysis of each class"""
+    import pandas as pd
+    from admin_dashboard import class_fee_analysis, class_statistics
+
+    summaries, analyses = [], []
+    for class_category in classes:
+        class_df = df[df["Class Category"] == class_category]
+        if class_df.empty:
+            continue
+        analysis = class_fee_analysis(class_df, student_details, class_category)
+        summary = {"Class": class_category, **class_statistics(class_df)}
+        if not analysis.empty:
+            summary["Total Outstanding"] = analysis["Outstanding"].sum()
+            analyses.append(analysis.assign(Class=class_category))
+        summaries.append(summary)
+
+    return {
+        "class_summary": pd.DataFrame(summaries),
+        "students": pd.concat(analyses, ignore_index=True) if analyses else pd.DataFrame()
+    }
+
+def analytics_tables(df):
+    from admin_dashboard import analytics_tables as build_analytics_tables
+    return build_analytics_tables(df)
+
+def run_report(name, df, student_details, fees_data, classes):
+    """Tables for one report, keyed by table name"""
+    if name == "paid_unpaid":
+        return paid_unpaid_tables(df, fees_data)
+    if name == "yearly":
+        return yearly_tables(df)
+    if name == "class_wise":
+        return class_wise_tables(df, student_details, classes)
+    if name == "analytics":
+        return analytics_tables(df)
+    raise ValueError(f"Unknown report: {name}")
+
+def write_tables(tables, output_dir, name, formats):
+    """Write a report's tables: a CSV per table, one JSON file and one workbook.
+
+    Returns the paths written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    files = []
+
+    if "csv" in formats:
+        for table_name, table in tables.items():
+            path = os.path.join(output_dir, f"{name}_{table_name}.csv")
+            table.to_csv(path, index=False)
+            files.append(path)
+
+    if "json" in formats:
+        path = os.path.join(output_dir, f"{name}.json")
+        payload = {table_name: json.loads(table.to_json(orient="records")) for table_name, table in tables.items()}
+        with open(path, 'w') as f:
+            json.dump(payload, f, indent=2)
+        files.append(path)
+
+    if "xlsx" in formats:
+        path = os.path.join(output_dir, f"{name}.xlsx")
+        try:
+            write_xlsx(tables, path)
+            files.append(path)
+        except ImportError as e:
+            print(f"Skipping {path}: XLSX output needs openpyxl ({str(e)})")
+
+    return files
+
+def _class_pack(class_category, class_df, student_details, fees_data, reports, formats, output_dir):
+    """Worker: run the per-class reports for one class and write them to its folder"""
+    class_dir = os.path.join(output_dir, safe_name(class_category, "class"))
+    files = []
+    for name in reports:
+        tables = run_report(name, class_df, student_details, fees_data, [class_category])
+        files += write_tables(tables, class_dir, name, formats)
+    return class_category, files
+
+def generate_reports(output_dir, reports=REPORTS, formats=OUTPUT_FORMATS, academic_year=None,
+                     classes=None, all_classes=False, workers=None, progress=None):
+    """Run the reports on the current data files and write them to output_dir.
+
+    School-wide reports go in output_dir; with all_classes, each class gets a
+    folder with its own paid & unpaid, yearly and class-wise reports, built
+    in parallel. progress(done, total) is called as classes finish. Returns
+    {"files", "classes", "rows", "seconds", "workers"}.
+    """
+    from database import load_data, load_student_details, load_student_fees
+
+    started = time.perf_counter()
+    df = load_data()
+    student_details = load_student_details()
+    fees_data = load_student_fees()
+
+    if not df.empty and academic_year and "Academic Year" in df.columns:
+        df = df[df["Academic Year"] == academic_year]
+    if not df.empty and classes:
+        df = df[df["Class Category"].isin(classes)]
+
+    result = {"files": [], "classes": 0, "rows": len(df), "seconds": 0, "workers": 1}
+    if df.empty:
+        result["seconds"] = round(time.perf_counter() - started, 2)
+        return result
+
+    present = sorted(df["Class Category"].dropna().unique(), key=class_sort_key)
+    for name in reports:
+        tables = run_report(name, df, student_details, fees_data, present)
+        result["files"] += write_tables(tables, output_dir, name, formats)
+
+    class_reports = [name for name in reports if name in CLASS_REPORTS]
+    if all_classes and class_reports:
+        # Each worker gets only its class's ledger rows and students
+        tasks = []
+        for class_category in present:
+            class_df = df[df["Class Category"] == class_category]
+            class_ids = set(class_df["ID"])
+            class_students = {
+                student_id: details for student_id, details in student_details.items()
+                if details.get("class_category") == class_category or student_id in class_ids
+            }
+            class_fees = {student_id: fees for student_id, fees in fees_data.items() if student_id in class_ids}
+            tasks.append((class_category, class_df, class_students, class_fees, class_reports, formats, output_dir))
+
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        result["workers"] = workers
+        done = 0
+        if workers <= 1:
+            for task in tasks:
+                result["files"] += _class_pack(*task)[1]
+                done += 1
+                if progress:
+                    progress(done, len(tasks))
+        else:
+            # Spawned workers, since the Streamlit server process runs threads
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [executor.submit(_class_pack, *task) for task in tasks]
+                for future in futures:
+                    result["files"] += future.result()[1]
+                    done += 1
+                    if progress:
+                        progress(done, len(tasks))
+        result["classes"] = len(tasks)
+
+    result["seconds"] = round(time.perf_counter() - started, 2)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the fee reports as CSV/XLSX/JSON files")
+    parser.add_argument("--reports", nargs="+", choices=REPORTS, default=list(REPORTS))
+    parser.add_argument("--formats", nargs="+", choices=OUTPUT_FORMATS, default=["csv"])
+    parser.add_argument("--year", default=None, help="Only this academic year, e.g. 2025-2026 (default: all)")
+    parser.add_argument("--classes", nargs="*", help="Classes to include (default: all)")
+    parser.add_argument("--all-classes", action="store_true", help="Also write a report folder for every class, in parallel")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --all-classes (default: CPU count)")
+    parser.add_argument("--data-dir", default=None, help="Folder with the data files (default: current folder)")
+    parser.add_argument("--output", default=None, help="Output directory")
+    args = parser.parse_args()
+
+    output_dir = os.path.abspath(args.output or os.path.join(OUTPUT_DIR, datetime.now().strftime("%Y%m%d_%H%M%S")))
+    if args.data_dir:
+        os.chdir(args.data_dir)
+
+    def report(done, total):
+        print(f"\rFinished {done}/{total} classes", end="", file=sys.stderr, flush=True)
+
+    result = generate_reports(
+        output_dir, args.reports, args.formats, args.year, args.classes,
+        args.all_classes, args.workers, progress=report
+    )
+    if result["classes"]:
+        print(file=sys.stderr)
+    if not result["rows"]:
+        print("No fee records match the selected year and classes")
+        return
+
+    print(f"{len(result['files'])} files from {result['rows']} ledger rows in {result['seconds']}s"
+          + (f" ({result['classes']} classes, {result['workers']} workers)" if result["classes"] else ""))
+    print(f"  {output_dir}")
+
+if __name__ == "__main__":
+    main()
+# [file content end]
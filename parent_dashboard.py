@@ -85,11 +85,10 @@ def show_payment_history(student_id):
         hide_index=True
     )
     
-    # Download button
-    csv_data = export_payment_history_csv(student_id)
+    # Download button (the CSV is only built when clicked)
     st.download_button(
         label="📥 Download Payment History",
-        data=csv_data,
+        data=lambda: export_payment_history_csv(student_id),
         file_name=f"payment_history_{student_id}.csv",
         mime="text/csv"
     )
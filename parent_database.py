@@ -1,22 +1,29 @@
 import json
 import os
 import csv
+import io
+import uuid
 from datetime import datetime
 from pathlib import Path
+from payment_store import get_payment_store
 
 # Shared database paths (same as admin app)
 STUDENT_DETAILS_PATH = "data/student_details.json"
 STUDENT_FEES_PATH = "data/student_fees.json"
 FEES_DATA_PATH = "data/fees_data.csv"
-PAYMENT_HISTORY_PATH = "data/parent_payments.json"
 
-def ensure_databases_exist():
+# Set once the databases have been checked in this process (see bootstrap.py)
+_databases_ready = False
+
+def ensure_databases_exist(force=False):
     """Ensure all required databases exist"""
+    global _databases_ready
+    if _databases_ready and not force:
+        return
+    
     Path("data").mkdir(exist_ok=True)
     
-    if not os.path.exists(PAYMENT_HISTORY_PATH):
-        with open(PAYMENT_HISTORY_PATH, 'w') as f:
-            json.dump({}, f)
+    _databases_ready = True
 
 def get_student_details(student_id):
     """Get student details from admin database"""
@@ -38,6 +45,170 @@ def get_student_fees(student_id):
     
     return fees.get(student_id, None)
 
+# Ledger column -> accepted header names (admin ledger first, then legacy names)
+COLUMN_ALIASES = {
+    "student_id": ["ID", "Student ID"],
+    "received": ["Received Amount", "Amount Received"],
+    "reference": ["Transaction ID", "Reference No"],
+    "date": ["Date"],
+    "payment_method": ["Payment Method"],
+    "month": ["Month"],
+    "remarks": ["Remarks"]
+}
+
+# Per-student byte offsets into each ledger file, rebuilt when the file changes
+_ledger_indexes = {}
+
+def _file_version(path):
+    """Get (mtime, size) for a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+def _map_columns(header):
+    """Resolve each logical column to its position in the CSV header"""
+    mapping = {}
+    for column, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in header:
+                mapping[column] = header.index(alias)
+                break
+    return mapping
+
+def _parse_record(raw):
+    """Parse one CSV record (which may span several lines) from raw bytes"""
+    return next(csv.reader(io.StringIO(raw.decode('utf-8', errors='replace'))), [])
+
+def _iter_records(f):
+    """Yield (offset, raw bytes) for each CSV record in a binary file.
+    
+    A record continues onto the next line while a quoted field is still open,
+    so quoted values containing newlines stay in one record.
+    """
+    offset = f.tell()
+    parts = []
+    quotes = 0
+    for line in iter(f.readline, b''):
+        parts.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            yield offset, b''.join(parts)
+            offset += sum(len(part) for part in parts)
+            parts = []
+            quotes = 0
+    if parts:
+        yield offset, b''.join(parts)
+
+def get_ledger_index(ledger_path=FEES_DATA_PATH):
+    """Get the per-student byte-offset index of a fees ledger (the parent database's by default)"""
+    version = _file_version(ledger_path)
+    if version is None:
+        return None
+    index = _ledger_indexes.get(ledger_path)
+    if index is not None and index["version"] == version:
+        return index
+    
+    offsets = {}
+    with open(ledger_path, 'rb') as f:
+        records = _iter_records(f)
+        header_record = next(records, None)
+        header = _parse_record(header_record[1]) if header_record else []
+        mapping = _map_columns(header)
+        id_position = mapping.get("student_id")
+        
+        if id_position is not None:
+            for offset, raw in records:
+                row = _parse_record(raw)
+                if len(row) > id_position:
+                    offsets.setdefault(row[id_position], []).append((offset, len(raw)))
+    
+    index = {
+        "path": ledger_path,
+        "version": version,
+        "mapping": mapping,
+        "offsets": offsets,
+        "accounts": {}
+    }
+    _ledger_indexes[ledger_path] = index
+    return index
+
+def _to_amount(value):
+    """Convert a ledger amount to float, treating blanks and junk as 0"""
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except ValueError:
+        return 0.0
+
+def _iter_student_rows(index, student_ids):
+    """Yield (student_id, row) for several students in file order, from one open of the ledger"""
+    mapping = index["mapping"]
+    locations = sorted(
+        (offset, length, student_id)
+        for student_id in dict.fromkeys(student_ids)
+        for offset, length in index["offsets"].get(student_id, [])
+    )
+    if not locations:
+        return
+    
+    with open(index["path"], 'rb') as f:
+        for offset, length, student_id in locations:
+            f.seek(offset)
+            values = _parse_record(f.read(length))
+            yield student_id, {
+                column: values[position] if position < len(values) else ""
+                for column, position in mapping.items()
+            }
+
+def read_student_rows(student_id):
+    """Read a student's ledger rows by seeking to their recorded offsets"""
+    index = get_ledger_index()
+    if index is None:
+        return []
+    
+    return [row for _, row in _iter_student_rows(index, [student_id])]
+
+def _build_account(rows):
+    """Received total and payment history (newest first) from a student's ledger rows"""
+    received = 0
+    history = []
+    for row in rows:
+        amount = _to_amount(row.get("received"))
+        received += amount
+        history.append({
+            "date": row.get("date") or 'N/A',
+            "amount": amount,
+            "payment_method": row.get("payment_method") or 'Cash',
+            "reference": row.get("reference") or 'N/A',
+            "remarks": row.get("remarks") or row.get("month", '')
+        })
+    
+    return {
+        "received": received,
+        "history": sorted(history, key=lambda x: x['date'], reverse=True)
+    }
+
+def get_student_accounts(student_ids, ledger_path=FEES_DATA_PATH):
+    """Get accounts for several students, reading the ones not cached yet in a single ledger pass"""
+    index = get_ledger_index(ledger_path)
+    if index is None:
+        return {student_id: {"received": 0, "history": []} for student_id in student_ids}
+    
+    missing = [student_id for student_id in dict.fromkeys(student_ids) if student_id not in index["accounts"]]
+    if missing:
+        rows = {student_id: [] for student_id in missing}
+        for student_id, row in _iter_student_rows(index, missing):
+            rows[student_id].append(row)
+        for student_id in missing:
+            index["accounts"][student_id] = _build_account(rows[student_id])
+    
+    return {student_id: index["accounts"][student_id] for student_id in student_ids}
+
+def get_student_account(student_id):
+    """Get received total and payment history for a student from one ledger read"""
+    return get_student_accounts([student_id])[student_id]
+
 def get_student_fee_summary(student_id):
     """Get comprehensive fee summary for student"""
     ensure_databases_exist()
@@ -51,27 +222,18 @@ def get_student_fee_summary(student_id):
     # Calculate totals
     monthly_fee = fees.get("monthly_fee", 0)
     admission_fee = fees.get("admission_fee", 0)
-    annual_fee = fees.get("annual_fee", 0)
+    annual_fee = fees.get("annual_fee", fees.get("annual_charges", 0))
     
     # Get received amount from fees_data.csv
-    received = 0
-    if os.path.exists(FEES_DATA_PATH):
-        with open(FEES_DATA_PATH, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('Student ID') == student_id:
-                    try:
-                        received += float(row.get('Amount Received', 0))
-                    except:
-                        pass
+    received = get_student_account(student_id)["received"]
     
     total_due = (monthly_fee * 12) + admission_fee + annual_fee
     balance = total_due - received
     
     return {
         "student_id": student_id,
-        "student_name": student.get("name", "N/A"),
-        "class": student.get("class", "N/A"),
+        "student_name": student.get("name", student.get("student_name", "N/A")),
+        "class": student.get("class", student.get("class_category", "N/A")),
         "monthly_fee": monthly_fee,
         "admission_fee": admission_fee,
         "annual_fee": annual_fee,
@@ -85,66 +247,88 @@ def get_payment_history(student_id):
     """Get payment history for student"""
     ensure_databases_exist()
     
-    history = []
-    
-    if os.path.exists(FEES_DATA_PATH):
-        with open(FEES_DATA_PATH, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                if row.get('Student ID') == student_id:
-                    history.append({
-                        "date": row.get('Date', 'N/A'),
-                        "amount": float(row.get('Amount Received', 0)),
-                        "payment_method": row.get('Payment Method', 'Cash'),
-                        "reference": row.get('Reference No', 'N/A'),
-                        "remarks": row.get('Remarks', '')
-                    })
-    
-    return sorted(history, key=lambda x: x['date'], reverse=True)
+    return list(get_student_account(student_id)["history"])
 
 def record_payment_request(student_id, parent_email, amount, payment_type, payment_method):
     """Record a payment request from parent"""
-    ensure_databases_exist()
-    
-    with open(PAYMENT_HISTORY_PATH, 'r') as f:
-        payments = json.load(f)
-    
-    request_id = f"PR_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    student = get_student_details(student_id) or {}
     
-    if student_id not in payments:
-        payments[student_id] = []
-    
-    payments[student_id].append({
-        "request_id": request_id,
+    return get_payment_store().add({
+        "payment_id": f"PR_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:4]}",
+        "student_id": student_id,
+        "student_name": student.get("name", student.get("student_name", "")),
         "parent_email": parent_email,
         "amount": amount,
         "payment_type": payment_type,
         "payment_method": payment_method,
+        "transaction_id": "",
         "status": "pending",
-        "requested_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "notes": ""
+        "notes": "",
+        "source": "parent_dashboard"
     })
-    
-    with open(PAYMENT_HISTORY_PATH, 'w') as f:
-        json.dump(payments, f, indent=2)
-    
-    return request_id
 
 def get_payment_requests(student_id):
     """Get all payment requests for a student"""
-    ensure_databases_exist()
+    return [
+        dict(payment, request_id=payment["payment_id"], requested_at=payment.get("created_at", ""))
+        for payment in get_payment_store().for_student(student_id)
+    ]
+
+HISTORY_EXPORT_COLUMNS = ["Date", "Amount", "Payment Method", "Reference", "Remarks"]
+
+# Characters of CSV buffered before a piece is yielded
+EXPORT_CHUNK_CHARS = 64 * 1024
+
+def iter_payment_history_csv(student_ids, include_student=False, ledger_path=FEES_DATA_PATH, students=None):
+    """Yield the payment history of one or more students as CSV text, piece by piece.
+    
+    Rows come from the indexed ledger (one pass for all the students) and are
+    written with csv.writer, so commas, quotes and newlines in remarks are
+    quoted properly. include_student adds Student ID and Student Name columns,
+    with names from students ({student_id: details}) or the parent database.
+    """
+    if ledger_path == FEES_DATA_PATH:
+        ensure_databases_exist()
+    
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
     
-    with open(PAYMENT_HISTORY_PATH, 'r') as f:
-        payments = json.load(f)
+    def take():
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
     
-    return payments.get(student_id, [])
+    writer.writerow((["Student ID", "Student Name"] if include_student else []) + HISTORY_EXPORT_COLUMNS)
+    yield take()
+    
+    if students is None:
+        students = {}
+        if include_student and os.path.exists(STUDENT_DETAILS_PATH):
+            with open(STUDENT_DETAILS_PATH, 'r') as f:
+                students = json.load(f)
+    
+    for student_id, account in get_student_accounts(list(dict.fromkeys(student_ids)), ledger_path).items():
+        prefix = []
+        if include_student:
+            student = students.get(student_id) or {}
+            prefix = [student_id, student.get("name", student.get("student_name", ""))]
+        for payment in account["history"]:
+            writer.writerow(prefix + [
+                payment['date'], payment['amount'], payment['payment_method'],
+                payment['reference'], payment['remarks']
+            ])
+            if buffer.tell() >= EXPORT_CHUNK_CHARS:
+                yield take()
+    
+    data = take()
+    if data:
+        yield data
 
 def export_payment_history_csv(student_id):
     """Export payment history as CSV"""
-    history = get_payment_history(student_id)
-    
-    csv_data = "Date,Amount,Payment Method,Reference,Remarks\n"
-    for payment in history:
-        csv_data += f"{payment['date']},{payment['amount']},{payment['payment_method']},{payment['reference']},{payment['remarks']}\n"
-    
-    return csv_data
+    return "".join(iter_payment_history_csv([student_id]))
+
+def export_family_payment_history_csv(student_ids, ledger_path=FEES_DATA_PATH, students=None):
+    """Export the payment history of several students (a family) as one CSV"""
+    return "".join(iter_payment_history_csv(student_ids, include_student=True, ledger_path=ledger_path, students=students))
@@ -13,8 +13,16 @@ from parent_auth import (
     check_parent_authentication,
     logout_parent
 )
-from database import load_school_config, load_data, load_student_details, load_student_fees
+from database import load_school_config, load_student_details, load_student_fees
 from utils import format_currency
+from fee_profiles import get_fee_profile, get_family_profiles, get_student_records
+from payment_store import get_payment_store
+from parent_database import iter_payment_history_csv
+from exports import CsvText, data_version, download_export
+from instrumentation import page_render
+
+# The admin ledger the portal reads balances and history from
+LEDGER_PATH = "fees_data.csv"
 
 # Page configuration for parent portal
 st.set_page_config(
@@ -66,81 +74,8 @@ def get_student_monthly_fee(student_id):
 
 def get_student_fee_details(student_id):
     """Get comprehensive fee details for student including paid/unpaid months"""
-    try:
-        df = load_data()
-        student_details = load_student_details()
-        
-        if student_id not in student_details:
-            return None
-        
-        student_info = student_details[student_id]
-        student_records = df[df['ID'] == student_id]
-        
-        # All months in academic year
-        all_months = [
-            "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-            "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
-        ]
-        
-        # Get monthly fee amount
-        monthly_fee_amount = get_student_monthly_fee(student_id)
-        
-        # Calculate paid and unpaid months
-        paid_months = []
-        unpaid_months = []
-        
-        for month in all_months:
-            month_records = student_records[
-                (student_records['Month'] == month) & 
-                (student_records['Monthly Fee'] > 0)
-            ]
-            if not month_records.empty:
-                paid_months.append({
-                    'month': month,
-                    'amount': month_records['Monthly Fee'].iloc[0],
-                    'date': month_records['Date'].iloc[0] if 'Date' in month_records.columns else 'N/A'
-                })
-            else:
-                unpaid_months.append(month)
-        
-        # Calculate totals
-        total_monthly = student_records['Monthly Fee'].sum() if not student_records.empty else 0
-        total_annual = student_records['Annual Charges'].sum() if not student_records.empty else 0
-        total_admission = student_records['Admission Fee'].sum() if not student_records.empty else 0
-        total_received = student_records['Received Amount'].sum() if not student_records.empty else 0
-        
-        # Calculate outstanding
-        total_paid_months = len(paid_months)
-        total_unpaid_months = len(unpaid_months)
-        total_monthly_due = monthly_fee_amount * 12
-        total_annual_due = student_records['Annual Charges'].max() if not student_records.empty else 0
-        total_admission_due = student_records['Admission Fee'].max() if not student_records.empty else 0
-        
-        total_due = total_monthly_due + total_annual_due + total_admission_due
-        balance_due = max(0, total_due - total_received)
-        
-        return {
-            "student_id": student_id,
-            "student_name": student_info.get('student_name', 'N/A'),
-            "father_name": student_info.get('father_name', 'N/A'),
-            "class": student_info.get('class_category', 'N/A'),
-            "phone": student_info.get('phone', 'N/A'),
-            "monthly_fee": monthly_fee_amount,
-            "total_monthly": total_monthly,
-            "total_annual": total_annual,
-            "total_admission": total_admission,
-            "total_received": total_received,
-            "total_due": total_due,
-            "balance_due": balance_due,
-            "percentage_paid": round((total_received / total_due * 100) if total_due > 0 else 0, 1),
-            "paid_months": paid_months,
-            "unpaid_months": unpaid_months,
-            "total_paid_months": total_paid_months,
-            "total_unpaid_months": total_unpaid_months
-        }
-    except Exception as e:
-        print(f"Error getting fee details: {str(e)}")
-        return None
+    # Computed once per student and ledger version, shared by all portal pages
+    return get_fee_profile(student_id)
 
 def add_back_button():
     """Add back button to return to dashboard"""
@@ -148,6 +83,17 @@ def add_back_button():
         st.session_state.current_parent_page = "📊 Dashboard"
         st.rerun()
 
+def show_duplicate_payment(payment):
+    """Tell the parent a transaction ID was already submitted (nothing new recorded)"""
+    st.info(f"""
+    ℹ️ This transaction was already submitted on {payment.get('created_at', 'N/A')}.
+    
+    **Amount:** {format_currency(payment.get('amount', 0))} via {payment.get('payment_method', 'N/A')}
+    **Status:** {payment.get('status', 'N/A').replace('_', ' ').title()}
+    
+    No duplicate payment was recorded.
+    """)
+
 def show_bank_transfer_payment(student_id, fee_details):
     """Show bank transfer payment interface"""
     try:
@@ -217,7 +163,7 @@ def show_bank_transfer_payment(student_id, fee_details):
                         from real_payment_system import RealPaymentSystem
                         payment_system = RealPaymentSystem()
                         
-                        success = payment_system.handle_parent_payment(
+                        result = payment_system.ingest_parent_payment(
                             student_id=student_id,
                             student_name=fee_details['student_name'],
                             amount=amount,
@@ -225,7 +171,9 @@ def show_bank_transfer_payment(student_id, fee_details):
                             transaction_id=transaction_id
                         )
                         
-                        if success:
+                        if result["duplicate"]:
+                            show_duplicate_payment(result["payment"])
+                        elif result["success"]:
                             st.success("""
                             ✅ Payment submitted successfully!
                             
@@ -313,7 +261,7 @@ def show_jazzcash_payment(student_id, fee_details):
                         from real_payment_system import RealPaymentSystem
                         payment_system = RealPaymentSystem()
                         
-                        success = payment_system.handle_parent_payment(
+                        result = payment_system.ingest_parent_payment(
                             student_id=student_id,
                             student_name=fee_details['student_name'],
                             amount=amount,
@@ -321,7 +269,9 @@ def show_jazzcash_payment(student_id, fee_details):
                             transaction_id=transaction_id
                         )
                         
-                        if success:
+                        if result["duplicate"]:
+                            show_duplicate_payment(result["payment"])
+                        elif result["success"]:
                             st.success("""
                             ✅ JazzCash payment submitted successfully!
                             
@@ -409,7 +359,7 @@ def show_easypaisa_payment(student_id, fee_details):
                         from real_payment_system import RealPaymentSystem
                         payment_system = RealPaymentSystem()
                         
-                        success = payment_system.handle_parent_payment(
+                        result = payment_system.ingest_parent_payment(
                             student_id=student_id,
                             student_name=fee_details['student_name'],
                             amount=amount,
@@ -417,7 +367,9 @@ def show_easypaisa_payment(student_id, fee_details):
                             transaction_id=transaction_id
                         )
                         
-                        if success:
+                        if result["duplicate"]:
+                            show_duplicate_payment(result["payment"])
+                        elif result["success"]:
                             st.success("""
                             ✅ EasyPaisa payment submitted successfully!
                             
@@ -575,7 +527,7 @@ def show_parent_dashboard():
         
         # Initialize session state for current page
         if 'current_parent_page' not in st.session_state:
-            st.session_state.current_parent_page = "📊 Dashboard"
+            st.session_state.current_parent_page = "👨‍👩‍👧‍👦 Family Overview" if len(students) > 1 else "📊 Dashboard"
         
         # Page selection buttons
         pages = {
@@ -584,6 +536,8 @@ def show_parent_dashboard():
             "📋 Payment History": "📋",
             "💳 Make Payment": "💳"
         }
+        if len(students) > 1:
+            pages = {"👨‍👩‍👧‍👦 Family Overview": "👨‍👩‍👧‍👦", **pages}
         
         for page_name, icon in pages.items():
             if st.button(
@@ -614,6 +568,10 @@ def show_parent_dashboard():
         st.info("📝 No students are linked to your account. Please contact school administration to link your students.")
         return
     
+    if st.session_state.current_parent_page == "👨‍👩‍👧‍👦 Family Overview":
+        show_family_overview_page(students)
+        return
+    
     if not selected_student:
         st.info("👆 Please select a student from the sidebar")
         return
@@ -628,6 +586,96 @@ def show_parent_dashboard():
     elif st.session_state.current_parent_page == "💳 Make Payment":
         show_make_payment_page(selected_student)
 
+def open_student_dashboard(student_id):
+    """Select a student and switch to their dashboard"""
+    st.session_state.student_selector = student_id
+    st.session_state.current_parent_page = "📊 Dashboard"
+
+def show_family_overview_page(student_ids):
+    """Show combined and per-child balances for all linked students"""
+    
+    # All children are resolved from one ledger query
+    family = get_family_profiles(student_ids)
+    
+    if not family or not family['children']:
+        st.error("❌ Student information not found")
+        return
+    
+    if family['missing_ids']:
+        st.warning(f"⚠️ Some linked students were not found: {', '.join(family['missing_ids'])}")
+    
+    # Combined summary
+    st.subheader("👨‍👩‍👧‍👦 Family Summary")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Children", len(family['children']))
+    with col2:
+        st.metric("Total Fees", format_currency(family['total_due']))
+    with col3:
+        st.metric("Amount Paid", format_currency(family['total_received']),
+                  delta=f"{family['percentage_paid']}%")
+    with col4:
+        st.metric("Balance Due", format_currency(family['balance_due']), delta_color="inverse")
+    
+    st.progress(min(family['percentage_paid'], 100) / 100)
+    
+    # Per-child cards
+    st.divider()
+    st.subheader("🎒 Children")
+    
+    cols = st.columns(min(len(family['children']), 3))
+    for i, child in enumerate(family['children']):
+        with cols[i % len(cols)]:
+            with st.container(border=True):
+                st.markdown(f"### {child['student_name']}")
+                st.caption(f"{child['class']} • ID: {child['student_id']}")
+                st.metric("Balance Due", format_currency(child['balance_due']))
+                st.markdown(f"**Paid:** {format_currency(child['total_received'])} ({child['percentage_paid']}%)")
+                
+                if child['unpaid_months']:
+                    st.error(f"**Unpaid ({child['total_unpaid_months']}):** {', '.join(child['unpaid_months'])}")
+                else:
+                    st.success("All months paid! 🎉")
+                
+                st.button(
+                    "📊 View Details",
+                    key=f"family_open_{child['student_id']}",
+                    use_container_width=True,
+                    on_click=open_student_dashboard,
+                    args=(child['student_id'],)
+                )
+    
+    # Recent payments across all children
+    st.divider()
+    st.subheader("📈 Recent Payments")
+    
+    if family['recent_payments']:
+        recent_df = pd.DataFrame(family['recent_payments'])[
+            ['Date', 'Student Name', 'Month', 'Received Amount', 'Payment Method']
+        ]
+        st.dataframe(
+            recent_df.style.format({
+                'Received Amount': format_currency
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.info("No recent transactions found")
+    
+    # One file with every child's payments, built only when clicked
+    download_export(
+        "📥 Download Family Payment History",
+        "family_payment_history",
+        lambda: CsvText(iter_payment_history_csv(student_ids, True, LEDGER_PATH, load_student_details())),
+        f"payment_history_family_{datetime.now().strftime('%Y%m%d')}",
+        query={"student_ids": sorted(student_ids)},
+        version=data_version(LEDGER_PATH, "student_details.json"),
+        key="family_payment_history",
+        use_container_width=True
+    )
+
 def show_dashboard_page(student_id):
     """Show dashboard with overview"""
     
@@ -750,12 +798,8 @@ def show_dashboard_page(student_id):
     st.divider()
     st.subheader("📈 Recent Activity")
     
-    df = load_data()
-    student_records = df[df['ID'] == student_id].sort_values('Date', ascending=False).head(5)
-    
-    if not student_records.empty:
-        recent_df = student_records[['Date', 'Month', 'Received Amount', 'Payment Method']].copy()
-        recent_df['Date'] = pd.to_datetime(recent_df['Date'], errors='coerce').dt.strftime('%d-%m-%Y')
+    if fee_details['recent_activity']:
+        recent_df = pd.DataFrame(fee_details['recent_activity'])
         
         st.dataframe(
             recent_df.style.format({
@@ -891,14 +935,46 @@ def show_fee_details_page(student_id):
         4. Contact school for any queries
         """)
 
+def show_payment_requests(student_id):
+    """Show online payments submitted for this student and their verification status"""
+    requests = get_payment_store().for_student(student_id)
+    
+    if not requests:
+        return
+    
+    status_labels = {
+        "pending": "🟡 Pending",
+        "pending_verification": "🟡 Pending Verification",
+        "verified": "✅ Verified",
+        "rejected": "❌ Rejected"
+    }
+    
+    st.subheader("🧾 My Payment Requests")
+    
+    requests_df = pd.DataFrame([{
+        "Submitted": req.get("created_at", ""),
+        "Amount": req.get("amount", 0),
+        "Method": req.get("payment_method", ""),
+        "Transaction ID": req.get("transaction_id", ""),
+        "Status": status_labels.get(req.get("status"), req.get("status", ""))
+    } for req in requests])
+    
+    st.dataframe(
+        requests_df.style.format({'Amount': format_currency}),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.divider()
+
 def show_payment_history_page(student_id):
     """Show payment history"""
     
     # Add back button at the top
     add_back_button()
     
-    df = load_data()
-    student_records = df[df['ID'] == student_id]
+    show_payment_requests(student_id)
+    
+    student_records = get_student_records(student_id)
     
     if student_records.empty:
         st.info("ℹ️ No payment history found")
@@ -941,12 +1017,13 @@ def show_payment_history_page(student_id):
     
     # Download option
     st.divider()
-    csv = display_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="📥 Download Payment History (CSV)",
-        data=csv,
-        file_name=f"payment_history_{student_id}.csv",
-        mime="text/csv",
+    download_export(
+        "📥 Download Payment History",
+        "payment_history",
+        lambda: CsvText(iter_payment_history_csv([student_id], ledger_path=LEDGER_PATH)),
+        f"payment_history_{student_id}",
+        query={"student_id": student_id},
+        key="payment_history_export",
         use_container_width=True
     )
 
@@ -1021,9 +1098,12 @@ def parent_portal_page():
     
     # Check if parent is authenticated
     if not check_parent_authentication():
-        show_parent_login()
+        with page_render("Parent Portal / Login"):
+            show_parent_login()
     else:
-        show_parent_dashboard()
+        current_page = st.session_state.get('current_parent_page', "📊 Dashboard")
+        with page_render(f"Parent Portal / {current_page}", user=st.session_state.get('parent_email')):
+            show_parent_dashboard()
 
 if __name__ == "__main__":
     parent_portal_page()
@@ -62,6 +62,10 @@ class PaymentConfig:
         config_data['updated_at'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         with open(self.config_file, 'w') as f:
             json.dump(config_data, f, indent=4)
+        
+        # Gateway sessions are reopened with whatever settings are now in effect
+        from gateway_client import reset_gateway_clients
+        reset_gateway_clients()
         return True
     
     def show_config_page(self):
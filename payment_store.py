@@ -0,0 +1,273 @@
+# [file name]: payment_store.py
+# [file content begin]
+# type:ignore
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from file_lock import get_file_lock
+
+PAYMENTS_LOG = "payment_requests.jsonl"
+
+# Statuses a payment can be waiting on admin verification in
+PENDING_STATUSES = ("pending", "pending_verification")
+
+# Files the store replaces; migrated once, then renamed to <file>.migrated
+LEGACY_PAYMENT_FILES = [
+    ("data/parent_payments.json", "parent_dashboard"),
+    ("parent_payments_history.json", "parent_portal"),
+    ("parent_payments.json", "payment_gateway"),
+]
+
+class PaymentStore:
+    """Append-only log of parent payment requests with in-memory indexes.
+
+    Each line of the log is an event: {"op": "add", "payment": {...}} or
+    {"op": "update", "payment_id": ..., "changes": {...}}. Writes only ever
+    append; readers pick up new lines incrementally from the last offset.
+
+    write_lock (<log>.lock) is shared with other processes using the same
+    log; hold it across a check of the store and the writes that depend on it.
+    """
+
+    def __init__(self, path=PAYMENTS_LOG):
+        self.path = path
+        self._lock = threading.RLock()
+        self.write_lock = get_file_lock(f"{path}.lock")
+        self._reset()
+
+    def _reset(self):
+        """Clear the indexes before a full reload"""
+        self._offset = 0
+        self._file_id = None
+        self.payments = {}
+        self.by_student = {}
+        self.by_status = {}
+        self.by_transaction = {}
+
+    def _apply(self, event):
+        """Apply one log event to the indexes"""
+        if event.get("op") == "add":
+            payment = event["payment"]
+            payment_id = payment["payment_id"]
+            self.payments[payment_id] = payment
+            self.by_student.setdefault(payment.get("student_id"), []).append(payment_id)
+            self.by_status.setdefault(payment.get("status"), set()).add(payment_id)
+            if payment.get("transaction_id"):
+                self.by_transaction[payment["transaction_id"]] = payment_id
+
+        elif event.get("op") == "update":
+            payment = self.payments.get(event.get("payment_id"))
+            if payment is None:
+                return
+            changes = event.get("changes", {})
+            if "status" in changes and changes["status"] != payment.get("status"):
+                self.by_status.get(payment.get("status"), set()).discard(payment["payment_id"])
+                self.by_status.setdefault(changes["status"], set()).add(payment["payment_id"])
+            if changes.get("transaction_id"):
+                self.by_transaction[changes["transaction_id"]] = payment["payment_id"]
+            payment.update(changes)
+
+    def refresh(self):
+        """Read events appended since the last refresh"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                self._reset()
+                return
+
+            # Replaced or truncated log: start over
+            file_id = (stat.st_dev, stat.st_ino)
+            if file_id != self._file_id or stat.st_size < self._offset:
+                self._reset()
+                self._file_id = file_id
+
+            if stat.st_size == self._offset:
+                return
+
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+
+            # Leave a partially written last line for the next refresh
+            complete = data.rfind(b'\n') + 1
+            for line in data[:complete].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:
+                    print(f"Skipping bad payment log line at offset {self._offset}")
+            self._offset += complete
+
+    def _append(self, events):
+        """Append events to the log and apply them"""
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        with self.write_lock, self._lock:
+            self.refresh()
+            with open(self.path, 'a') as f:
+                f.write(lines)
+            self.refresh()
+
+    def add(self, payment):
+        """Record a new payment request and return its ID"""
+        return self.add_many([payment])[0]
+
+    def add_many(self, payments):
+        """Record several payment requests with one write"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        records = []
+        for payment in payments:
+            record = dict(payment)
+            # Long enough random suffix that large batches don't collide
+            record.setdefault("payment_id", f"PAY_{stamp}_{uuid.uuid4().hex[:12]}")
+            record.setdefault("status", "pending_verification")
+            record.setdefault("created_at", now)
+            record.setdefault("updated_at", record["created_at"])
+            records.append(record)
+
+        self._append([{"op": "add", "payment": record} for record in records])
+        return [record["payment_id"] for record in records]
+
+    def update(self, payment_id, **changes):
+        """Change fields of a payment request (e.g. its status)"""
+        return self.update_many([payment_id], **changes) == 1
+
+    def update_many(self, payment_ids, **changes):
+        """Apply the same change to several payment requests with one write"""
+        self.refresh()
+        changes["updated_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        events = [
+            {"op": "update", "payment_id": payment_id, "changes": changes}
+            for payment_id in payment_ids if payment_id in self.payments
+        ]
+        if events:
+            self._append(events)
+        return len(events)
+
+    def update_each(self, changes_by_id):
+        """Apply different changes to several payment requests with one write"""
+        self.refresh()
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        events = [
+            {"op": "update", "payment_id": payment_id, "changes": dict(changes, updated_at=now)}
+            for payment_id, changes in changes_by_id.items() if payment_id in self.payments
+        ]
+        if events:
+            self._append(events)
+        return len(events)
+
+    def get(self, payment_id):
+        """Get a payment request by ID"""
+        self.refresh()
+        payment = self.payments.get(payment_id)
+        return dict(payment) if payment else None
+
+    def find_by_transaction(self, transaction_id):
+        """Get the payment request recorded for a gateway/bank transaction ID"""
+        self.refresh()
+        payment_id = self.by_transaction.get(transaction_id)
+        return self.get(payment_id) if payment_id else None
+
+    def for_student(self, student_id):
+        """Get a student's payment requests, newest first"""
+        self.refresh()
+        payments = [dict(self.payments[payment_id]) for payment_id in self.by_student.get(student_id, [])]
+        return sorted(payments, key=lambda p: p.get("created_at", ""), reverse=True)
+
+    def with_status(self, *statuses):
+        """Get payment requests in any of the given statuses, oldest first"""
+        self.refresh()
+        payments = [
+            dict(self.payments[payment_id])
+            for status in statuses
+            for payment_id in self.by_status.get(status, ())
+        ]
+        return sorted(payments, key=lambda p: p.get("created_at", ""))
+
+    def pending(self):
+        """Get payment requests waiting for verification, oldest first"""
+        return self.with_status(*PENDING_STATUSES)
+
+    def counts_by_status(self):
+        """Number of payment requests in each status"""
+        self.refresh()
+        return {status: len(ids) for status, ids in self.by_status.items() if ids}
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_payment_store(path=PAYMENTS_LOG):
+    """Get the shared store for a log file (one per process and path)"""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = PaymentStore(path)
+        return _stores[key]
+
+def _legacy_records(data, source):
+    """Flatten a legacy {student_id: [payment, ...]} file into store records.
+
+    A request_id used more than once in the file gets a numbered suffix
+    (REQ_1_2, REQ_1_3, ...), so every payment keeps its own record and a
+    rerun of the migration produces the same IDs.
+    """
+    seen = set()
+    for student_id, items in data.items():
+        for item in items if isinstance(items, list) else []:
+            created_at = item.get("payment_date") or item.get("requested_at") or ""
+            payment_id = item.get("request_id") or f"LEGACY_{uuid.uuid4().hex[:12]}"
+            if payment_id in seen:
+                number = 2
+                while f"{payment_id}_{number}" in seen:
+                    number += 1
+                payment_id = f"{payment_id}_{number}"
+            seen.add(payment_id)
+            yield {
+                "payment_id": payment_id,
+                "student_id": item.get("student_id", student_id),
+                "student_name": item.get("student_name", ""),
+                "parent_email": item.get("parent_email", ""),
+                "amount": item.get("amount", 0),
+                "payment_type": item.get("payment_type", ""),
+                "payment_method": item.get("payment_method", ""),
+                "transaction_id": item.get("transaction_id", ""),
+                "status": item.get("status", "pending_verification"),
+                "notes": item.get("notes", ""),
+                "source": source,
+                "created_at": created_at,
+                "updated_at": created_at
+            }
+
+def migrate_legacy_payments(store=None):
+    """Move payments from the old JSON files into the store, once"""
+    store = store or get_payment_store()
+    messages = []
+
+    for path, source in LEGACY_PAYMENT_FILES:
+        if not os.path.exists(path):
+            continue
+
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+
+            store.refresh()
+            records = [
+                record for record in _legacy_records(data, source)
+                if record["payment_id"] not in store.payments
+                and not (record["transaction_id"] and record["transaction_id"] in store.by_transaction)
+            ]
+            if records:
+                store.add_many(records)
+
+            os.replace(path, f"{path}.migrated")
+            print(f"Migrated {len(records)} payments from {path}")
+        except Exception as e:
+            messages.append(f"{path}: {str(e)}")
+
+    return messages
+# [file content end]
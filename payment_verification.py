@@ -0,0 +1,282 @@
+# [file name]: payment_verification.py
+# [file content begin]
+# type:ignore
+import streamlit as st
+import pandas as pd
+from datetime import datetime, timedelta
+from payment_store import get_payment_store, PENDING_STATUSES
+from utils import get_academic_year
+
+LEDGER_MONTH = "PARENT_PAYMENT"
+REVERSAL_MONTH = "PARENT_PAYMENT_REVERSAL"
+PAGE_SIZES = [25, 50, 100, 250]
+GATEWAY_METHODS = ("JazzCash", "EasyPaisa")
+
+def has_ledger_row(payment):
+    """Whether a payment was already credited to the ledger when it was submitted.
+
+    Parent portal submissions made before the verification queue wrote their
+    ledger row straight away; everything else is credited on approval.
+    """
+    return payment.get("ledger_recorded", payment.get("source") == "parent_portal")
+
+def _parse_time(value):
+    """Parse a store timestamp, or None"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+def build_ledger_row(payment, student_info, reversal=False):
+    """Ledger row crediting (or reversing) a parent payment"""
+    amount = float(payment.get("amount", 0) or 0)
+    if reversal:
+        amount = -amount
+    paid_on = _parse_time(payment.get("created_at")) or datetime.now()
+
+    return {
+        "ID": payment.get("student_id", ""),
+        "Student Name": payment.get("student_name") or student_info.get('student_name', ''),
+        "Father Name": student_info.get('father_name', ''),
+        "Student Phone": student_info.get('phone', ''),
+        "Class Category": student_info.get('class_category', ''),
+        "Class Section": student_info.get('class_section', ''),
+        "Address": student_info.get('address', ''),
+        "Age": student_info.get('age', ''),
+        "Month": REVERSAL_MONTH if reversal else LEDGER_MONTH,
+        "Monthly Fee": amount,
+        "Annual Charges": 0,
+        "Admission Fee": 0,
+        "Received Amount": amount,
+        "Payment Method": payment.get("payment_method", ""),
+        "Date": paid_on.strftime("%Y-%m-%d"),
+        "Signature": "Parent Portal",
+        "Entry Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Academic Year": get_academic_year(paid_on),
+        "Transaction ID": payment.get("transaction_id", ""),
+        "Payment Source": "Parent Portal"
+    }
+
+def verify_payments(payment_ids, approve, verified_by, note="", store=None, extra_changes=None):
+    """Approve or reject pending payments with one ledger write and one store write.
+
+    Approving credits payments that aren't in the ledger yet; rejecting reverses
+    payments that already are. extra_changes ({payment_id: {...}}) adds
+    per-payment fields to the same store write. Returns {"success", "updated",
+    "skipped", "message"}.
+    """
+    from database import save_to_csv, load_student_details
+
+    store = store or get_payment_store()
+    # Held (across processes) while a batch is checked, credited and marked,
+    # so the app and the callback receiver can't verify a payment twice
+    with store.write_lock:
+        store.refresh()
+        pending = [
+            store.payments[payment_id] for payment_id in dict.fromkeys(payment_ids)
+            if payment_id in store.payments and store.payments[payment_id].get("status") in PENDING_STATUSES
+        ]
+        skipped = len(set(payment_ids)) - len(pending)
+        if not pending:
+            return {"success": True, "updated": 0, "skipped": skipped, "message": "No pending payments selected"}
+
+        student_details = load_student_details()
+        rows = [
+            build_ledger_row(payment, student_details.get(payment.get("student_id"), {}), reversal=not approve)
+            for payment in pending
+            if has_ledger_row(payment) != approve
+        ]
+        if rows and not save_to_csv(rows):
+            return {"success": False, "updated": 0, "skipped": skipped, "message": "Failed to update the ledger"}
+
+        changes = {
+            "status": "verified" if approve else "rejected",
+            "verified_by": verified_by,
+            "verified_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "verification_note": note,
+            "ledger_recorded": approve
+        }
+        if extra_changes:
+            updated = store.update_each({
+                payment["payment_id"]: dict(changes, **extra_changes.get(payment["payment_id"], {}))
+                for payment in pending
+            })
+        else:
+            updated = store.update_many([payment["payment_id"] for payment in pending], **changes)
+
+    action = "Approved" if approve else "Rejected"
+    return {
+        "success": True,
+        "updated": updated,
+        "skipped": skipped,
+        "message": f"{action} {updated} payments ({len(rows)} ledger rows written)"
+    }
+
+def queue_metrics(store=None, now=None):
+    """Backlog size/age and verification throughput from the payment store"""
+    store = store or get_payment_store()
+    now = now or datetime.now()
+    store.refresh()
+
+    pending_ages = [
+        (now - created).total_seconds() / 3600
+        for created in (_parse_time(payment.get("created_at")) for payment in store.pending())
+        if created
+    ]
+
+    verified_times = [
+        _parse_time(store.payments[payment_id].get("verified_at"))
+        for status in ("verified", "rejected")
+        for payment_id in store.by_status.get(status, ())
+    ]
+    verified_times = [t for t in verified_times if t]
+    last_day = sum(1 for t in verified_times if t >= now - timedelta(days=1))
+    last_week = sum(1 for t in verified_times if t >= now - timedelta(days=7))
+
+    ages = pd.Series(pending_ages, dtype=float)
+    return {
+        "backlog": sum(len(store.by_status.get(status, ())) for status in PENDING_STATUSES),
+        "oldest_hours": round(float(ages.max()), 1) if not ages.empty else 0,
+        "median_hours": round(float(ages.median()), 1) if not ages.empty else 0,
+        "over_24h": int((ages > 24).sum()),
+        "over_72h": int((ages > 72).sum()),
+        "verified_24h": last_day,
+        "verified_per_day_7d": round(last_week / 7, 1)
+    }
+
+def filter_queue(queue_df, method="All", source="All", search="", min_age_hours=0):
+    """Apply the queue filters to the pending payments DataFrame"""
+    filtered = queue_df
+    if method != "All":
+        filtered = filtered[filtered["payment_method"] == method]
+    if source != "All":
+        filtered = filtered[filtered["source"] == source]
+    if search:
+        text = filtered["student_id"].astype(str) + " " + filtered["student_name"].astype(str) + " " + filtered["transaction_id"].astype(str)
+        filtered = filtered[text.str.contains(search, case=False, regex=False)]
+    if min_age_hours:
+        filtered = filtered[filtered["age_hours"] >= min_age_hours]
+    return filtered
+
+def _queue_frame(pending):
+    """Pending payments as a DataFrame with the columns the queue needs"""
+    columns = ["payment_id", "created_at", "student_id", "student_name", "amount", "payment_method", "transaction_id", "source", "status"]
+    queue_df = pd.DataFrame(pending).reindex(columns=columns).fillna("")
+    created = pd.to_datetime(queue_df["created_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce")
+    queue_df["age_hours"] = ((datetime.now() - created).dt.total_seconds() / 3600).round(1).fillna(0)
+    return queue_df
+
+def payment_verification_page():
+    """Admin queue for verifying parent payments in bulk"""
+    st.header("🧾 Payment Verification")
+
+    store = get_payment_store()
+    metrics = queue_metrics(store)
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Waiting for Verification", metrics["backlog"])
+    with col2:
+        st.metric("Oldest (hours)", metrics["oldest_hours"], help=f"Median wait: {metrics['median_hours']} hours")
+    with col3:
+        st.metric("Waiting > 24h / > 72h", f"{metrics['over_24h']} / {metrics['over_72h']}")
+    with col4:
+        st.metric("Verified (24h)", metrics["verified_24h"], help=f"Average over 7 days: {metrics['verified_per_day_7d']} per day")
+
+    if "verification_result" in st.session_state:
+        result = st.session_state.pop("verification_result")
+        if result["success"]:
+            st.success(f"✅ {result['message']}")
+            if result["skipped"]:
+                st.info(f"{result['skipped']} selected payments were already verified elsewhere and were skipped")
+        else:
+            st.error(f"❌ {result['message']}")
+
+    pending = store.pending()
+    if not pending:
+        st.success("✅ No payments waiting for verification")
+        return
+
+    queue_df = _queue_frame(pending)
+
+    st.divider()
+
+    # Filters
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        method = st.selectbox("Payment Method", ["All"] + sorted(m for m in queue_df["payment_method"].unique() if m), key="verify_method")
+    with col2:
+        source = st.selectbox("Source", ["All"] + sorted(s for s in queue_df["source"].unique() if s), key="verify_source")
+    with col3:
+        search = st.text_input("Search ID / Name / Transaction", key="verify_search")
+    with col4:
+        min_age = st.number_input("Waiting at least (hours)", min_value=0, value=0, step=12, key="verify_min_age")
+
+    filtered = filter_queue(queue_df, method, source, search, min_age)
+
+    # Paging
+    col1, col2 = st.columns(2)
+    with col1:
+        page_size = st.selectbox("Rows per page", PAGE_SIZES, key="verify_page_size")
+    total_pages = max(1, -(-len(filtered) // page_size))
+    with col2:
+        page = st.number_input(f"Page (of {total_pages})", min_value=1, max_value=total_pages, value=1, key="verify_page")
+
+    page_df = filtered.iloc[(page - 1) * page_size:page * page_size].copy()
+    st.caption(f"Showing {len(page_df)} of {len(filtered)} matching payments ({len(queue_df)} waiting in total)")
+
+    select_all = st.checkbox("Select all on this page", key="verify_select_all")
+    page_df.insert(0, "Select", select_all)
+
+    edited = st.data_editor(
+        page_df.drop(columns=["status"]).rename(columns={
+            "created_at": "Submitted",
+            "student_id": "Student ID",
+            "student_name": "Student Name",
+            "amount": "Amount",
+            "payment_method": "Method",
+            "transaction_id": "Transaction ID",
+            "source": "Source",
+            "age_hours": "Waiting (h)"
+        }),
+        column_config={"payment_id": None},
+        disabled=["Submitted", "Student ID", "Student Name", "Amount", "Method", "Transaction ID", "Source", "Waiting (h)"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"verify_editor_{page}_{page_size}_{select_all}"
+    )
+    selected_ids = edited.loc[edited["Select"], "payment_id"].tolist()
+
+    note = st.text_input("Note (saved with the decision)", key="verify_note")
+    verified_by = st.session_state.get("current_user", "admin")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        approve = st.button(f"✅ Approve Selected ({len(selected_ids)})", disabled=not selected_ids, use_container_width=True, type="primary")
+    with col2:
+        reject = st.button(f"❌ Reject Selected ({len(selected_ids)})", disabled=not selected_ids, use_container_width=True)
+    with col3:
+        approve_filtered = st.button(f"✅ Approve All Matching ({len(filtered)})", use_container_width=True)
+
+    if approve or reject or approve_filtered:
+        ids = filtered["payment_id"].tolist() if approve_filtered else selected_ids
+        st.session_state.verification_result = verify_payments(ids, approve=not reject, verified_by=verified_by, note=note, store=store)
+        st.rerun()
+
+    # Live status from JazzCash/EasyPaisa for the selected gateway payments
+    gateway_rows = page_df[page_df["payment_id"].isin(selected_ids) & page_df["payment_method"].isin(GATEWAY_METHODS)]
+    if st.button(f"🔄 Check Gateway Status ({len(gateway_rows)})", disabled=gateway_rows.empty, use_container_width=True):
+        from gateway_client import check_statuses
+
+        with st.spinner("Asking the gateways..."):
+            statuses = check_statuses(gateway_rows.to_dict("records"))
+        st.dataframe(pd.DataFrame([
+            {
+                "Transaction ID": transaction_id,
+                "Gateway Status": ("Paid" if result.get("status") else "Not paid") if result.get("success") else "Unavailable",
+                "Amount": result.get("amount", ""),
+                "Error": result.get("error", "")
+            }
+            for transaction_id, result in statuses.items()
+        ]), use_container_width=True, hide_index=True)
+# [file content end]
@@ -239,98 +239,110 @@
 # [file content begin]
 # type:ignore
 import streamlit as st
-import json
-import os
+import pandas as pd
 from datetime import datetime
+from payment_store import get_payment_store
+
+def normalize_transaction_id(transaction_id):
+    """Transaction ID as stored and looked up (surrounding whitespace removed)"""
+    return str(transaction_id or "").strip()
 
 class RealPaymentSystem:
     def __init__(self):
-        self.payments_file = "parent_payments.json"
-        self._initialize_payments_file()
+        # All parent payment requests live in the shared append-only store
+        self.store = get_payment_store()
     
-    def _initialize_payments_file(self):
-        """Initialize payments file if it doesn't exist"""
-        if not os.path.exists(self.payments_file):
-            with open(self.payments_file, 'w') as f:
-                json.dump({}, f)
+    def find_existing_payment(self, transaction_id):
+        """Get the payment already recorded for a transaction ID, if any"""
+        transaction_id = normalize_transaction_id(transaction_id)
+        if not transaction_id:
+            return None
+        existing = self.store.find_by_transaction(transaction_id)
+        # A failed attempt doesn't hold on to its transaction ID
+        if existing and existing.get("status") == "failed":
+            return None
+        return existing
     
-    def handle_parent_payment(self, student_id, student_name, amount, payment_method, transaction_id):
-        """Handle payment from parent and record in admin system"""
+    def record_gateway_payment(self, payment_data):
+        """Save a gateway payment record (JazzCash/EasyPaisa) once per transaction ID.
+        
+        Returns {"success", "duplicate", "payment"}; a repeat submission returns
+        the originally recorded payment without writing anything.
+        """
         try:
-            from database import save_to_csv, load_student_details
-            
-            # Load student details
-            student_details = load_student_details()
-            student_info = student_details.get(student_id, {})
-            
-            # Create payment record
-            payment_record = {
-                "ID": student_id,
-                "Student Name": student_name,
-                "Father Name": student_info.get('father_name', ''),
-                "Student Phone": student_info.get('phone', ''),
-                "Class Category": student_info.get('class_category', ''),
-                "Class Section": student_info.get('class_section', ''),
-                "Address": student_info.get('address', ''),
-                "Age": student_info.get('age', ''),
-                "Month": "PARENT_PAYMENT",
-                "Monthly Fee": amount,
-                "Annual Charges": 0,
-                "Admission Fee": 0,
-                "Received Amount": amount,
-                "Payment Method": payment_method,
-                "Date": datetime.now().strftime("%Y-%m-%d"),
-                "Signature": "Parent Portal",
-                "Entry Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Academic Year": "2024-2025",
-                "Transaction ID": transaction_id,
-                "Payment Source": "Parent Portal"
-            }
-            
-            # Save to main database
-            if save_to_csv([payment_record]):
-                # Also save to parent payments file for tracking
-                self._save_parent_payment_record(student_id, student_name, amount, payment_method, transaction_id)
-                return True
-            return False
+            record = dict(payment_data)
+            record["transaction_id"] = normalize_transaction_id(record.get("transaction_id"))
+            record.setdefault("source", "payment_gateway")
+            record.setdefault("ledger_recorded", False)
             
+            # Held while the transaction ID is checked and recorded, so two
+            # submissions (from any process) can't both get past the check
+            with self.store.write_lock:
+                existing = self.find_existing_payment(record["transaction_id"])
+                if existing:
+                    return {"success": True, "duplicate": True, "payment": existing}
+                
+                payment_id = self.store.add(record)
+                return {"success": True, "duplicate": False, "payment": self.store.get(payment_id)}
+        except Exception as e:
+            st.error(f"Error saving payment: {str(e)}")
+            return {"success": False, "duplicate": False, "payment": None}
+    
+    def _save_payment_record(self, payment_data):
+        """Save a gateway payment record (JazzCash/EasyPaisa) to the payment store"""
+        return self.record_gateway_payment(payment_data)["success"]
+    
+    def get_parent_payments(self, student_id=None):
+        """Get payment requests for a student, or all pending ones"""
+        if student_id:
+            return self.store.for_student(student_id)
+        return self.store.pending()
+    
+    def handle_parent_payment(self, student_id, student_name, amount, payment_method, transaction_id):
+        """Queue a parent payment as pending_verification; the ledger is credited when an admin approves it"""
+        return self.ingest_parent_payment(student_id, student_name, amount, payment_method, transaction_id)["success"]
+    
+    def ingest_parent_payment(self, student_id, student_name, amount, payment_method, transaction_id):
+        """Record a parent payment in the payment store once per transaction ID.
+        
+        The ledger is credited when an admin approves the payment in the
+        verification queue. Returns {"success", "duplicate", "payment"}; a repeat
+        submission (double click, retried callback) returns the original payment
+        and writes nothing.
+        """
+        transaction_id = normalize_transaction_id(transaction_id)
+        try:
+            # Held while the transaction ID is checked and recorded, so two
+            # submissions (from any process) can't both get past the check
+            with self.store.write_lock:
+                existing = self.find_existing_payment(transaction_id)
+                if existing:
+                    return {"success": True, "duplicate": True, "payment": existing}
+                
+                payment_id = self._save_parent_payment_record(student_id, student_name, amount, payment_method, transaction_id)
+                if not payment_id:
+                    return {"success": False, "duplicate": False, "payment": None}
+                return {"success": True, "duplicate": False, "payment": self.store.get(payment_id)}
         except Exception as e:
             st.error(f"Payment recording error: {str(e)}")
-            return False
-
+            return {"success": False, "duplicate": False, "payment": None}
+    
     def _save_parent_payment_record(self, student_id, student_name, amount, payment_method, transaction_id):
-        """Save parent payment record to separate file"""
+        """Save parent payment record to the payment store and return its ID"""
         try:
-            parent_payments_file = "parent_payments_history.json"
-            
-            if os.path.exists(parent_payments_file):
-                with open(parent_payments_file, 'r') as f:
-                    payments = json.load(f)
-            else:
-                payments = {}
-            
-            if student_id not in payments:
-                payments[student_id] = []
-            
-            payment_data = {
+            return self.store.add({
                 "student_id": student_id,
                 "student_name": student_name,
                 "amount": amount,
                 "payment_method": payment_method,
                 "transaction_id": transaction_id,
-                "payment_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "status": "pending_verification"
-            }
-            
-            payments[student_id].append(payment_data)
-            
-            with open(parent_payments_file, 'w') as f:
-                json.dump(payments, f, indent=4)
-            
-            return True
+                "status": "pending_verification",
+                "source": "parent_portal",
+                "ledger_recorded": False
+            })
         except Exception as e:
             print(f"Error saving parent payment: {str(e)}")
-            return False
+            return None
 
 def real_payment_page():
     """Real payment system page"""
@@ -338,6 +350,43 @@ def real_payment_page():
     
     st.header("💳 Real Payment System")
     st.info("This is the payment system for processing parent payments.")
+    
+    # Pending verification, straight from the store's status index
+    counts = payment_system.store.counts_by_status()
+    pending = payment_system.get_parent_payments()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Pending Verification", len(pending))
+    with col2:
+        st.metric("Verified", counts.get("verified", 0))
+    with col3:
+        st.metric("Rejected", counts.get("rejected", 0))
+    
+    st.subheader("⏳ Pending Verification")
+    
+    if not pending:
+        st.success("✅ No payments waiting for verification")
+        return
+    
+    pending_df = pd.DataFrame(pending)
+    display_columns = [
+        "created_at", "student_id", "student_name", "amount", "payment_method",
+        "transaction_id", "source", "status"
+    ]
+    pending_df = pending_df[[col for col in display_columns if col in pending_df.columns]]
+    pending_df = pending_df.rename(columns={
+        "created_at": "Submitted",
+        "student_id": "Student ID",
+        "student_name": "Student Name",
+        "amount": "Amount",
+        "payment_method": "Method",
+        "transaction_id": "Transaction ID",
+        "source": "Source",
+        "status": "Status"
+    })
+    
+    st.dataframe(pending_df, use_container_width=True, hide_index=True)
 
 if __name__ == "__main__":
     real_payment_page()
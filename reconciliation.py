@@ -0,0 +1,378 @@
+# [file name]: reconciliation.py
+# [file content begin]
+# type:ignore
+import streamlit as st
+import pandas as pd
+import numpy as np
+import io
+from payment_store import get_payment_store, PENDING_STATUSES
+
+# Statement column -> accepted header names (compared lower-cased)
+STATEMENT_COLUMNS = {
+    "date": ["date", "transaction date", "value date", "posting date", "txn date"],
+    "credit": ["credit", "credit amount", "deposit", "deposits", "cr"],
+    "amount": ["amount", "transaction amount"],
+    "reference": ["reference", "description", "narration", "remarks", "particulars", "details"],
+    "bank_ref": ["transaction id", "reference no", "ref no", "txn id", "transaction reference", "cheque no"]
+}
+
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%d-%b-%Y", "%d %b %Y", "%d/%m/%y", "%m/%d/%Y"]
+
+# Student IDs are 8 upper-case hex characters (see database.generate_student_id)
+STUDENT_ID_PATTERN = r"(?<![0-9A-F])[0-9A-F]{8}(?![0-9A-F])"
+
+MATCHED_STATUSES = ("matched_transaction", "matched_reference")
+EXCEPTION_STATUSES = (
+    "invalid", "duplicate_line", "amount_mismatch", "unknown_reference",
+    "unmatched_pending", "no_match"
+)
+
+STATUS_LABELS = {
+    "matched_transaction": "Matched (transaction ID)",
+    "matched_reference": "Matched (student ID, amount, date)",
+    "due_match": "Matches expected fees",
+    "already_recorded": "Already recorded",
+    "duplicate_line": "Duplicate statement line",
+    "amount_mismatch": "Amount differs from submitted payment",
+    "unknown_reference": "No known student ID in reference",
+    "unmatched_pending": "Pending payment with different amount/date",
+    "no_match": "No matching payment or due",
+    "invalid": "Unreadable date or amount",
+    "debit": "Debit (ignored)"
+}
+
+def _parse_amounts(values):
+    """Parse amount text like 'Rs. 1,500.00' into numbers"""
+    cleaned = values.fillna("").astype(str).str.replace(r"[^0-9.\-]", "", regex=True)
+    return pd.to_numeric(cleaned, errors="coerce")
+
+def _parse_dates(values):
+    """Parse statement dates with whichever known format fits the most rows"""
+    values = values.fillna("").astype(str).str.strip()
+    best = None
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(values, format=fmt, errors="coerce")
+        if best is None or parsed.notna().sum() > best.notna().sum():
+            best = parsed
+        if best.notna().all():
+            break
+    return best.dt.normalize()
+
+def normalize_statement(raw):
+    """Map a bank export's columns onto date/amount/reference/bank_ref"""
+    headers = {str(column).strip().lower(): column for column in raw.columns}
+
+    def column(name):
+        for alias in STATEMENT_COLUMNS[name]:
+            if alias in headers:
+                return raw[headers[alias]]
+        return None
+
+    credits = column("credit")
+    amounts = credits if credits is not None else column("amount")
+    dates = column("date")
+    if amounts is None or dates is None:
+        raise ValueError("Statement needs a date column and a credit or amount column")
+
+    amounts = _parse_amounts(amounts)
+    if credits is not None:
+        # A blank credit cell is a debit line
+        amounts = amounts.where(credits.fillna("").astype(str).str.strip() != "", 0)
+
+    empty = pd.Series("", index=raw.index)
+    reference = column("reference")
+    bank_ref = column("bank_ref")
+
+    return pd.DataFrame({
+        "line": np.arange(1, len(raw) + 1),
+        "date": _parse_dates(dates),
+        "amount": amounts,
+        "reference": (reference if reference is not None else empty).fillna("").astype(str).str.strip(),
+        "bank_ref": (bank_ref if bank_ref is not None else empty).fillna("").astype(str).str.strip()
+    }).reset_index(drop=True)
+
+def read_statement(file, file_name=None):
+    """Read a bank statement CSV/XLSX export (path or file object)"""
+    name = (file_name or getattr(file, "name", None) or str(file)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        raw = pd.read_excel(file, dtype=str)
+    else:
+        raw = pd.read_csv(file, dtype=str, skipinitialspace=True)
+    return normalize_statement(raw)
+
+def _line_keys(statement):
+    """Stable key per statement line: the bank's reference, else date/amount/narration"""
+    fallback = (
+        statement["date"].dt.strftime("%Y%m%d").fillna("") + "|" +
+        statement["amount"].round(2).astype(str) + "|" +
+        statement["reference"].str.upper()
+    )
+    return pd.Series(
+        np.where(statement["bank_ref"] != "", "REF:" + statement["bank_ref"].str.upper(), "LINE:" + fallback),
+        index=statement.index
+    )
+
+def pending_payments_frame(payments):
+    """Pending payment records as a DataFrame for matching"""
+    columns = ["payment_id", "student_id", "student_name", "amount", "transaction_id", "created_at"]
+    frame = pd.DataFrame(payments).reindex(columns=columns)
+    frame["amount"] = pd.to_numeric(frame["amount"], errors="coerce")
+    frame["cents"] = (frame["amount"] * 100).round().astype("Int64")
+    frame["txn"] = frame["transaction_id"].fillna("").astype(str).str.strip().str.upper()
+    frame["created"] = pd.to_datetime(frame["created_at"], format="%Y-%m-%d %H:%M:%S", errors="coerce").dt.normalize()
+    return frame
+
+def reconcile(statement, payments, monthly_fees, window_days=7, reconciled_keys=()):
+    """Classify every statement line against pending payments and expected dues.
+
+    statement: output of normalize_statement
+    payments: output of pending_payments_frame
+    monthly_fees: {student_id: monthly fee} for every known student
+    reconciled_keys: line keys of statement lines recorded by earlier runs
+
+    Every step works on whole columns (merges and masks), so large statements
+    are classified in one pass.
+    """
+    result = statement.copy()
+    result["cents"] = (result["amount"] * 100).round().astype("Int64")
+    result["line_key"] = _line_keys(result)
+    result["status"] = ""
+    result["student_id"] = ""
+    result["payment_id"] = ""
+    result["note"] = ""
+
+    def open_rows():
+        return result["status"] == ""
+
+    # Lines that can't be matched at all
+    result.loc[result["amount"].notna() & (result["amount"] <= 0), "status"] = "debit"
+    result.loc[open_rows() & (result["date"].isna() | result["amount"].isna()), "status"] = "invalid"
+    result.loc[open_rows() & result["line_key"].isin(set(reconciled_keys)), "status"] = "already_recorded"
+    result.loc[open_rows() & result["line_key"].duplicated(keep="first"), "status"] = "duplicate_line"
+
+    # 1. Bank reference equals the transaction ID the parent submitted
+    by_txn = payments[payments["txn"] != ""].drop_duplicates("txn")
+    candidates = result.loc[open_rows() & (result["bank_ref"] != ""), ["cents"]].assign(
+        txn=result["bank_ref"].str.upper()
+    )
+    hits = candidates.reset_index().merge(by_txn[["txn", "payment_id", "student_id", "cents"]], on="txn", suffixes=("", "_payment"))
+    if not hits.empty:
+        hits = hits.set_index("index")
+        same_amount = hits["cents"] == hits["cents_payment"]
+        result.loc[hits.index, "payment_id"] = hits["payment_id"]
+        result.loc[hits.index, "student_id"] = hits["student_id"].fillna("").astype(str)
+        result.loc[hits.index[same_amount], "status"] = "matched_transaction"
+        result.loc[hits.index[~same_amount], "status"] = "amount_mismatch"
+        result.loc[hits.index[~same_amount], "note"] = "Submitted amount: " + (hits.loc[~same_amount, "cents_payment"] / 100).astype(str)
+
+    # 2. Student ID in the narration (the bank transfer instructions ask for it)
+    open_mask = open_rows()
+    found = result.loc[open_mask, "reference"].str.upper().str.findall(STUDENT_ID_PATTERN).explode().dropna()
+    found = found[found.isin(set(monthly_fees))]
+    student_ids = found.groupby(level=0).first()
+    result.loc[student_ids.index, "student_id"] = student_ids
+    result.loc[open_mask & (result["student_id"] == ""), "status"] = "unknown_reference"
+
+    # 3. Same student and amount within the date window, one payment per line
+    taken = set(result.loc[result["status"].isin(MATCHED_STATUSES + ("amount_mismatch",)), "payment_id"])
+    available = payments[~payments["payment_id"].isin(taken)]
+    lines = result.loc[open_rows(), ["student_id", "cents", "date"]].reset_index()
+    pairs = lines.merge(
+        available[["payment_id", "student_id", "cents", "created"]],
+        on=["student_id", "cents"]
+    )
+    pairs["days"] = (pairs["date"] - pairs["created"]).abs().dt.days
+    pairs = pairs[pairs["days"] <= window_days].sort_values(["days", "index"])
+    pairs = pairs.drop_duplicates("index").drop_duplicates("payment_id").set_index("index")
+    result.loc[pairs.index, "payment_id"] = pairs["payment_id"]
+    result.loc[pairs.index, "status"] = "matched_reference"
+    result.loc[pairs.index, "note"] = pairs["days"].astype(str) + " day(s) from submission"
+
+    # 4. Student has pending payments, but none fit this line
+    pending_students = set(available.loc[~available["payment_id"].isin(set(pairs["payment_id"])), "student_id"])
+    mismatch = open_rows() & result["student_id"].isin(pending_students)
+    result.loc[mismatch, "status"] = "unmatched_pending"
+
+    # 5. No submission, but the amount is a whole number of monthly fees
+    open_mask = open_rows()
+    monthly_cents = (result["student_id"].map(monthly_fees).astype(float) * 100).round()
+    months = result["cents"].astype(float) / monthly_cents
+    due = open_mask & monthly_cents.gt(0) & (months == months.round()) & months.between(1, 12)
+    result.loc[due, "status"] = "due_match"
+    result.loc[due, "note"] = months[due].round().astype(int).astype(str) + " month(s) of fees"
+
+    result.loc[open_rows(), "status"] = "no_match"
+    return result
+
+def reconciled_line_keys(store):
+    """Line keys already settled: recorded statement lines and decided transaction IDs"""
+    store.refresh()
+    keys = set()
+    for payment in store.payments.values():
+        if payment.get("statement_reference"):
+            keys.add(payment["statement_reference"])
+        if payment.get("transaction_id") and payment.get("status") not in PENDING_STATUSES:
+            keys.add("REF:" + str(payment["transaction_id"]).strip().upper())
+    return keys
+
+def run_reconciliation(statement, window_days=7, store=None):
+    """Reconcile a normalized statement against the payment store and fee settings"""
+    from database import load_student_details, load_student_fees, load_default_fees
+
+    store = store or get_payment_store()
+    student_fees = load_student_fees()
+    default_monthly = load_default_fees().get('monthly_fee', 3000)
+    monthly_fees = {
+        student_id: student_fees.get(student_id, {}).get('monthly_fee', default_monthly)
+        for student_id in load_student_details()
+    }
+
+    return reconcile(
+        statement,
+        pending_payments_frame(store.pending()),
+        monthly_fees,
+        window_days,
+        reconciled_line_keys(store)
+    )
+
+def _statement_changes(rows):
+    """Per-payment fields recording which statement line settled it"""
+    return {
+        row["payment_id"]: {
+            "statement_reference": row["line_key"],
+            "statement_date": row["date"].strftime("%Y-%m-%d"),
+            "statement_amount": float(row["amount"])
+        }
+        for row in rows.to_dict("records")
+    }
+
+def confirm_matches(result, verified_by, store=None):
+    """Approve every matched pending payment in one batch"""
+    from payment_verification import verify_payments
+
+    matched = result[result["status"].isin(MATCHED_STATUSES)]
+    return verify_payments(
+        matched["payment_id"].tolist(), approve=True, verified_by=verified_by,
+        note="Bank statement reconciliation", store=store,
+        extra_changes=_statement_changes(matched)
+    )
+
+def record_due_payments(result, verified_by, store=None):
+    """Record statement lines that match expected dues as verified bank transfers"""
+    from database import load_student_details
+    from payment_verification import verify_payments
+
+    store = store or get_payment_store()
+    due = result[result["status"] == "due_match"]
+    if due.empty:
+        return {"success": True, "updated": 0, "skipped": 0, "message": "No statement lines to record"}
+
+    student_details = load_student_details()
+    payment_ids = store.add_many([
+        {
+            "student_id": row["student_id"],
+            "student_name": student_details.get(row["student_id"], {}).get("student_name", ""),
+            "amount": float(row["amount"]),
+            "payment_method": "Bank Transfer",
+            "transaction_id": row["bank_ref"],
+            "notes": row["reference"],
+            "source": "bank_statement",
+            "ledger_recorded": False,
+            "created_at": row["date"].strftime("%Y-%m-%d %H:%M:%S")
+        }
+        for row in due.to_dict("records")
+    ])
+
+    return verify_payments(
+        payment_ids, approve=True, verified_by=verified_by,
+        note="Bank statement reconciliation", store=store,
+        extra_changes=_statement_changes(due.assign(payment_id=payment_ids))
+    )
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _read_uploaded(data, file_name):
+    """Parse an uploaded statement once per file"""
+    return read_statement(io.BytesIO(data), file_name)
+
+def _display(rows):
+    """Statement lines with readable column names"""
+    return rows.assign(
+        date=rows["date"].dt.strftime("%d-%m-%Y"),
+        status=rows["status"].map(STATUS_LABELS)
+    )[["line", "date", "amount", "reference", "bank_ref", "student_id", "payment_id", "status", "note"]].rename(columns={
+        "line": "Line", "date": "Date", "amount": "Amount", "reference": "Reference",
+        "bank_ref": "Bank Ref", "student_id": "Student ID", "payment_id": "Payment ID",
+        "status": "Status", "note": "Note"
+    })
+
+def reconciliation_page():
+    """Match a bank statement to parent payments and expected fees"""
+    st.header("🏦 Bank Statement Reconciliation")
+    st.write("Upload a bank statement export (CSV or XLSX). Credits are matched to submitted parent payments by "
+             "transaction ID, or by the student ID in the reference with the same amount within the date window.")
+
+    if "reconciliation_result" in st.session_state:
+        outcome = st.session_state.pop("reconciliation_result")
+        if outcome["success"]:
+            st.success(f"✅ {outcome['message']}")
+        else:
+            st.error(f"❌ {outcome['message']}")
+
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        uploaded_file = st.file_uploader("Bank statement", type=["csv", "xlsx"])
+    with col2:
+        window_days = st.number_input("Date window (days)", min_value=0, max_value=60, value=7)
+
+    if uploaded_file is None:
+        return
+
+    try:
+        statement = _read_uploaded(uploaded_file.getvalue(), uploaded_file.name)
+    except Exception as e:
+        st.error(f"Could not read statement: {str(e)}")
+        return
+
+    result = run_reconciliation(statement, window_days)
+    matched = result[result["status"].isin(MATCHED_STATUSES)]
+    due = result[result["status"] == "due_match"]
+    exceptions = result[result["status"].isin(EXCEPTION_STATUSES)]
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Credit Lines", int((result["status"] != "debit").sum()))
+    with col2:
+        st.metric("Matched Payments", len(matched), help=f"Rs. {matched['amount'].sum():,.0f}")
+    with col3:
+        st.metric("Match Expected Fees", len(due), help=f"Rs. {due['amount'].sum():,.0f}")
+    with col4:
+        st.metric("Exceptions", len(exceptions), help=f"{int((result['status'] == 'already_recorded').sum())} lines were already recorded")
+
+    verified_by = st.session_state.get("current_user", "admin")
+
+    st.subheader(f"✅ Matched Payments ({len(matched)})")
+    if not matched.empty:
+        st.dataframe(_display(matched), use_container_width=True, hide_index=True)
+        if st.button(f"Confirm {len(matched)} Matched Payments", type="primary", use_container_width=True):
+            st.session_state.reconciliation_result = confirm_matches(result, verified_by)
+            st.rerun()
+
+    st.subheader(f"📅 Matches Expected Fees ({len(due)})")
+    if not due.empty:
+        st.caption("Credits with a student ID whose amount is a whole number of monthly fees, with no payment submitted in the portal")
+        st.dataframe(_display(due), use_container_width=True, hide_index=True)
+        if st.button(f"Record {len(due)} Bank Transfers", use_container_width=True):
+            st.session_state.reconciliation_result = record_due_payments(result, verified_by)
+            st.rerun()
+
+    st.subheader(f"⚠️ Exceptions ({len(exceptions)})")
+    if not exceptions.empty:
+        exceptions_display = _display(exceptions)
+        st.dataframe(exceptions_display, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="Download Exceptions (CSV)",
+            data=exceptions_display.to_csv(index=False).encode('utf-8'),
+            file_name="reconciliation_exceptions.csv",
+            mime="text/csv"
+        )
+# [file content end]
@@ -2,37 +2,13 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from database import load_data, load_student_details
 from utils import format_currency
 
-def fee_reminder_page():
-    """Fee reminder page showing unpaid students when date is 8th or later"""
-    
-    st.header("Fee Payment Reminder")
-    
-    # Get current date
-    today = datetime.now()
-    current_date = today.day
-    current_month = today.strftime("%B").upper()
-    
-    # Check if date is 8th or later
-    if current_date < 8:
-        st.info(f"📅 Reminders will be shown from the 8th of each month. Current date: {current_date}")
-        return
-    
-    st.warning(f"⏰ Reminder Period Active - {current_month} {current_date}, {today.year}")
-    st.write("Students who have NOT paid full fees for this month:")
-    
-    st.divider()
-    
-    # Load data
-    df = load_data()
-    student_details = load_student_details()
-    
-    if df.empty:
-        st.info("No fee records found")
-        return
+def get_unpaid_students(df, student_details, current_month):
+    """Get students who haven't paid full fees for a month.
     
+    Returns (students with records, students paid in full, unpaid students DataFrame).
+    """
     # Get students who have paid full amount this month
     paid_full_this_month = set()
     
@@ -55,10 +31,6 @@ def fee_reminder_page():
     # Get unpaid students (those who haven't paid full amount)
     unpaid_students = all_students_with_records - paid_full_this_month
     
-    if not unpaid_students:
-        st.success("✅ All students have paid their fees for this month!")
-        return
-    
     # Create unpaid students list with details
     unpaid_list = []
     for student_id, details in student_details.items():
@@ -73,23 +45,63 @@ def fee_reminder_page():
             })
     
     # Sort by class
-    unpaid_df = pd.DataFrame(unpaid_list)
+    unpaid_df = pd.DataFrame(unpaid_list, columns=["Student Name", "Father Name", "Class", "Phone", "Address"])
     unpaid_df = unpaid_df.sort_values('Class')
     
+    return all_students_with_records, paid_full_this_month, unpaid_df
+
+def fee_reminder_page():
+    """Fee reminder page showing unpaid students when date is 8th or later"""
+    
+    st.header("Fee Payment Reminder")
+    
+    # Get current date
+    today = datetime.now()
+    current_date = today.day
+    current_month = today.strftime("%B").upper()
+    
+    # Check if date is 8th or later
+    if current_date < 8:
+        st.info(f"📅 Reminders will be shown from the 8th of each month. Current date: {current_date}")
+        return
+    
+    st.warning(f"⏰ Reminder Period Active - {current_month} {current_date}, {today.year}")
+    st.write("Students who have NOT paid full fees for this month:")
+    
+    st.divider()
+    
+    # Precomputed by the reminder snapshot scheduler (recomputed here only if stale)
+    from reminder_snapshot import get_snapshot, snapshot_frames
+    snapshot = get_snapshot()
+    
+    if not snapshot["students_with_records"]:
+        st.info("No fee records found")
+        return
+    
+    if not snapshot["unpaid"]:
+        st.success("✅ All students have paid their fees for this month!")
+        return
+    
+    unpaid_df, class_summary = snapshot_frames(snapshot)
+    
     # Display statistics
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Students with Records", len(all_students_with_records))
+        st.metric("Total Students with Records", snapshot["students_with_records"])
     with col2:
-        st.metric("Paid Students", len(paid_full_this_month))
+        st.metric("Paid Students", snapshot["paid"])
     with col3:
-        st.metric("Unpaid Students", len(unpaid_students))
+        st.metric("Unpaid Students", snapshot["unpaid"])
+    with col4:
+        st.metric("Outstanding This Month", format_currency(snapshot["total_outstanding"]))
+    
+    st.caption(f"Updated {snapshot['computed_at']}")
     
     st.divider()
     
     # Display unpaid students
-    st.subheader(f"Unpaid Students List ({len(unpaid_students)} students)")
+    st.subheader(f"Unpaid Students List ({snapshot['unpaid']} students)")
     
     # Filter options
     col1, col2 = st.columns(2)
@@ -110,7 +122,7 @@ def fee_reminder_page():
     
     # Display table
     st.dataframe(
-        filtered_df[['Student Name', 'Father Name', 'Class', 'Phone', 'Address']],
+        filtered_df[['Student Name', 'Father Name', 'Class', 'Phone', 'Address', 'Outstanding']],
         use_container_width=True,
         hide_index=True
     )
@@ -120,9 +132,6 @@ def fee_reminder_page():
     # Class-wise summary
     st.subheader("Unpaid Students by Class")
     
-    class_summary = unpaid_df.groupby('Class').size().reset_index(name='Count')
-    class_summary = class_summary.sort_values('Count', ascending=False)
-    
     col1, col2 = st.columns(2)
     
     with col1:
@@ -145,27 +154,27 @@ def fee_reminder_page():
     # Export option
     st.subheader("Export Reminder List")
     
-    csv = filtered_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="Download Unpaid Students List (CSV)",
-        data=csv,
-        file_name=f"unpaid_students_{current_month}_{today.year}.csv",
-        mime="text/csv"
+    from exports import download_export
+    download_export(
+        "Download Unpaid Students List",
+        "unpaid_students",
+        lambda: filtered_df,
+        f"unpaid_students_{current_month}_{today.year}",
+        query={"month": current_month, "class": selected_class, "search": search_name},
+        version=[snapshot["computed_at"], snapshot["versions"]],
+        key="unpaid_students_export"
     )
     
-    # WhatsApp message template
-    st.subheader("WhatsApp Message Template")
-    
-    message_template = f"""
-Dear Parent,
-
-This is a friendly reminder that the fee payment for {current_month} is due.
-
-Please arrange to pay the outstanding fees at your earliest convenience.
-
-For any queries, please contact the school office.
-
-Thank you!
-"""
-    
-    st.text_area("Message Template", value=message_template, height=150, disabled=True)
+    # Personalized WhatsApp reminders for everyone in the current filter
+    st.subheader("WhatsApp Reminders")
+    
+    from bulk_messages import bulk_messages_section, reminder_queue, REMINDER_TEMPLATE, REMINDER_FIELDS
+    classes = None if selected_class == "All" else [selected_class]
+    bulk_messages_section(
+        lambda template: reminder_queue(current_month, template, classes, search=search_name),
+        REMINDER_TEMPLATE,
+        REMINDER_FIELDS,
+        key="reminder_messages",
+        file_stem=f"fee_reminders_{current_month}_{today.year}",
+        query={"month": current_month, "classes": classes, "search": search_name}
+    )
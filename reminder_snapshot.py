@@ -0,0 +1,258 @@
+# [file name]: reminder_snapshot.py
+# [file content begin]
+# type:ignore
+"""Materialized snapshot of this month's unpaid students for the reminder page.
+
+The unpaid list, per-class counts and outstanding totals are computed once
+and saved to reminder_snapshot.json. The snapshot is recomputed when the day
+changes or when the ledger, student details or fee settings change; a
+background thread (or cron running this file) keeps it fresh so the page
+only has to read it.
+
+Usage:
+    python reminder_snapshot.py              # refresh if stale and print totals
+    python reminder_snapshot.py --force      # recompute now
+    python reminder_snapshot.py --watch --interval 300
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+
+SNAPSHOT_FILE = "reminder_snapshot.json"
+
+# Files the snapshot is computed from, besides the ledger
+SOURCE_FILES = ("student_details.json", "student_fees.json", "default_fees.json")
+
+# Seconds between freshness checks in the background scheduler
+DEFAULT_INTERVAL = 60
+
+UNPAID_COLUMNS = ["ID", "Student Name", "Father Name", "Class", "Phone", "Address", "Outstanding"]
+
+# (file version, snapshot) of the last snapshot read or written by this process
+_snapshot_cache = None
+_snapshot_lock = threading.Lock()
+
+def _file_version(path):
+    try:
+        stat = os.stat(path)
+        return [stat.st_mtime_ns, stat.st_size]
+    except OSError:
+        return None
+
+def source_versions():
+    """Version keys of everything the snapshot depends on"""
+    from database import ledger_version
+
+    ledger = ledger_version()
+    versions = {"fees_data.csv": list(ledger) if ledger else None}
+    for path in SOURCE_FILES:
+        versions[path] = _file_version(path)
+    return versions
+
+def current_month(today=None):
+    """Ledger month name for a date, e.g. OCTOBER"""
+    return (today or datetime.now()).strftime("%B").upper()
+
+def compute_snapshot(month=None, today=None):
+    """Unpaid students for a month with per-class counts and outstanding totals.
+
+    Same rule as the reminder page always used: students with ledger records
+    whose payments for the month don't cover what was charged. Outstanding is
+    the student's monthly fee less anything received for the month.
+    """
+    from database import load_data, load_student_details, load_student_fees, load_default_fees
+
+    today = today or datetime.now()
+    month = month or current_month(today)
+    versions = source_versions()
+
+    snapshot = {
+        "month": month,
+        "year": today.year,
+        "date": today.strftime("%Y-%m-%d"),
+        "computed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "versions": versions,
+        "students_with_records": 0,
+        "paid": 0,
+        "unpaid": 0,
+        "total_outstanding": 0.0,
+        "classes": [],
+        "students": []
+    }
+
+    df = load_data()
+    student_details = load_student_details()
+    if df.empty:
+        return snapshot
+
+    month_rows = df[df["Month"] == month]
+    sums = month_rows.groupby("ID")[["Monthly Fee", "Annual Charges", "Admission Fee", "Received Amount"]].sum()
+    expected = sums["Monthly Fee"] + sums["Annual Charges"] + sums["Admission Fee"]
+    paid_full = set(sums.index[(sums["Received Amount"] >= expected) & (expected > 0)])
+    with_records = set(df["ID"].dropna())
+
+    snapshot["students_with_records"] = len(with_records)
+    snapshot["paid"] = len(paid_full & with_records)
+    snapshot["unpaid"] = len(with_records - paid_full)
+
+    students = pd.DataFrame.from_dict(student_details, orient="index")
+    students = students.reindex(columns=["student_name", "father_name", "class_category", "phone", "address"]).fillna("")
+    students = students[students.index.isin(with_records) & ~students.index.isin(paid_full)]
+    if students.empty:
+        return snapshot
+
+    student_fees = load_student_fees()
+    default_fees = load_default_fees()
+    fees = pd.Series({student_id: fees.get("monthly_fee") for student_id, fees in student_fees.items()}, dtype=float)
+    monthly_fee = pd.to_numeric(fees.reindex(students.index), errors="coerce").fillna(default_fees.get("monthly_fee", 0))
+    received = sums["Received Amount"].reindex(students.index).fillna(0)
+
+    unpaid = pd.DataFrame({
+        "ID": students.index,
+        "Student Name": students["student_name"].to_numpy(),
+        "Father Name": students["father_name"].to_numpy(),
+        "Class": students["class_category"].to_numpy(),
+        "Phone": students["phone"].astype(str).to_numpy(),
+        "Address": students["address"].to_numpy(),
+        "Outstanding": (monthly_fee - received).clip(lower=0).to_numpy()
+    }, columns=UNPAID_COLUMNS).sort_values(["Class", "Student Name"], kind="stable")
+
+    classes = unpaid.groupby("Class").agg(Count=("ID", "size"), Outstanding=("Outstanding", "sum")).reset_index()
+    classes = classes.sort_values("Count", ascending=False, kind="stable")
+
+    snapshot["total_outstanding"] = float(unpaid["Outstanding"].sum())
+    snapshot["classes"] = classes.to_dict("records")
+    snapshot["students"] = unpaid.to_dict("records")
+    return snapshot
+
+def save_snapshot(snapshot, path=SNAPSHOT_FILE):
+    """Write the snapshot atomically and keep it as this process's cached copy"""
+    global _snapshot_cache
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(snapshot, f, default=float)
+    os.replace(temp_path, path)
+    _snapshot_cache = (_file_version(path), snapshot)
+    return snapshot
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """Saved snapshot, or None if there isn't a readable one"""
+    global _snapshot_cache
+
+    version = _file_version(path)
+    if version is None:
+        return None
+    cached = _snapshot_cache
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        with open(path, 'r') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error reading reminder snapshot: {str(e)}")
+        return None
+    _snapshot_cache = (version, snapshot)
+    return snapshot
+
+def is_stale(snapshot, today=None):
+    """Whether a snapshot is from another day or older than its source files"""
+    today = today or datetime.now()
+    return (
+        snapshot is None
+        or snapshot.get("date") != today.strftime("%Y-%m-%d")
+        or snapshot.get("versions") != source_versions()
+    )
+
+def refresh_snapshot(force=False, path=SNAPSHOT_FILE, today=None):
+    """Recompute and save the snapshot if it is stale; returns the current snapshot"""
+    with _snapshot_lock:
+        snapshot = load_snapshot(path)
+        if force or is_stale(snapshot, today):
+            snapshot = save_snapshot(compute_snapshot(today=today), path)
+        return snapshot
+
+def get_snapshot(path=SNAPSHOT_FILE):
+    """Current snapshot for the reminder page (computed inline only if the scheduler hasn't yet)"""
+    snapshot = load_snapshot(path)
+    if not is_stale(snapshot):
+        return snapshot
+    return refresh_snapshot(path=path)
+
+def snapshot_frames(snapshot):
+    """(unpaid students, per-class summary) DataFrames from a snapshot"""
+    unpaid_df = pd.DataFrame(snapshot.get("students", []), columns=UNPAID_COLUMNS)
+    class_summary = pd.DataFrame(snapshot.get("classes", []), columns=["Class", "Count", "Outstanding"])
+    return unpaid_df, class_summary
+
+class ReminderSnapshotScheduler:
+    """Background thread that refreshes the snapshot when it goes stale"""
+
+    def __init__(self, path=SNAPSHOT_FILE, interval=DEFAULT_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                refresh_snapshot(path=self.path)
+            except Exception as e:
+                print(f"Reminder snapshot error: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the scheduler thread (once)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="reminder-snapshot", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+def start_snapshot_scheduler(path=SNAPSHOT_FILE, interval=DEFAULT_INTERVAL):
+    """Start the shared scheduler for this data directory (one per process and path)"""
+    key = os.path.abspath(path)
+    with _schedulers_lock:
+        if key not in _schedulers:
+            _schedulers[key] = ReminderSnapshotScheduler(path, interval).start()
+        return _schedulers[key]
+
+def main():
+    parser = argparse.ArgumentParser(description="Refresh the fee reminder snapshot")
+    parser.add_argument("--force", action="store_true", help="Recompute even if the snapshot is fresh")
+    parser.add_argument("--watch", action="store_true", help="Keep running and refresh whenever it goes stale")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL, help="Seconds between checks with --watch")
+    args = parser.parse_args()
+
+    snapshot = refresh_snapshot(force=args.force)
+    print(f"{snapshot['month']} {snapshot['year']}: {snapshot['unpaid']} unpaid of "
+          f"{snapshot['students_with_records']}, outstanding Rs. {snapshot['total_outstanding']:,.0f} "
+          f"(computed {snapshot['computed_at']})")
+
+    if args.watch:
+        scheduler = ReminderSnapshotScheduler(interval=args.interval).start()
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            scheduler.stop()
+
+if __name__ == "__main__":
+    main()
+# [file content end]
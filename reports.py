@@ -3,6 +3,7 @@
 #type:ignore
 import streamlit as st
 import pandas as pd
+import numpy as np
 from database import load_data
 from utils import format_currency, style_row
 from urllib.parse import quote
@@ -164,14 +165,81 @@ def view_all_records():
                     st.bar_chart(monthly_summary.set_index('Month'))
         
         st.divider()
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label="📥 Download All Records as CSV",
-            data=csv,
-            file_name="all_fee_records.csv",
-            mime="text/csv"
+        from exports import download_export
+        from database import iter_ledger_chunks
+        download_export(
+            "📥 Download All Records",
+            "all_fee_records",
+            iter_ledger_chunks,
+            "all_fee_records",
+            key="all_records_export"
         )
 
+MONTHS = [
+    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
+]
+
+def build_payment_status(df, fees_data):
+    """Get paid/unpaid status and outstanding amount for every student and month"""
+    all_students = df[['ID', 'Student Name', 'Father Name', 'Class Category']].drop_duplicates()
+    all_combinations = all_students.merge(pd.DataFrame({"Month": MONTHS}), how="cross")
+    
+    payment_records = df[["ID", "Month", "Monthly Fee", "Received Amount"]]
+    merged = pd.merge(all_combinations, payment_records, on=["ID", "Month"], how="left")
+    
+    # Student's fee setting, else the last monthly fee they paid, else 2000
+    last_paid_fee = df[df['Monthly Fee'] > 0].groupby('ID')['Monthly Fee'].last()
+    custom_fee = pd.Series({student_id: fees.get("monthly_fee") for student_id, fees in fees_data.items()}, dtype=object)
+    estimated = merged['ID'].map(last_paid_fee).fillna(2000).astype(object)
+    has_custom = merged['ID'].isin(custom_fee.index)
+    estimated[has_custom] = merged.loc[has_custom, 'ID'].map(custom_fee)
+    merged['Estimated Monthly Fee'] = estimated.infer_objects()
+    
+    paid = merged['Monthly Fee'].fillna(0) > 0
+    merged['Status'] = np.where(paid, "Paid", "Unpaid")
+    merged['Outstanding'] = merged['Estimated Monthly Fee'].where(~paid, 0)
+    
+    return merged
+
+def monthly_payment_summary(merged):
+    """Students, paid/unpaid counts and outstanding total for each month of a payment status table"""
+    unpaid = merged['Status'] == "Unpaid"
+    summary = pd.DataFrame({
+        "Month": merged['Month'],
+        "Paid Students": ~unpaid,
+        "Unpaid Students": unpaid,
+        "Outstanding": pd.to_numeric(merged['Outstanding'], errors='coerce').where(unpaid, 0)
+    }).groupby("Month", sort=False).agg(**{
+        "Total Students": ("Paid Students", "size"),
+        "Paid Students": ("Paid Students", "sum"),
+        "Unpaid Students": ("Unpaid Students", "sum"),
+        "Total Outstanding": ("Outstanding", "sum")
+    })
+    return summary.reindex([month for month in MONTHS if month in summary.index]).reset_index()
+
+def student_payment_summary(merged):
+    """Unpaid months and total outstanding for each student of a payment status table"""
+    student_summary = merged.groupby(["ID", "Student Name", "Father Name", "Class Category"]).agg({
+        "Status": lambda x: (x == "Unpaid").sum(),
+        "Outstanding": "sum"
+    }).reset_index()
+    student_summary.columns = [
+        "ID", "Student Name", "Father Name", "Class Category", "Unpaid Months", "Total Outstanding"
+    ]
+    return student_summary
+
+def yearly_report_table(df):
+    """Monthly fee and received amount for every student and month (yearly reports in one table)"""
+    students = df.groupby("ID", sort=False)[["Student Name", "Father Name", "Class Category"]].first()
+    monthly = df.groupby(["ID", "Month"])[["Monthly Fee", "Received Amount"]].sum()
+    
+    index = pd.MultiIndex.from_product([students.index, MONTHS], names=["ID", "Month"])
+    table = monthly.reindex(index).fillna(0).reset_index()
+    table = students.reset_index().merge(table, on="ID")
+    table["Status"] = np.where(table["Monthly Fee"] > 0, "Paid", "Unpaid")
+    return table
+
 def paid_unpaid_records():
     """Paid and unpaid students records"""
     st.header("✅ Paid & ❌ Unpaid Students Record")
@@ -180,43 +248,11 @@ def paid_unpaid_records():
     if df.empty:
         st.info("No fee records found")
     else:
-        all_students = df[['ID', 'Student Name', 'Father Name', 'Class Category']].drop_duplicates()
-        
-        MONTHS = [
-            "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
-            "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
-        ]
-        
-        all_combinations = pd.DataFrame([
-            (student['ID'], student['Student Name'], student['Father Name'], student['Class Category'], month)
-            for _, student in all_students.iterrows()
-            for month in MONTHS
-        ], columns=['ID', "Student Name", "Father Name", "Class Category", "Month"])
-        
-        payment_records = df[["ID", "Month", "Monthly Fee", "Received Amount"]]
-        merged = pd.merge(all_combinations, payment_records, on=["ID", "Month"], how="left")
-        
         from database import load_student_fees
         fees_data = load_student_fees()
         
-        def get_student_fee(student_id):
-            if student_id in fees_data:
-                return fees_data[student_id]["monthly_fee"]
-            student_payments = df[(df['ID'] == student_id) & (df['Monthly Fee'] > 0)]
-            if not student_payments.empty:
-                return student_payments['Monthly Fee'].iloc[-1]
-            return 2000
-            
-        merged['Estimated Monthly Fee'] = merged['ID'].apply(get_student_fee)
-            
-        merged['Status'] = merged['Monthly Fee'].apply(
-            lambda x: "Paid" if pd.notna(x) and x > 0 else "Unpaid"
-        )
-        merged['Outstanding'] = merged.apply(
-            lambda row: 0 if row['Status'] == "Paid" else row['Estimated Monthly Fee'],
-            axis=1
-        )
-            
+        merged = build_payment_status(df, fees_data)
+        
         tabs = st.tabs(MONTHS)
             
         for i, month in enumerate(MONTHS):
@@ -264,13 +300,7 @@ def paid_unpaid_records():
                     csv = display_df.to_csv(index=False).encode("utf-8")
                                                     
                 st.subheader("Overall Payment Status")
-                student_summary = merged.groupby(["ID", "Student Name", "Father Name", "Class Category"]).agg({
-                    "Status": lambda x: (x == "Unpaid").sum(),
-                    "Outstanding": "sum"
-                }).reset_index()
-                student_summary.columns = [
-                    "ID", "Student Name", "Father Name", "Class Category", "Unpaid Months", "Total Outstanding"
-                ]
+                student_summary = student_payment_summary(merged)
         
                 st.dataframe(
                     student_summary.style.format({
@@ -402,13 +432,26 @@ def student_yearly_report():
                     """)
                 
                 st.divider()
-                csv = monthly_report.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label="📥 Download Yearly Report as CSV",
-                    data=csv,
-                    file_name=f"yearly_report_{selected_student}_{selected_class}.csv",
-                    mime="text/csv"
+                from exports import download_export
+                download_export(
+                    "📥 Download Yearly Report",
+                    "yearly_report",
+                    lambda: monthly_report,
+                    f"yearly_report_{selected_student}_{selected_class}",
+                    query={"student": selected_student, "class": selected_class},
+                    key="yearly_report_export"
                 )
+                
+                with st.expander(f"📤 Yearly Report Messages for all of {selected_class}"):
+                    from bulk_messages import bulk_messages_section, report_queue, REPORT_TEMPLATE, REPORT_FIELDS
+                    bulk_messages_section(
+                        lambda template: report_queue(None, template, [selected_class], df=df),
+                        REPORT_TEMPLATE,
+                        REPORT_FIELDS,
+                        key="yearly_report_messages",
+                        file_stem=f"yearly_reports_{selected_class}",
+                        query={"classes": [selected_class]}
+                    )
 
 def generate_yearly_report_message(student_name, father_name, class_category, section, monthly_report, total_monthly, annual_charges, admission_fee, total_received):
     """Generate WhatsApp message for yearly report"""
@@ -423,11 +466,9 @@ Section: {section if section and section != 'N/A' else 'N/A'}
 *Monthly Fee Status:*
 """
     
-    for _, row in monthly_report.iterrows():
-        month = row['Month']
-        status = "✅ Paid" if row['Status'] == "Paid" else "❌ Unpaid"
-        amount = f"Rs. {int(row['Monthly Fee']):,}" if row['Monthly Fee'] > 0 else "Rs. 0"
-        message += f"\n{month}: {status} - {amount}"
+    from bulk_messages import monthly_status_lines
+    monthly_fees = monthly_report.set_index("Month")[["Monthly Fee"]].T
+    message += "\n" + monthly_status_lines(monthly_fees).iloc[0]
     
     message += f"""
 
@@ -0,0 +1,100 @@
+# [file name]: routes.py
+# [file content begin]
+# type:ignore
+import importlib
+import subprocess
+import sys
+import time
+
+# Menu label -> (page module, page function, positional arguments)
+# Page modules are only imported the first time their route is rendered, so the
+# login page and parent portal never pay for admin analytics or payment gateways.
+ROUTES = {
+    "Dashboard": ("admin_dashboard", "admin_dashboard", ()),
+    "Enter Fees": ("fees_entry", "fees_entry_page", ()),
+    "View All Records": ("reports", "reports_page", ("View All Records",)),
+    "Paid & Unpaid Students Record": ("reports", "reports_page", ("Paid & Unpaid Students Record",)),
+    "Student Yearly Report": ("reports", "reports_page", ("Student Yearly Report",)),
+    "📢 Fee Reminder": ("reminder", "fee_reminder_page", ()),
+    "Payment Verification": ("payment_verification", "payment_verification_page", ()),
+    "Bank Reconciliation": ("reconciliation", "reconciliation_page", ()),
+    "Batch Fee Slips": ("batch_slips", "batch_slips_page", ()),
+    "Parent Portal": ("parent_portal", "parent_portal_page", ()),
+    "View Records": ("reports", "reports_page", ("View All Records",)),
+}
+
+# Seconds spent on the first import of each page module in this process
+IMPORT_TIMES = {}
+
+def load_module(module_name):
+    """Import a page module on first use and record its import cost"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    IMPORT_TIMES[module_name] = time.perf_counter() - start
+    return module
+
+def get_page(route_name):
+    """Get the page function for a route, importing its module if needed"""
+    route = ROUTES.get(route_name)
+    if route is None:
+        return None
+
+    module_name, function_name, args = route
+    module = load_module(module_name)
+    page_function = getattr(module, function_name)
+
+    if args:
+        return lambda: page_function(*args)
+    return page_function
+
+def render_route(route_name):
+    """Render the page registered for a route"""
+    page = get_page(route_name)
+    if page is None:
+        return False
+
+    page()
+    return True
+
+def import_time_report():
+    """Get import cost of page modules loaded so far in this process"""
+    return [
+        {"module": module_name, "seconds": round(seconds, 4)}
+        for module_name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True)
+    ]
+
+def measure_cold_imports(module_names=None):
+    """Measure the cold import cost of each module in a fresh interpreter"""
+    if module_names is None:
+        module_names = sorted({route[0] for route in ROUTES.values()} | {"main", "auth", "home"})
+
+    probe = (
+        "import time, sys\n"
+        "start = time.perf_counter()\n"
+        "import {module}\n"
+        "print(time.perf_counter() - start)\n"
+    )
+
+    report = []
+    for module_name in module_names:
+        try:
+            result = subprocess.run(
+                [sys.executable, "-c", probe.format(module=module_name)],
+                capture_output=True, text=True, timeout=120
+            )
+            seconds = float(result.stdout.strip().splitlines()[-1])
+            report.append({"module": module_name, "seconds": round(seconds, 4)})
+        except Exception as e:
+            report.append({"module": module_name, "seconds": None, "error": str(e)})
+
+    return sorted(report, key=lambda row: row["seconds"] or 0, reverse=True)
+
+if __name__ == "__main__":
+    print(f"{'Module':<24} {'Cold import (s)':>16}")
+    for row in measure_cold_imports(sys.argv[1:] or None):
+        seconds = f"{row['seconds']:.3f}" if row["seconds"] is not None else row.get("error", "failed")
+        print(f"{row['module']:<24} {seconds:>16}")
+# [file content end]
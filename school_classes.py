@@ -0,0 +1,26 @@
+# [file name]: school_classes.py
+# [file content begin]
+# type:ignore
+"""Class ordering and file naming shared by the batch jobs.
+
+Kept free of Streamlit so command-line tools and their worker processes
+can import it cheaply.
+"""
+import re
+
+CLASS_ORDER = [
+    "Nursery", "KGI", "KGII",
+    "Class 1", "Class 2", "Class 3", "Class 4", "Class 5",
+    "Class 6", "Class 7", "Class 8", "Class 9", "Class 10 (Matric)"
+]
+
+def class_sort_key(class_category):
+    """Sort key putting classes in school order, unknown ones last by name"""
+    if class_category in CLASS_ORDER:
+        return (CLASS_ORDER.index(class_category), "")
+    return (len(CLASS_ORDER), class_category or "")
+
+def safe_name(text, default="file"):
+    """File-system safe version of a class or student name"""
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_") or default
+# [file content end]
@@ -0,0 +1,364 @@
+# [file name]: slip_archive.py
+# [file content begin]
+# type:ignore
+"""Content-addressed store for generated fee slips.
+
+Slips are keyed by a hash of the slip data, so generating the same slip
+again returns the stored image instead of rendering it. Files live in
+sharded folders (slips/ab/cd/<key>.webp) and an append-only index maps
+keys to files and ledger records to slips.
+
+Usage:
+    python slip_archive.py stats
+    python slip_archive.py compact --days 365 --max-mb 500
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from file_lock import get_file_lock
+from slip_generator import (
+    SLIP_FORMATS, SLIP_MIME_TYPES, generate_fee_slip_bytes, slip_file_name
+)
+
+ARCHIVE_DIR = "slips"
+INDEX_FILE = "index.jsonl"
+
+# Bump when the slip layout changes so old images aren't served for new slips
+LAYOUT_VERSION = 1
+
+# Compaction defaults: unused slips are removed after this long
+DEFAULT_RETENTION_DAYS = 365
+
+# Ledger columns that identify one fee record
+RECORD_KEY_COLUMNS = ("ID", "Academic Year", "Month", "Entry Timestamp")
+
+def ledger_record_key(record):
+    """Key for a ledger row (dict or pandas row)"""
+    return "|".join(str(record.get(column, "")) for column in RECORD_KEY_COLUMNS)
+
+def slip_key(slip_data, school_name, formats=SLIP_FORMATS):
+    """Content hash of everything that decides how a slip looks"""
+    payload = json.dumps(
+        {"layout": LAYOUT_VERSION, "school": school_name, "formats": list(formats), "slip": slip_data},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+class SlipArchive:
+    """Sharded slip files plus an append-only index with in-memory lookups.
+
+    Index events: {"op": "put", "key", "file", "format", "size", "slip_data",
+    "created_at"} and {"op": "link", "records": [...], "key"}. A slip file's
+    mtime records when it was last served, which is what retention goes by.
+
+    write_lock (<index>.lock) is held by every write, in this process and in
+    the compaction job, so compact never rewrites the index or deletes a file
+    while a slip is half stored.
+    """
+
+    def __init__(self, directory=ARCHIVE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._lock = threading.RLock()
+        self.write_lock = get_file_lock(f"{self.index_path}.lock")
+        self._reset()
+
+    def _reset(self):
+        self._offset = 0
+        self._file_id = None
+        self.slips = {}
+        self.by_record = {}
+
+    def _apply(self, event):
+        op = event.get("op")
+        if op == "put":
+            self.slips[event["key"]] = event
+        elif op == "link":
+            for record in event.get("records", []):
+                self.by_record[record] = event["key"]
+
+    def refresh(self):
+        """Read index events appended since the last refresh"""
+        with self._lock:
+            try:
+                stat = os.stat(self.index_path)
+            except OSError:
+                self._reset()
+                return
+
+            # Rewritten by compaction: start over
+            file_id = (stat.st_dev, stat.st_ino)
+            if file_id != self._file_id or stat.st_size < self._offset:
+                self._reset()
+                self._file_id = file_id
+
+            if stat.st_size == self._offset:
+                return
+
+            with open(self.index_path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read()
+
+            complete = data.rfind(b'\n') + 1
+            for line in data[:complete].splitlines():
+                if not line.strip():
+                    continue
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:
+                    print(f"Skipping bad slip index line at offset {self._offset}")
+            self._offset += complete
+
+    def _append(self, events):
+        lines = "".join(json.dumps(event, default=str) + "\n" for event in events)
+        with self.write_lock, self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self.refresh()
+            with open(self.index_path, 'a') as f:
+                f.write(lines)
+            self.refresh()
+
+    def path_for(self, key, image_format):
+        """Sharded location of a slip file"""
+        return os.path.join(self.directory, key[:2], key[2:4], f"{key}.{image_format.lower()}")
+
+    def _read(self, key):
+        """Stored bytes for a key, or None if the slip or its file is gone"""
+        entry = self.slips.get(key)
+        if not entry:
+            return None
+        path = os.path.join(self.directory, entry["file"])
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # mark as recently used for retention
+            return entry, data, path
+        except OSError:
+            return None
+
+    def _slip(self, key, entry, data, path):
+        return {
+            "slip_id": key,
+            "data": data,
+            "format": entry["format"],
+            "mime": SLIP_MIME_TYPES[entry["format"]],
+            "file_name": slip_file_name(entry["slip_data"], entry["format"]),
+            "path": path
+        }
+
+    def get(self, slip_data, school_name, formats=SLIP_FORMATS):
+        """Stored slip for this slip data, or None"""
+        key = slip_key(slip_data, school_name, formats)
+        self.refresh()
+        found = self._read(key)
+        return self._slip(key, *found) if found else None
+
+    def put(self, key, slip_data, slip, records=None):
+        """Write a rendered slip and index it (and the ledger records it covers)"""
+        path = self.path_for(key, slip["format"])
+        events = [{
+            "op": "put",
+            "key": key,
+            "file": os.path.relpath(path, self.directory),
+            "format": slip["format"],
+            "size": len(slip["data"]),
+            "slip_data": slip_data,
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }]
+        if records:
+            events.append({"op": "link", "records": [ledger_record_key(r) for r in records], "key": key})
+
+        # Held from the file write to the index append, so compact can't
+        # take the new file for a stray one and delete it in between
+        with self.write_lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(slip["data"])
+            os.replace(temp_path, path)
+            self._append(events)
+        return path
+
+    def link(self, key, records):
+        """Point ledger records at an already stored slip"""
+        if records:
+            self._append([{"op": "link", "records": [ledger_record_key(r) for r in records], "key": key}])
+
+    def get_or_create(self, slip_data, records=None, formats=SLIP_FORMATS, background=False):
+        """Return the stored slip for this data, rendering and storing it only if needed.
+
+        With background=True a new slip is returned as soon as it is rendered
+        and written to the archive on a worker thread ("path" is None then).
+        """
+        from database import load_school_config
+
+        school_name = load_school_config().get("school_name", "Your School Name")
+        key = slip_key(slip_data, school_name, formats)
+        self.refresh()
+
+        found = self._read(key)
+        if found:
+            if records:
+                submit = _archive_executor.submit if background else (lambda fn, *args: fn(*args))
+                submit(self.link, key, records)
+            return self._slip(key, *found)
+
+        slip = dict(generate_fee_slip_bytes(slip_data, formats), slip_id=key)
+        if background:
+            _archive_executor.submit(self._put_quietly, key, slip_data, slip, records)
+            slip["path"] = None
+        else:
+            slip["path"] = self.put(key, slip_data, slip, records)
+        return slip
+
+    def _put_quietly(self, key, slip_data, slip, records):
+        try:
+            return self.put(key, slip_data, slip, records)
+        except Exception as e:
+            print(f"Error archiving slip {key}: {str(e)}")
+            return None
+
+    def for_record(self, record):
+        """Slip for a ledger record, re-rendered from its saved data if the file was removed"""
+        self.refresh()
+        key = self.by_record.get(ledger_record_key(record))
+        if not key or key not in self.slips:
+            return None
+        found = self._read(key)
+        if found:
+            return self._slip(key, *found)
+
+        entry = self.slips[key]
+        slip = dict(generate_fee_slip_bytes(entry["slip_data"], (entry["format"],)), slip_id=key)
+        slip["path"] = self.put(key, entry["slip_data"], slip)
+        return slip
+
+    def stats(self):
+        """Indexed slips, how many are stored on disk and their size"""
+        self.refresh()
+        stored = [
+            entry for entry in self.slips.values()
+            if os.path.exists(os.path.join(self.directory, entry["file"]))
+        ]
+        return {
+            "slips": len(self.slips),
+            "stored": len(stored),
+            "linked_records": len(self.by_record),
+            "bytes": sum(entry.get("size", 0) for entry in stored)
+        }
+
+    def compact(self, retention_days=DEFAULT_RETENTION_DAYS, max_bytes=None, now=None):
+        """Apply retention and rewrite the index without dead entries.
+
+        Removes slip files unused for retention_days, then the least recently
+        used ones until the archive fits in max_bytes. Stray files (partial
+        writes, files missing from the index) and pre-archive timestamped
+        slips past retention are deleted too. Removed slips that belong to
+        ledger records stay indexed and are re-rendered on request.
+        Returns counts of what was removed.
+        """
+        now = now or time.time()
+        cutoff = now - retention_days * 86400
+        removed = {"expired": 0, "over_size": 0, "stray": 0, "legacy": 0, "bytes_freed": 0}
+
+        with self.write_lock, self._lock:
+            self.refresh()
+
+            # Last use of each stored slip (missing files count as already gone)
+            live = []
+            for key, entry in self.slips.items():
+                path = os.path.join(self.directory, entry["file"])
+                try:
+                    stat = os.stat(path)
+                    live.append((stat.st_mtime, key, path, stat.st_size))
+                except OSError:
+                    pass
+            live.sort()
+
+            total = sum(size for _, _, _, size in live)
+            keep = set()
+            for last_used, key, path, size in live:
+                if last_used < cutoff:
+                    reason = "expired"
+                elif max_bytes is not None and total > max_bytes:
+                    reason = "over_size"
+                else:
+                    keep.add(key)
+                    continue
+                os.remove(path)
+                total -= size
+                removed[reason] += 1
+                removed["bytes_freed"] += size
+
+            # Files on disk that the index doesn't know about
+            kept_files = {os.path.normpath(os.path.join(self.directory, self.slips[key]["file"])) for key in keep}
+            for root, dirs, files in os.walk(self.directory, topdown=False):
+                for name in files:
+                    path = os.path.normpath(os.path.join(root, name))
+                    if root == self.directory:
+                        # Timestamped slips written before the archive existed
+                        if name.startswith("fee_slip_") and os.path.getmtime(path) < cutoff:
+                            removed["bytes_freed"] += os.path.getsize(path)
+                            os.remove(path)
+                            removed["legacy"] += 1
+                        continue
+                    if path not in kept_files:
+                        removed["bytes_freed"] += os.path.getsize(path)
+                        os.remove(path)
+                        removed["stray"] += 1
+                if root != self.directory and not os.listdir(root):
+                    os.rmdir(root)
+
+            # Rewrite the index: one put per slip still stored or linked to a
+            # ledger record (its data is kept for re-rendering), one link per slip
+            records_by_key = {}
+            for record, key in self.by_record.items():
+                records_by_key.setdefault(key, []).append(record)
+            events = [self.slips[key] for key in self.slips if key in keep or key in records_by_key]
+            events += [{"op": "link", "records": records, "key": key} for key, records in records_by_key.items()]
+
+            temp_path = f"{self.index_path}.tmp"
+            with open(temp_path, 'w') as f:
+                for event in events:
+                    f.write(json.dumps(event, default=str) + "\n")
+            os.replace(temp_path, self.index_path)
+            self.refresh()
+
+        return removed
+
+# Background writer for archived slips
+_archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slip-archive")
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+def get_slip_archive(directory=ARCHIVE_DIR):
+    """Get the shared archive for a folder (one per process and path)"""
+    key = os.path.abspath(directory)
+    with _archives_lock:
+        if key not in _archives:
+            _archives[key] = SlipArchive(directory)
+        return _archives[key]
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the fee slip archive")
+    parser.add_argument("command", choices=["stats", "compact"])
+    parser.add_argument("--dir", default=ARCHIVE_DIR, help="Archive folder")
+    parser.add_argument("--days", type=int, default=DEFAULT_RETENTION_DAYS, help="Remove slips unused for this many days")
+    parser.add_argument("--max-mb", type=float, help="Then remove least recently used slips until the archive fits")
+    args = parser.parse_args()
+
+    archive = get_slip_archive(args.dir)
+    if args.command == "compact":
+        max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb else None
+        print(archive.compact(args.days, max_bytes))
+    print(archive.stats())
+
+if __name__ == "__main__":
+    main()
+# [file content end]
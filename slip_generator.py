@@ -6,7 +6,12 @@ from datetime import datetime
 import webbrowser
 from urllib.parse import quote
 import base64
+import hashlib
+import io
+from functools import lru_cache
+from PIL import features
 from database import load_school_config
+from assets import image_src
 
 def display_menu_bar():
     """Display menu bar with school name and logo"""
@@ -16,14 +21,13 @@ def display_menu_bar():
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col1:
-        try:
-            with open("school-pic.png", "rb") as img_file:
-                img_base64 = base64.b64encode(img_file.read()).decode('utf-8')
+        logo_src = image_src("school-pic.png", width=120)
+        if logo_src:
             st.markdown(
-                f'<img src="data:image/png;base64,{img_base64}" alt="School Logo" style="width: 60px; height: 60px; border-radius: 50%; object-fit: cover;">',
+                f'<img src="{logo_src}" alt="School Logo" style="width: 60px; height: 60px; border-radius: 50%; object-fit: cover;">',
                 unsafe_allow_html=True
             )
-        except:
+        else:
             st.markdown("🏫")
     
     with col2:
@@ -39,55 +43,81 @@ def display_menu_bar():
     
     st.markdown("---")
 
-def generate_fee_slip(slip_data):
-    """Generate a fee slip as PNG image with only the fees being paid"""
-    
-    school_config = load_school_config()
-    school_name = school_config.get("school_name", "Your School Name")
-    
-    # Create image
-    width, height = 600, 900
-    image = Image.new('RGB', (width, height), 'white')
-    draw = ImageDraw.Draw(image)
-    
-    # Load fonts (using default fonts)
+SLIP_WIDTH, SLIP_HEIGHT = 600, 900
+SLIP_TITLE = "FEE PAYMENT SLIP"
+FEE_DETAILS_Y = 270
+PAYMENT_BLOCK_HEIGHT = 230
+
+# Encodings tried for in-memory slips; the smallest result is kept
+SLIP_FORMATS = ("WEBP", "PNG")
+SLIP_MIME_TYPES = {"WEBP": "image/webp", "PNG": "image/png"}
+
+_template_cache = {}
+
+def school_config_version():
+    """Get (mtime, size) for school_config.json, or None if it doesn't exist"""
+    try:
+        stat = os.stat("school_config.json")
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+@lru_cache(maxsize=1)
+def _slip_fonts():
+    """Load the slip fonts once: (title, header, normal, small)"""
     try:
-        title_font = ImageFont.truetype("arial.ttf", 28)
-        header_font = ImageFont.truetype("arial.ttf", 20)
-        normal_font = ImageFont.truetype("arial.ttf", 16)
-        small_font = ImageFont.truetype("arial.ttf", 14)
+        return (
+            ImageFont.truetype("arial.ttf", 28),
+            ImageFont.truetype("arial.ttf", 20),
+            ImageFont.truetype("arial.ttf", 16),
+            ImageFont.truetype("arial.ttf", 14)
+        )
     except:
         # Fallback to default fonts
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        normal_font = ImageFont.load_default()
-        small_font = ImageFont.load_default()
-    
+        default_font = ImageFont.load_default()
+        return (default_font, default_font, default_font, default_font)
+
+def _build_slip_template(school_name, title=SLIP_TITLE):
+    """Draw the parts of a slip that are the same for every payment.
+
+    Returns (page, payment_block): the page with the school header and fee
+    details bar, and the payment information box with the footer, which is
+    pasted below the fee lines.
+    """
+    title_font, header_font, normal_font, small_font = _slip_fonts()
+    width = SLIP_WIDTH
+
+    page = Image.new('RGB', (width, SLIP_HEIGHT), 'white')
+    draw = ImageDraw.Draw(page)
     draw.rectangle([0, 0, width, 80], fill='#2c3e50')
     draw.text((width//2, 30), school_name.upper(), fill='white', font=title_font, anchor="mm")
-    draw.text((width//2, 60), "FEE PAYMENT SLIP", fill='white', font=header_font, anchor="mm")
-    
-    y_position = 100
-    
-    # Student information
-    draw.text((50, y_position), f"Student Name: {slip_data['student_name']}", fill='black', font=normal_font)
-    y_position += 30
-    draw.text((50, y_position), f"Phone: {slip_data.get('student_phone', 'N/A')}", fill='black', font=normal_font)
-    y_position += 30
-    draw.text((50, y_position), f"Class: {slip_data['class_category']} {slip_data['class_section']}", fill='black', font=normal_font)
-    y_position += 30
-    draw.text((50, y_position), f"Payment Date: {slip_data['payment_date']}", fill='black', font=normal_font)
-    y_position += 30
-    draw.text((50, y_position), f"Academic Year: {slip_data['academic_year']}", fill='black', font=normal_font)
-    
-    y_position += 50
-    
-    # Fee details header
-    draw.rectangle([50, y_position, width-50, y_position+40], fill='#3498db', outline='#3498db')
-    draw.text((width//2, y_position+20), "FEE DETAILS", fill='white', font=header_font, anchor="mm")
-    
-    y_position += 60
-    
+    draw.text((width//2, 60), title, fill='white', font=header_font, anchor="mm")
+
+    draw.rectangle([50, FEE_DETAILS_Y, width-50, FEE_DETAILS_Y+40], fill='#3498db', outline='#3498db')
+    draw.text((width//2, FEE_DETAILS_Y+20), "FEE DETAILS", fill='white', font=header_font, anchor="mm")
+
+    # Payment information box and footer, relative to the top of the box
+    payment_block = Image.new('RGB', (width, PAYMENT_BLOCK_HEIGHT), 'white')
+    draw = ImageDraw.Draw(payment_block)
+    draw.rectangle([50, 0, width-50, 120], fill='#f8f9fa', outline='#ddd')
+    draw.text((width//2, 20), "PAYMENT INFORMATION", fill='#2c3e50', font=header_font, anchor="mm")
+    draw.text((width//2, 180), "Thank you for your payment!", fill='#7f8c8d', font=small_font, anchor="mm")
+    draw.text((width//2, 205), "Generated by School Fees Management System", fill='#7f8c8d', font=small_font, anchor="mm")
+
+    return page, payment_block
+
+def get_slip_template(title=SLIP_TITLE):
+    """Get the slip template for the current school config, building it once per config version and title"""
+    key = (school_config_version(), title)
+    if key not in _template_cache:
+        school_config = load_school_config()
+        for stale in [k for k in _template_cache if k[0] != key[0]]:
+            del _template_cache[stale]
+        _template_cache[key] = _build_slip_template(school_config.get("school_name", "Your School Name"), title)
+    return _template_cache[key]
+
+def slip_fee_lines(slip_data):
+    """Get the (fee name, amount) lines being paid and their total"""
     fees_to_show = []
     total_amount = 0
     
@@ -107,6 +137,38 @@ def generate_fee_slip(slip_data):
     if slip_data.get('pay_admission', False) and slip_data['admission_fee'] > 0:
         fees_to_show.append(("Admission Fee", slip_data['admission_fee']))
         total_amount += slip_data['admission_fee']
+
+    return fees_to_show, total_amount
+
+def render_fee_slip(slip_data):
+    """Render a fee slip image with only the fees being paid.
+
+    Starts from a copy of the cached template and draws just the student,
+    fee and payment fields.
+    """
+    page, payment_block = get_slip_template(slip_data.get('slip_title', SLIP_TITLE))
+    _, header_font, normal_font, _ = _slip_fonts()
+    width = SLIP_WIDTH
+
+    image = page.copy()
+    draw = ImageDraw.Draw(image)
+    
+    y_position = 100
+    
+    # Student information
+    draw.text((50, y_position), f"Student Name: {slip_data['student_name']}", fill='black', font=normal_font)
+    y_position += 30
+    draw.text((50, y_position), f"Phone: {slip_data.get('student_phone', 'N/A')}", fill='black', font=normal_font)
+    y_position += 30
+    draw.text((50, y_position), f"Class: {slip_data['class_category']} {slip_data['class_section']}", fill='black', font=normal_font)
+    y_position += 30
+    draw.text((50, y_position), f"Payment Date: {slip_data['payment_date']}", fill='black', font=normal_font)
+    y_position += 30
+    draw.text((50, y_position), f"Academic Year: {slip_data['academic_year']}", fill='black', font=normal_font)
+    
+    y_position = FEE_DETAILS_Y + 60
+    
+    fees_to_show, total_amount = slip_fee_lines(slip_data)
     
     # Display all fees that are being paid
     if fees_to_show:
@@ -129,36 +191,69 @@ def generate_fee_slip(slip_data):
     
     y_position += 50
     
-    # Payment information
-    draw.rectangle([50, y_position, width-50, y_position+120], fill='#f8f9fa', outline='#ddd')
-    
-    y_position += 20
-    draw.text((width//2, y_position), "PAYMENT INFORMATION", fill='#2c3e50', font=header_font, anchor="mm")
-    y_position += 40
+    # Payment information box and footer from the template
+    image.paste(payment_block, (0, y_position))
     
+    y_position += 60
     draw.text((80, y_position), f"Payment Method: {slip_data['payment_method']}", fill='black', font=normal_font)
     y_position += 30
-    draw.text((80, y_position), f"Amount Received: Rs. {total_amount:,}", fill='black', font=normal_font)
+    draw.text((80, y_position), f"{slip_data.get('amount_label', 'Amount Received')}: Rs. {total_amount:,}", fill='black', font=normal_font)
     y_position += 30
     draw.text((80, y_position), f"Received By: {slip_data['signature']}", fill='black', font=normal_font)
-    
-    y_position += 60
-    
-    # Footer
-    draw.text((width//2, y_position), "Thank you for your payment!", fill='#7f8c8d', font=small_font, anchor="mm")
-    y_position += 25
-    draw.text((width//2, y_position), "Generated by School Fees Management System", fill='#7f8c8d', font=small_font, anchor="mm")
-    
-    # Save image
+
+    return image
+
+def encode_slip(image, formats=SLIP_FORMATS):
+    """Encode a slip image losslessly in each format and keep the smallest.
+
+    Returns (data, format). WebP is skipped if Pillow was built without it.
+    """
+    best = None
+    for image_format in formats:
+        if image_format == "WEBP" and not features.check("webp"):
+            continue
+        buffer = io.BytesIO()
+        if image_format == "WEBP":
+            image.save(buffer, format="WEBP", lossless=True, method=2)
+        else:
+            image.save(buffer, format=image_format)
+        if best is None or buffer.tell() < len(best[0]):
+            best = (buffer.getvalue(), image_format)
+    return best
+
+def slip_file_name(slip_data, image_format="PNG"):
+    """File name for a slip download or archive copy"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"fee_slip_{slip_data['student_name'].replace(' ', '_')}_{timestamp}.png"
-    filepath = os.path.join("slips", filename)
-    
-    # Create slips directory if it doesn't exist
-    os.makedirs("slips", exist_ok=True)
-    
-    image.save(filepath)
-    return filepath
+    return f"fee_slip_{slip_data['student_name'].replace(' ', '_')}_{timestamp}.{image_format.lower()}"
+
+def generate_fee_slip_bytes(slip_data, formats=SLIP_FORMATS):
+    """Generate a fee slip in memory.
+
+    Returns {"slip_id", "data", "format", "mime", "file_name"}; slip_id is a
+    hash of the encoded image.
+    """
+    data, image_format = encode_slip(render_fee_slip(slip_data), formats)
+    return {
+        "slip_id": hashlib.sha256(data).hexdigest()[:16],
+        "data": data,
+        "format": image_format,
+        "mime": SLIP_MIME_TYPES[image_format],
+        "file_name": slip_file_name(slip_data, image_format)
+    }
+
+def slip_archiving_enabled():
+    """Whether the school keeps a copy of every slip in the slips folder"""
+    return load_school_config().get("archive_slips", True)
+
+def generate_fee_slip(slip_data):
+    """Generate a fee slip as PNG image with only the fees being paid.
+
+    The image is stored in the slip archive, so an identical slip is only
+    rendered once; returns its path.
+    """
+    from slip_archive import get_slip_archive
+
+    return get_slip_archive().get_or_create(slip_data, formats=("PNG",))["path"]
 
 def share_slip_via_whatsapp(image_path, student_name, class_category):
     """Share slip via WhatsApp with proper implementation"""
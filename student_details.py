@@ -8,7 +8,7 @@ from database import (
     load_school_config
 )
 from utils import format_currency
-import base64
+from assets import image_src
 
 def display_menu_bar():
     """Display menu bar with school name and logo"""
@@ -18,14 +18,13 @@ def display_menu_bar():
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col1:
-        try:
-            with open("school-pic.png", "rb") as img_file:
-                img_base64 = base64.b64encode(img_file.read()).decode('utf-8')
+        logo_src = image_src("school-pic.png", width=120)
+        if logo_src:
             st.markdown(
-                f'<img src="data:image/png;base64,{img_base64}" alt="School Logo" style="width: 60px; height: 60px; border-radius: 50%; object-fit: cover;">',
+                f'<img src="{logo_src}" alt="School Logo" style="width: 60px; height: 60px; border-radius: 50%; object-fit: cover;">',
                 unsafe_allow_html=True
             )
-        except:
+        else:
             st.markdown("🏫")
     
     with col2:
@@ -300,12 +299,15 @@ def view_students_section():
     st.dataframe(df, use_container_width=True)
     
     # Download option
-    csv = df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="Download Students as CSV",
-        data=csv,
-        file_name=f"students_{datetime.now().strftime('%Y%m%d')}.csv",
-        mime="text/csv"
+    from exports import download_export, data_version
+    download_export(
+        "Download Students",
+        "students",
+        lambda: df,
+        f"students_{datetime.now().strftime('%Y%m%d')}",
+        query={"search": search_term},
+        version=data_version("student_details.json"),
+        key="students_export"
     )
 
 def classwise_fee_details_section(CLASS_CATEGORIES):
@@ -387,12 +389,15 @@ def classwise_fee_details_section(CLASS_CATEGORIES):
         col4.metric("Total Received", format_currency(total_received_class))
         
         # Download class report
-        csv = summary_df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            label=f"Download {selected_class} Report",
-            data=csv,
-            file_name=f"{selected_class}_report_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
+        from exports import download_export, data_version
+        download_export(
+            f"Download {selected_class} Report",
+            "class_report",
+            lambda: summary_df,
+            f"{selected_class}_report_{datetime.now().strftime('%Y%m%d')}",
+            query={"class": selected_class},
+            version=data_version("fees_data.csv", "student_details.json"),
+            key="class_report_export"
         )
 
 def class_wise_fee_details():
@@ -0,0 +1,353 @@
+# [file name]: synthetic_data.py
+# [file content begin]
+# type:ignore
+"""Deterministic synthetic school dataset for load testing and benchmarks.
+
+Usage: python synthetic_data.py TARGET_DIR --students 5000 --years 2 [--seed 42]
+"""
+import argparse
+import csv
+import json
+import os
+import random
+from datetime import date, datetime, timedelta
+from hashlib import sha256
+from database import generate_student_id, LEDGER_COLUMNS
+from payment_store import PaymentStore, PAYMENTS_LOG
+
+CLASS_CATEGORIES = [
+    "Nursery", "KGI", "KGII",
+    "Class 1", "Class 2", "Class 3", "Class 4", "Class 5",
+    "Class 6", "Class 7", "Class 8", "Class 9", "Class 10 (Matric)"
+]
+
+MONTHS = [
+    "APRIL", "MAY", "JUNE", "JULY", "AUGUST", "SEPTEMBER",
+    "OCTOBER", "NOVEMBER", "DECEMBER", "JANUARY", "FEBRUARY", "MARCH"
+]
+
+PAYMENT_METHODS = ["Cash", "Bank Transfer", "Cheque", "Online Payment", "Other"]
+PAYMENT_METHOD_WEIGHTS = [60, 20, 8, 10, 2]
+
+FIRST_NAMES = [
+    "Ali", "Ahmed", "Hassan", "Hussain", "Usman", "Bilal", "Hamza", "Zain", "Saad", "Umar",
+    "Ayesha", "Fatima", "Zainab", "Maryam", "Hira", "Sana", "Iqra", "Amna", "Noor", "Khadija",
+    "Abdullah", "Ibrahim", "Yusuf", "Imran", "Fahad", "Rabia", "Mahnoor", "Eman", "Anaya", "Laiba"
+]
+FATHER_NAMES = [
+    "Muhammad", "Abdul", "Tariq", "Khalid", "Javed", "Naveed", "Shahid", "Asif", "Rashid", "Sajid",
+    "Imtiaz", "Waqar", "Nadeem", "Farooq", "Aslam", "Akram", "Zahid", "Kamran", "Irfan", "Pervaiz"
+]
+LAST_NAMES = [
+    "Khan", "Ahmed", "Malik", "Butt", "Sheikh", "Chaudhry", "Qureshi", "Siddiqui", "Raza", "Iqbal",
+    "Hussain", "Mirza", "Abbasi", "Awan", "Bhatti", "Rana", "Gill", "Javed", "Aziz", "Baig"
+]
+AREAS = [
+    "Gulshan-e-Iqbal", "Model Town", "Johar Town", "Saddar", "Cantt", "Satellite Town",
+    "Garden Town", "Defence", "Faisal Town", "Iqbal Town"
+]
+
+# Monthly fee by class, annual charges and admission fee defaults
+CLASS_MONTHLY_FEES = {
+    "Nursery": 2500, "KGI": 2500, "KGII": 2500,
+    "Class 1": 3000, "Class 2": 3000, "Class 3": 3000, "Class 4": 3000, "Class 5": 3500,
+    "Class 6": 3500, "Class 7": 3500, "Class 8": 4000, "Class 9": 4500, "Class 10 (Matric)": 5000
+}
+ANNUAL_CHARGES = 3500
+ADMISSION_FEE = 10000
+
+# Share of each month's fee a payer profile actually pays (chance per month)
+PAYER_PROFILES = [(0.98, 50), (0.9, 30), (0.7, 15), (0.4, 5)]
+
+DEFAULT_AS_OF = date(2025, 10, 15)
+PARENT_PASSWORD = "parent123"
+
+def academic_year_start(day):
+    """First calendar year of the academic year a date falls in"""
+    return day.year if day.month >= 4 else day.year - 1
+
+def month_start(start_year, month_index):
+    """First day of an academic month"""
+    calendar_month = (month_index + 3) % 12 + 1
+    year = start_year if month_index < 9 else start_year + 1
+    return date(year, calendar_month, 1)
+
+def _families(rng, students):
+    """Group students into families of one to three children"""
+    families = []
+    remaining = students
+    family_no = 0
+    while remaining > 0:
+        size = min(remaining, rng.choices([1, 2, 3], weights=[55, 35, 10])[0])
+        father = f"{rng.choice(FATHER_NAMES)} {rng.choice(LAST_NAMES)}"
+        family_no += 1
+        families.append({
+            "father_name": father,
+            "last_name": father.split()[-1],
+            "phone": f"03{rng.randint(0, 49):02d}{rng.randint(1000000, 9999999)}",
+            "address": f"House {rng.randint(1, 999)}, {rng.choice(AREAS)}",
+            "email": f"{father.lower().replace(' ', '.')}{family_no}@example.com",
+            "children": size
+        })
+        remaining -= size
+    return families
+
+def _students(rng, families, years, as_of):
+    """Build student records with unique IDs"""
+    students = []
+    used_ids = set()
+    current_start = academic_year_start(as_of)
+
+    for family in families:
+        family["student_ids"] = []
+        for _ in range(family["children"]):
+            class_category = rng.choice(CLASS_CATEGORIES)
+            while True:
+                name = f"{rng.choice(FIRST_NAMES)} {family['last_name']} {rng.randint(1, 99999)}"
+                student_id = generate_student_id(name, class_category)
+                if student_id not in used_ids:
+                    break
+            used_ids.add(student_id)
+
+            # Most students were enrolled before the first generated year
+            joined_start = current_start - rng.choices(
+                [years, max(years - 1, 0), 0], weights=[70, 20, 10]
+            )[0]
+
+            monthly_fee = CLASS_MONTHLY_FEES[class_category]
+            custom_fee = rng.random() < 0.2
+            if custom_fee:
+                monthly_fee = int(monthly_fee * rng.choice([0.5, 0.75, 0.9]))
+
+            students.append({
+                "id": student_id,
+                "name": name,
+                "father_name": family["father_name"],
+                "phone": family["phone"],
+                "address": family["address"],
+                "class_category": class_category,
+                "class_section": rng.choice(["A", "A", "B", "C"]),
+                "age": 3 + CLASS_CATEGORIES.index(class_category) + rng.randint(0, 1),
+                "monthly_fee": monthly_fee,
+                "custom_fee": custom_fee,
+                "reliability": rng.choices(
+                    [p for p, _ in PAYER_PROFILES], weights=[w for _, w in PAYER_PROFILES]
+                )[0],
+                "joined_start": joined_start,
+                "email": family["email"]
+            })
+            family["student_ids"].append(student_id)
+    return students
+
+def _ledger_rows(rng, student, years, as_of):
+    """Fee records for one student across the generated academic years"""
+    rows = []
+    current_start = academic_year_start(as_of)
+
+    def record(month, monthly, annual, admission, received, paid_on):
+        entered = datetime.combine(paid_on, datetime.min.time()) + timedelta(
+            hours=rng.randint(8, 15), minutes=rng.randint(0, 59), seconds=rng.randint(0, 59)
+        )
+        return {
+            "ID": student["id"],
+            "Student Name": student["name"],
+            "Father Name": student["father_name"],
+            "Student Phone": student["phone"],
+            "Class Category": student["class_category"],
+            "Class Section": student["class_section"],
+            "Address": student["address"],
+            "Age": student["age"],
+            "Month": month,
+            "Monthly Fee": monthly,
+            "Annual Charges": annual,
+            "Admission Fee": admission,
+            "Received Amount": received,
+            "Payment Method": rng.choices(PAYMENT_METHODS, weights=PAYMENT_METHOD_WEIGHTS)[0],
+            "Date": paid_on.strftime("%Y-%m-%d"),
+            "Signature": rng.choice(["Admin", "Accounts", "Office"]),
+            "Entry Timestamp": entered.strftime("%Y-%m-%d %H:%M:%S"),
+            "Academic Year": f"{year_start}-{year_start + 1}"
+        }
+
+    for year_start in range(current_start - years + 1, current_start + 1):
+        if year_start < student["joined_start"]:
+            continue
+
+        first_day = month_start(year_start, 0)
+        if year_start == student["joined_start"] and rng.random() < 0.9:
+            paid_on = first_day + timedelta(days=rng.randint(0, 10))
+            rows.append(record("ADMISSION", 0, 0, ADMISSION_FEE, ADMISSION_FEE, paid_on))
+
+        if rng.random() < 0.85:
+            paid_on = first_day + timedelta(days=rng.randint(0, 40))
+            if paid_on <= as_of:
+                rows.append(record("ANNUAL", 0, ANNUAL_CHARGES, 0, ANNUAL_CHARGES, paid_on))
+
+        for month_index, month in enumerate(MONTHS):
+            due = month_start(year_start, month_index)
+            if due > as_of or rng.random() > student["reliability"]:
+                continue
+
+            paid_on = due + timedelta(days=rng.choices(
+                [rng.randint(0, 9), rng.randint(10, 27), rng.randint(28, 60)], weights=[70, 25, 5]
+            )[0])
+            if paid_on > as_of:
+                continue
+
+            received = student["monthly_fee"]
+            if rng.random() < 0.05:
+                received = int(received * rng.choice([0.5, 0.75]))
+            rows.append(record(month, student["monthly_fee"], 0, 0, received, paid_on))
+
+    return rows
+
+def _parent_payments(rng, students, as_of, share=0.1):
+    """Parent portal / gateway payment requests for a share of students"""
+    payments = []
+
+    for student in students:
+        if rng.random() > share:
+            continue
+
+        for _ in range(rng.randint(1, 4)):
+            paid_at = datetime.combine(as_of, datetime.min.time()) - timedelta(
+                days=rng.randint(0, 180), minutes=rng.randint(0, 1440)
+            )
+            created_at = paid_at.strftime("%Y-%m-%d %H:%M:%S")
+            payments.append({
+                "payment_id": f"PAY_{paid_at.strftime('%Y%m%d%H%M%S')}_{len(payments):06d}",
+                "student_id": student["id"],
+                "student_name": student["name"],
+                "parent_email": student["email"],
+                "amount": student["monthly_fee"] * rng.randint(1, 3),
+                "payment_type": "Monthly Fee",
+                "payment_method": rng.choice(["JazzCash", "EasyPaisa", "Bank Transfer"]),
+                "transaction_id": f"TXN{rng.randint(10 ** 9, 10 ** 10 - 1)}",
+                "status": rng.choices(
+                    ["pending_verification", "verified", "rejected"], weights=[20, 75, 5]
+                )[0],
+                "notes": "",
+                "source": "parent_portal",
+                "ledger_recorded": False,
+                "created_at": created_at,
+                "updated_at": created_at
+            })
+
+    payments.sort(key=lambda payment: payment["created_at"])
+    return payments
+
+def _write_json(path, data):
+    """Write a JSON data file"""
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=4)
+
+def generate_dataset(target_dir, students=500, years=1, seed=42, as_of=None):
+    """Write a complete synthetic data directory and return a summary of it.
+
+    The same (students, years, seed, as_of) always produces byte-identical files.
+    """
+    as_of = as_of or DEFAULT_AS_OF
+    rng = random.Random(f"{seed}:{students}:{years}")
+
+    os.makedirs(os.path.join(target_dir, "data"), exist_ok=True)
+
+    families = _families(rng, students)
+    student_rows = _students(rng, families, years, as_of)
+
+    ledger = []
+    for student in student_rows:
+        ledger.extend(_ledger_rows(rng, student, years, as_of))
+    # Rows are appended to fees_data.csv as payments are entered
+    ledger.sort(key=lambda row: row["Entry Timestamp"])
+
+    with open(os.path.join(target_dir, "fees_data.csv"), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LEDGER_COLUMNS)
+        writer.writeheader()
+        writer.writerows(ledger)
+
+    created_at = as_of.strftime("%Y-%m-%d %H:%M:%S")
+    _write_json(os.path.join(target_dir, "student_details.json"), {
+        student["id"]: {
+            "student_name": student["name"],
+            "father_name": student["father_name"],
+            "class_category": student["class_category"],
+            "address": student["address"],
+            "phone": student["phone"],
+            "age": student["age"],
+            "created_at": created_at
+        }
+        for student in student_rows
+    })
+
+    _write_json(os.path.join(target_dir, "student_fees.json"), {
+        student["id"]: {
+            "student_name": student["name"],
+            "class_category": student["class_category"],
+            "monthly_fee": student["monthly_fee"],
+            "annual_charges": ANNUAL_CHARGES,
+            "admission_fee": ADMISSION_FEE,
+            "last_updated": created_at
+        }
+        for student in student_rows if student["custom_fee"]
+    })
+
+    _write_json(os.path.join(target_dir, "default_fees.json"), {
+        "monthly_fee": 3000,
+        "annual_charges": ANNUAL_CHARGES,
+        "admission_fee": ADMISSION_FEE,
+        "last_updated": created_at
+    })
+
+    _write_json(os.path.join(target_dir, "school_config.json"), {
+        "school_name": "Synthetic Public School",
+        "school_logo": None,
+        "last_updated": created_at
+    })
+
+    password = sha256(PARENT_PASSWORD.encode('utf-8')).hexdigest()
+    _write_json(os.path.join(target_dir, "parents.json"), {
+        family["email"]: {
+            "password": password,
+            "parent_name": family["father_name"],
+            "student_ids": family["student_ids"],
+            "phone": family["phone"],
+            "created_at": created_at,
+            "status": "active"
+        }
+        for family in families
+    })
+
+    payments = _parent_payments(rng, student_rows, as_of)
+    PaymentStore(os.path.join(target_dir, PAYMENTS_LOG)).add_many(payments)
+
+    return {
+        "target_dir": os.path.abspath(target_dir),
+        "students": len(student_rows),
+        "families": len(families),
+        "years": years,
+        "seed": seed,
+        "as_of": as_of.strftime("%Y-%m-%d"),
+        "ledger_rows": len(ledger),
+        "ledger_bytes": os.path.getsize(os.path.join(target_dir, "fees_data.csv")),
+        "parent_payments": len(payments)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic school dataset")
+    parser.add_argument("target_dir", help="Directory to write the data files to")
+    parser.add_argument("--students", type=int, default=500, help="Number of students")
+    parser.add_argument("--years", type=int, default=1, help="Academic years of fee history")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--as-of", default=DEFAULT_AS_OF.strftime("%Y-%m-%d"),
+                        help="Date the dataset ends at (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    summary = generate_dataset(
+        args.target_dir, args.students, args.years, args.seed,
+        datetime.strptime(args.as_of, "%Y-%m-%d").date()
+    )
+    print(json.dumps(summary, indent=4))
+
+if __name__ == "__main__":
+    main()
+# [file content end]
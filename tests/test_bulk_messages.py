@@ -0,0 +1,46 @@
+# type:ignore
+"""Bulk message queues: filters and the queue kept between reruns"""
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from bulk_messages import reminder_queue
+
+def _section_app():
+    import pandas as pd
+    import streamlit as st
+    from bulk_messages import QUEUE_COLUMNS, bulk_messages_section
+
+    selected_class = st.selectbox("Class", ["One", "Two"])
+
+    def builder(template):
+        return pd.DataFrame([{column: "" for column in QUEUE_COLUMNS} | {
+            "student_name": f"Student in {selected_class}", "class_category": selected_class, "status": "queued"
+        }])
+
+    bulk_messages_section(builder, "Hello {student_name}", ["student_name"], key="messages",
+                          file_stem="messages", query={"classes": [selected_class]})
+
+def test_queue_is_dropped_when_the_filter_changes():
+    at = AppTest.from_function(_section_app).run()
+    at.button(key="messages_build").click().run()
+    assert at.dataframe[0].value["class_category"].tolist() == ["One"]
+
+    at.selectbox[0].select("Two").run()
+    assert len(at.dataframe) == 0
+    assert "messages_queue" not in at.session_state
+
+    at.button(key="messages_build").click().run()
+    assert at.dataframe[0].value["class_category"].tolist() == ["Two"]
+
+def test_reminder_queue_applies_the_name_search():
+    df = pd.DataFrame({
+        "ID": ["A", "B"], "Month": ["JULY", "JULY"], "Monthly Fee": [0, 0], "Annual Charges": [0, 0],
+        "Admission Fee": [0, 0], "Received Amount": [0, 0]
+    })
+    students = {
+        "A": {"student_name": "Ali Khan", "father_name": "K", "class_category": "One", "phone": "03001234567"},
+        "B": {"student_name": "Sara Malik", "father_name": "M", "class_category": "One", "phone": "03001234568"}
+    }
+    queue = reminder_queue("JULY", "{student_name}", df=df, student_details=students, student_fees={},
+                           default_fees={"monthly_fee": 3000}, search="sara")
+    assert queue["student_name"].tolist() == ["Sara Malik"]
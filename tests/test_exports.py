@@ -0,0 +1,24 @@
+# type:ignore
+"""Exports built from CSV text that was rendered elsewhere"""
+import gzip
+import io
+
+from openpyxl import load_workbook
+
+from exports import CsvText, export_bytes
+
+PIECES = ['Date,Remarks\n2025-07-11,"Paid, ', 'with ""note""\nsecond line"\n', '2025-06-19,JUNE\n']
+
+def test_csv_text_written_as_is_in_every_format(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    source = lambda: CsvText(iter(PIECES))
+
+    assert export_bytes("history", source, "csv", version=1).decode() == "".join(PIECES)
+    assert gzip.decompress(export_bytes("history", source, "csv.gz", version=1)).decode() == "".join(PIECES)
+
+    workbook = load_workbook(io.BytesIO(export_bytes("history", source, "xlsx", version=1)))
+    assert list(workbook.active.values) == [
+        ("Date", "Remarks"),
+        ("2025-07-11", 'Paid, with "note"\nsecond line'),
+        ("2025-06-19", "JUNE")
+    ]
@@ -0,0 +1,85 @@
+# type:ignore
+"""Gateway client caching and concurrent status inquiries against the gateway simulator"""
+import pytest
+
+from easy_paisa import EasyPaisaPayment
+from gateway_client import check_statuses, get_gateway_client, reset_gateway_clients
+from gateway_simulator import point_clients_at, start_simulator
+from jazz_cash import JazzCashPayment
+
+@pytest.fixture
+def simulator(tmp_path, monkeypatch):
+    # Gateway objects read their config files from the working directory
+    monkeypatch.chdir(tmp_path)
+    server, base_url = start_simulator(seed=7)
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+    reset_gateway_clients()
+
+def make_gateways(base_url, **settings):
+    gateways = {"JazzCash": JazzCashPayment(), "EasyPaisa": EasyPaisaPayment()}
+    point_clients_at(base_url, gateways["JazzCash"], gateways["EasyPaisa"])
+    for gateway in gateways.values():
+        gateway.config.update(settings)
+    return gateways
+
+def pay(gateways, count):
+    """Make payments through the simulator; returns records for check_statuses"""
+    payments = []
+    for number in range(count):
+        method = "JazzCash" if number % 2 else "EasyPaisa"
+        initiated = gateways[method].initiate_payment(500 * (number + 1), f"S{number:03d}", "Student", "School Fees")
+        response = get_gateway_client(method).send_once(initiated["payment_url"], initiated["payment_data"])
+        verified = gateways[method].verify_payment(response)
+        assert verified["success"] and verified["status"]
+        payments.append({"payment_method": method, "transaction_id": verified["transaction_id"], "amount": verified["amount"]})
+    return payments
+
+def test_clients_follow_settings():
+    try:
+        client = get_gateway_client("JazzCash", {"read_timeout": 10})
+        assert get_gateway_client("JazzCash", {"read_timeout": 10}) is client
+        # The default settings are the same client as spelling them out
+        assert get_gateway_client("JazzCash") is client
+
+        changed = get_gateway_client("JazzCash", {"read_timeout": 5})
+        assert changed is not client
+        assert changed.timeout[1] == 5
+        assert get_gateway_client("EasyPaisa", {"read_timeout": 10}) is not client
+
+        reset_gateway_clients()
+        assert get_gateway_client("JazzCash", {"read_timeout": 10}) is not client
+    finally:
+        reset_gateway_clients()
+
+def test_check_statuses_retries_through_errors(simulator):
+    server, base_url = simulator
+    gateways = make_gateways(base_url, max_retries=10, backoff_factor=0)
+    payments = pay(gateways, 20)
+
+    server.simulator.error_rate = 0.3
+    statuses = check_statuses(payments, max_workers=4, gateways=gateways)
+
+    assert set(statuses) == {payment["transaction_id"] for payment in payments}
+    for payment in payments:
+        status = statuses[payment["transaction_id"]]
+        assert status["success"] and status["status"]
+        assert status["amount"] == payment["amount"]
+
+def test_check_statuses_reports_errors_without_raising(simulator):
+    server, base_url = simulator
+    gateways = make_gateways(base_url, max_retries=1, backoff_factor=0)
+    payments = pay(gateways, 4)
+    payments.append({"payment_method": "JazzCash", "transaction_id": "UNKNOWN"})
+    payments.append({"payment_method": "Cash", "transaction_id": "CASH-1"})
+
+    server.simulator.error_rate = 1.0
+    statuses = check_statuses(payments, max_workers=4, gateways=gateways)
+
+    assert "CASH-1" not in statuses
+    assert len(statuses) == 5
+    assert all(not status["success"] and "503" in status["error"] for status in statuses.values())
+
+    server.simulator.error_rate = 0.0
+    assert not check_statuses(payments, gateways=gateways)["UNKNOWN"]["success"]
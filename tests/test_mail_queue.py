@@ -0,0 +1,89 @@
+# type:ignore
+"""Mail queue delivery, retry and failure handling against the debugging SMTP server"""
+import socket
+import time
+
+import pytest
+
+from mail_queue import DEFAULT_MAIL_CONFIG, MailQueue, start_debugging_server
+
+@pytest.fixture
+def smtp_server():
+    server, port = start_debugging_server(refused=["nobody@example.com"])
+    yield server, port
+    server.shutdown()
+    server.server_close()
+
+def make_queue(tmp_path, port, **overrides):
+    config = dict(
+        DEFAULT_MAIL_CONFIG,
+        smtp_host="127.0.0.1",
+        smtp_port=port,
+        smtp_starttls=False,
+        from_address="school@example.com",
+        admin_address="admin@example.com",
+        timeout=5,
+        **overrides
+    )
+    return MailQueue(str(tmp_path / "mail_queue.jsonl"), config)
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_batch_is_delivered_over_one_connection(tmp_path, smtp_server):
+    server, port = smtp_server
+    mail_queue = make_queue(tmp_path, port)
+    for number in range(5):
+        mail_queue.enqueue("admin@example.com", f"Signup {number}", "New parent signup")
+
+    assert mail_queue.send_batch() == 5
+    mail_queue._close()
+
+    assert mail_queue.counts() == {"sent": 5}
+    assert server.connections == 1
+    assert len(server.received) == 5
+    assert "Subject: Signup 0" in server.received[0]
+
+def test_failed_connect_backs_off_then_fails(tmp_path):
+    mail_queue = make_queue(tmp_path, unused_port(), retry_delay=0.2, max_attempts=3)
+    mail_id = mail_queue.enqueue("admin@example.com", "Signup", "New parent signup")
+
+    delays = []
+    for _ in range(2):
+        before = time.time()
+        assert mail_queue.send_batch() == 0
+        mail = mail_queue.mail[mail_id]
+        assert mail["status"] == "queued"
+        assert mail["error"].startswith("connect:")
+        delays.append(mail["next_attempt_at"] - before)
+        # Not due again until the backoff has passed
+        assert mail_queue.due() == []
+        time.sleep(max(0, mail["next_attempt_at"] - time.time()) + 0.01)
+
+    assert mail_queue.mail[mail_id]["attempts"] == 2
+    assert delays[0] == pytest.approx(0.2, abs=0.1)
+    assert delays[1] == pytest.approx(0.4, abs=0.1)
+
+    # The third failure reaches max_attempts
+    assert mail_queue.send_batch() == 0
+    assert mail_queue.mail[mail_id]["status"] == "failed"
+    assert mail_queue.due() == []
+
+def test_refused_recipient_fails_without_retry(tmp_path, smtp_server):
+    server, port = smtp_server
+    mail_queue = make_queue(tmp_path, port)
+    refused_id = mail_queue.enqueue("nobody@example.com", "Signup", "New parent signup")
+    delivered_id = mail_queue.enqueue("admin@example.com", "Signup", "New parent signup")
+
+    assert mail_queue.send_batch() == 1
+    mail_queue._close()
+
+    refused = mail_queue.mail[refused_id]
+    assert refused["status"] == "failed"
+    assert refused["attempts"] == 0
+    assert "nobody@example.com" in refused["error"]
+    assert mail_queue.mail[delivered_id]["status"] == "sent"
+    assert mail_queue.due() == []
+    assert len(server.received) == 1
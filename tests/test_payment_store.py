@@ -0,0 +1,24 @@
+# type:ignore
+"""Migration of the legacy JSON payment files into the payment store"""
+import json
+import os
+
+from payment_store import LEGACY_PAYMENT_FILES, PaymentStore, migrate_legacy_payments
+
+def test_duplicate_legacy_request_ids_are_kept_apart(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy_path = LEGACY_PAYMENT_FILES[0][0]
+    os.makedirs(os.path.dirname(legacy_path), exist_ok=True)
+    with open(legacy_path, 'w') as f:
+        json.dump({
+            "S1": [{"request_id": "REQ_1", "amount": 100}, {"request_id": "REQ_1", "amount": 200}],
+            "S2": [{"request_id": "REQ_1", "amount": 300}, {"amount": 50}]
+        }, f)
+
+    store = PaymentStore("payment_requests.jsonl")
+    assert migrate_legacy_payments(store) == []
+
+    amounts = {payment_id: payment["amount"] for payment_id, payment in store.payments.items()}
+    assert len(amounts) == 4
+    assert {amounts["REQ_1"], amounts["REQ_1_2"], amounts["REQ_1_3"]} == {100, 200, 300}
+    assert os.path.exists(f"{legacy_path}.migrated")
@@ -0,0 +1,74 @@
+# type:ignore
+"""Payment verification and ingestion from two processes at once (app + callback receiver)"""
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from database import LEDGER_COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROCESSES = 2
+
+# Each process waits for the go file, so they all start at once
+WAIT_FOR_START = """
+import os, time
+while not os.path.exists("go"):
+    time.sleep(0.01)
+"""
+
+VERIFY_ALL = WAIT_FOR_START + """
+from payment_verification import verify_payments
+for payment_id in open("payment_ids.txt").read().split():
+    verify_payments([payment_id], approve=True, verified_by=f"process {os.getpid()}")
+"""
+
+INGEST_ALL = WAIT_FOR_START + """
+from real_payment_system import RealPaymentSystem
+payment_system = RealPaymentSystem()
+for number in range(30):
+    payment_system.ingest_parent_payment("S001", "Student", 500, "JazzCash", f"TXN{number:03d}")
+"""
+
+def _run(script):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    processes = [subprocess.Popen([sys.executable, "-c", script], env=env) for _ in range(PROCESSES)]
+    time.sleep(0.5)
+    open("go", "w").close()
+    for process in processes:
+        assert process.wait(120) == 0
+
+def test_two_processes_credit_each_payment_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame(columns=LEDGER_COLUMNS).to_csv("fees_data.csv", index=False)
+    from payment_store import PaymentStore
+    store = PaymentStore()
+    payment_ids = store.add_many([
+        {"student_id": f"S{number:03d}", "amount": 500, "payment_method": "JazzCash",
+         "transaction_id": f"TXN{number:03d}", "source": "gateway_callback", "ledger_recorded": False}
+        for number in range(30)
+    ])
+    with open("payment_ids.txt", "w") as f:
+        f.write("\n".join(payment_ids))
+
+    _run(VERIFY_ALL)
+
+    ledger = pd.read_csv("fees_data.csv")
+    assert sorted(ledger["Transaction ID"]) == [f"TXN{number:03d}" for number in range(30)]
+    store.refresh()
+    assert all(store.payments[payment_id]["status"] == "verified" for payment_id in payment_ids)
+    with open(store.path) as f:
+        assert sum('"status": "verified"' in line for line in f) == 30
+
+def test_two_processes_record_each_transaction_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    _run(INGEST_ALL)
+
+    from payment_store import PaymentStore
+    store = PaymentStore()
+    store.refresh()
+    assert len(store.payments) == 30
+    assert len(store.by_transaction) == 30
@@ -0,0 +1,70 @@
+# type:ignore
+"""Slip archive writes racing with compaction"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from slip_archive import SlipArchive
+
+SLIPS = 500
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The retention job as the CLI runs it: a separate process compacting in a loop
+COMPACT_LOOP = """
+import os, sys
+from slip_archive import SlipArchive
+archive = SlipArchive(sys.argv[1])
+open(sys.argv[2], "w").close()
+while not os.path.exists(sys.argv[3]):
+    archive.compact(retention_days=365)
+"""
+
+def _put_many(archive, count):
+    for number in range(count):
+        key = f"{number:032x}"
+        archive.put(key, {"student_id": number}, {"format": "PNG", "data": b"slip %d" % number})
+
+def test_compact_keeps_slips_written_while_it_runs(tmp_path):
+    archive = SlipArchive(str(tmp_path / "slips"))
+    done = threading.Event()
+
+    def write():
+        _put_many(archive, SLIPS)
+        done.set()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while not done.is_set():
+        archive.compact(retention_days=365)
+    writer.join()
+
+    archive.refresh()
+    assert len(archive.slips) == SLIPS
+    for entry in archive.slips.values():
+        assert os.path.exists(os.path.join(archive.directory, entry["file"]))
+
+def test_compact_in_another_process_keeps_new_slips(tmp_path):
+    directory = str(tmp_path / "slips")
+    started, stop = str(tmp_path / "started"), str(tmp_path / "stop")
+    compactor = subprocess.Popen(
+        [sys.executable, "-c", COMPACT_LOOP, directory, started, stop],
+        env=dict(os.environ, PYTHONPATH=ROOT)
+    )
+    try:
+        while not os.path.exists(started):
+            assert compactor.poll() is None
+            time.sleep(0.01)
+        archive = SlipArchive(directory)
+        _put_many(archive, SLIPS)
+    finally:
+        open(stop, "w").close()
+        compactor.wait(60)
+
+    archive = SlipArchive(directory)
+    archive.refresh()
+    assert len(archive.slips) == SLIPS
+    for entry in archive.slips.values():
+        assert os.path.exists(os.path.join(archive.directory, entry["file"]))
@@ -6,192 +6,12 @@ import pandas as pd
 from datetime import datetime
 from database import load_data
 from auth import logout
+from assets import inject_css
 
 def hide_streamlit_elements():
     """Hide all Streamlit default elements including GitHub icon and deploy button"""
-    st.markdown("""
-    <style>
-    /* Hide ALL Streamlit toolbar elements */
-    div[data-testid="stToolbar"] {
-        display: none !important;
-    }
-    
-    /* Hide GitHub icon */
-    button[title="View app source on GitHub"] {
-        display: none !important;
-    }
-    
-    /* Hide deploy button */
-    .stApp > header > div:first-child {
-        display: none !important;
-    }
-    
-    /* Hide the entire header */
-    header {
-        display: none !important;
-    }
-    
-    /* Hide any remaining toolbar buttons */
-    .stToolbar {
-        display: none !important;
-    }
-    
-    /* Hide the Streamlit hamburger menu */
-    #MainMenu {
-        display: none !important;
-    }
-    
-    /* Alternative selectors for header elements */
-    .stApp > header {
-        display: none !important;
-    }
-    
-    /* Hide any element that might contain the warning text */
-    .stAlert, .stWarning, .stException {
-        display: none !important;
-    }
-    
-    /* Hide the specific warning about experimental_get_query_params */
-    div[data-testid="stException"] {
-        display: none !important;
-    }
-    
-    /* Click-to-Show Navbar Styles - SIMPLIFIED */
-    .navbar-toggle-container {
-        position: fixed;
-        bottom: 20px;
-        left: 50%;
-        transform: translateX(-50%);
-        z-index: 1000;
-        width: 90%;
-        max-width: 400px;
-    }
-    
-    .navbar-toggle-btn {
-        width: 100%;
-        padding: 0.8rem 1.5rem;
-        border-radius: 25px;
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        color: white;
-        border: none;
-        font-weight: 600;
-        font-size: 1rem;
-        cursor: pointer;
-        box-shadow: 0 8px 25px rgba(0, 0, 0, 0.2);
-        transition: all 0.3s ease;
-        display: flex;
-        justify-content: center;
-        align-items: center;
-        gap: 10px;
-    }
-    
-    .navbar-toggle-btn:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 12px 30px rgba(0, 0, 0, 0.3);
-    }
-        
-    @keyframes slideUp {
-        from {
-            opacity: 0;
-            transform: translate(-50%, 20px);
-        }
-        to {
-            opacity: 1;
-            transform: translate(-50%, 0);
-        }
-    }
-    
-    .navbar-expanded-content {
-        display: flex;
-        flex-direction: column;
-        gap: 8px;
-    }
-    
-    .nav-expanded-btn {
-        background: #f8f9fa;
-        color: #333;
-        padding: 0.8rem 1rem;
-        border-radius: 10px;
-        border: 1px solid #e0e0e0;
-        cursor: pointer;
-        font-weight: 500;
-        font-size: 0.9rem;
-        transition: all 0.3s ease;
-        display: flex;
-        align-items: center;
-        gap: 12px;
-        text-align: left;
-    }
-    
-    .nav-expanded-btn:hover {
-        background: #e9ecef;
-        border-color: #667eea;
-    }
-    
-    .nav-expanded-btn.active {
-        background: #667eea;
-        color: white;
-        border-color: #667eea;
-    }
-    
-    .user-info-expanded {
-        display: flex;
-        flex-direction: column;
-        gap: 10px;
-        margin-top: 15px;
-        padding-top: 15px;
-        border-top: 1px solid #e0e0e0;
-    }
-    
-    .user-badge-expanded {
-        background: #00b894;
-        color: white;
-        padding: 0.6rem 1rem;
-        border-radius: 10px;
-        font-size: 0.85rem;
-        font-weight: 600;
-        text-align: center;
-        margin-bottom: 10px;
-    }
-    
-    .admin-badge {
-        background: #0984e3 !important;
-    }
-    
-    .trial-badge-expanded {
-        background: #fdcb6e;
-        color: #333;
-        padding: 0.6rem 1rem;
-        border-radius: 10px;
-        font-size: 0.85rem;
-        font-weight: 600;
-        text-align: center;
-        margin-bottom: 10px;
-    }
-    
-    .logout-btn-expanded {
-        background: #e17055;
-        color: white;
-        border: none;
-        padding: 0.8rem 1rem;
-        border-radius: 10px;
-        cursor: pointer;
-        font-weight: 600;
-        font-size: 0.9rem;
-        transition: all 0.3s ease;
-        margin-top: 5px;
-    }
-    
-    .logout-btn-expanded:hover {
-        background: #d63031;
-    }
-    
-    /* Prevent content from being hidden behind navbar */
-    .stApp {
-        padding-bottom: 100px;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+    # Styles live in assets/app.css and are served as a cached static file
+    inject_css("app.css")
 
 def navbar_collapsible_component(menu_options):
     """Click-to-Show Navbar without purple div"""
@@ -224,6 +44,9 @@ def navbar_collapsible_component(menu_options):
             "View All Records": "📋",
             "Paid & Unpaid Students Record": "✅",
             "Student Yearly Report": "📊",
+            "Payment Verification": "🧾",
+            "Bank Reconciliation": "🏦",
+            "Batch Fee Slips": "🖨️",
             "User Management": "👥",
             "Set Student Fees": "💸"
         }
@@ -297,6 +120,9 @@ def navbar_component(menu_options):
                 "View All Records": "📋", 
                 "Paid & Unpaid Students Record": "✅",
                 "Student Yearly Report": "📊",
+                "Payment Verification": "🧾",
+                "Bank Reconciliation": "🏦",
+                "Batch Fee Slips": "🖨️",
                 "User Management": "👥",
                 "Set Student Fees": "💸"
             }
@@ -348,6 +174,9 @@ def navbar_bottom_component(menu_options):
             "View All Records": "📋",
             "Paid & Unpaid Students Record": "✅",
             "Student Yearly Report": "📊",
+            "Payment Verification": "🧾",
+            "Bank Reconciliation": "🏦",
+            "Batch Fee Slips": "🖨️",
             "User Management": "👥",
             "Set Student Fees": "💸"
         }